@@ -0,0 +1,111 @@
+# =====================================================================
+# ALERTAS.PY - Alertas de stock bajo con evaluación incremental
+# =====================================================================
+# Revisar TODOS los insumos cada minuto no escala. En cambio:
+#   1. Cada vez que se guarda o elimina un Insumo, una señal lo anota
+#      en InsumoPendiente (ver signals.py).
+#   2. evaluar_pendientes() revisa SOLO esos insumos: si la cantidad
+#      está por debajo del umbral crea/actualiza su AlertaStock, si no,
+#      la borra. Luego quita las marcas procesadas.
+#   3. El dashboard lee AlertaStock, que ya está calculada.
+#
+# Después de crear_insumo / editar_insumo se evalúa solo ESE insumo al
+# confirmar la transacción (evaluar([id])): una edición no carga con lo
+# que dejó pendiente una importación. Eso lo revisa:
+#     python manage.py evaluar_alertas
+#
+# Dos evaluaciones a la vez del mismo insumo pueden querer crear la
+# misma alerta: el INSERT ignora la que ya existe (ignore_conflicts).
+# =====================================================================
+
+from django.db import transaction
+from django.utils import timezone
+
+from .models import Insumo, InsumoPendiente, AlertaStock
+from . import cache
+
+TAMANO_LOTE = 500
+
+
+def marcar(insumo_ids):
+    """Anota insumos para revisarlos en la próxima evaluación."""
+    ahora = timezone.now()
+    InsumoPendiente.objects.bulk_create(
+        [InsumoPendiente(insumo_id=i, marcado=ahora) for i in insumo_ids],
+        update_conflicts=True, unique_fields=["insumo_id"], update_fields=["marcado"],
+    )
+
+
+def _evaluar_lote(ids):
+    # Devuelve cuántas alertas cambiaron
+    insumos = Insumo.objects.in_bulk(ids)
+    actuales = {a.insumo_id: a for a in AlertaStock.objects.filter(insumo_id__in=ids)}
+
+    crear, actualizar, borrar = [], [], []
+    for insumo_id in ids:
+        insumo = insumos.get(insumo_id)
+        alerta = actuales.get(insumo_id)
+        if insumo is not None and insumo.stock_bajo:
+            if alerta is None:
+                crear.append(AlertaStock(insumo=insumo, cantidad=insumo.cantidad, umbral=insumo.umbral))
+            elif (alerta.cantidad, alerta.umbral) != (insumo.cantidad, insumo.umbral):
+                alerta.cantidad, alerta.umbral = insumo.cantidad, insumo.umbral
+                alerta.actualizada = timezone.now()
+                actualizar.append(alerta)
+        elif alerta is not None:
+            borrar.append(alerta.id)
+
+    # Si otra evaluación ya la creó, se deja la suya (insumo es único)
+    AlertaStock.objects.bulk_create(crear, ignore_conflicts=True)
+    AlertaStock.objects.bulk_update(actualizar, ["cantidad", "umbral", "actualizada"])
+    AlertaStock.objects.filter(id__in=borrar).delete()
+    return len(crear) + len(actualizar) + len(borrar)
+
+
+def _evaluar_y_desmarcar(ids, inicio):
+    # Devuelve cuántas alertas cambiaron
+    with transaction.atomic():
+        cambios = _evaluar_lote(ids)
+        # Si un insumo se volvió a marcar mientras tanto (marcado > inicio)
+        # la marca se conserva para la próxima evaluación
+        InsumoPendiente.objects.filter(insumo_id__in=ids, marcado__lte=inicio).delete()
+    return cambios
+
+
+def _invalidar(cambios):
+    if cambios:
+        # El dashboard está en cache: se invalida solo si alguna alerta cambió
+        cache.subir_version("alerta")
+
+
+def evaluar(ids):
+    """Revisa solo estos insumos (los demás pendientes quedan marcados)."""
+    _invalidar(_evaluar_y_desmarcar(list(ids), timezone.now()))
+
+
+def evaluar_pendientes(tamano_lote=TAMANO_LOTE):
+    """
+    Revisa los insumos marcados desde la última evaluación.
+    Devuelve cuántos insumos se revisaron.
+    """
+    revisados = 0
+    cambios = 0
+    inicio = timezone.now()
+    ultimo = 0
+    while True:
+        ids = list(
+            InsumoPendiente.objects.filter(marcado__lte=inicio, insumo_id__gt=ultimo)
+            .order_by("insumo_id").values_list("insumo_id", flat=True)[:tamano_lote]
+        )
+        if not ids:
+            break
+        cambios += _evaluar_y_desmarcar(ids, inicio)
+        revisados += len(ids)
+        ultimo = ids[-1]
+
+    _invalidar(cambios)
+    return revisados
+
+
+def alertas_vigentes(limite=10):
+    return AlertaStock.objects.select_related("insumo").order_by("-actualizada")[:limite]
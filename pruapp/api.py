@@ -0,0 +1,67 @@
+# =====================================================================
+# API.PY - API JSON de solo lectura del catálogo
+# =====================================================================
+# Las terminales de caja y las pantallas de cocina leían menu.html para
+# saber qué hay en stock: una página HTML completa por cada consulta.
+# Ahora tienen:
+#
+#     GET /api/productos/?fields=nombre,stock&tamano=100&despues=<id>
+#
+# (también /api/insumos/ y /api/empleados/)
+#   - Las filas salen con .values(): diccionarios, sin crear objetos.
+#   - ?fields= elige las columnas (el id va siempre: es el cursor).
+#   - Paginación por cursor, igual que las listas (ver paginacion.py).
+#   - ETag y Last-Modified salen del contador de versión de la tabla
+#     (VersionCatalogo, ver cache.py). Si el cliente manda el ETag que
+#     ya tiene (If-None-Match) y la tabla no cambió, se responde 304 sin
+#     leer ninguna fila: una sola consulta (la versión).
+#   - La versión se lee de la misma base que las filas (la réplica si
+#     la vista la usa, ver routers.py) y antes que ellas: el ETag nunca
+#     es más nuevo que el contenido que lo acompaña.
+# =====================================================================
+
+import hashlib
+from urllib.parse import urlencode
+
+from django.db import router
+
+from .cache import nombre_version
+from .models import Producto, Insumo, Empleado, VersionCatalogo
+
+# Nombre en la URL -> (modelo, campos que se pueden pedir; por defecto todos)
+RECURSOS = {
+    "productos": (Producto, ("id", "nombre", "precio", "stock", "imagen_url", "actualizado")),
+    "insumos": (Insumo, ("id", "nombre", "cantidad", "unidad", "umbral", "fecha", "ultima_info", "actualizado")),
+    "empleados": (Empleado, ("id", "nombre", "rol", "edad", "telefono", "estado", "foto_url", "actualizado")),
+}
+
+
+def campos_pedidos(recurso, texto):
+    """Campos de ?fields=a,b (con el id primero). ValueError si alguno no existe."""
+    permitidos = RECURSOS[recurso][1]
+    if not texto:
+        return list(permitidos)
+    pedidos = [campo.strip() for campo in texto.split(",") if campo.strip()]
+    desconocidos = [campo for campo in pedidos if campo not in permitidos]
+    if desconocidos:
+        raise ValueError(f"Campos no válidos: {', '.join(desconocidos)} (se permiten: {', '.join(permitidos)})")
+    return ["id"] + [campo for campo in dict.fromkeys(pedidos) if campo != "id"]
+
+
+def version(recurso):
+    """(versión, fecha del último cambio) de la tabla, con una consulta a la base de sus filas."""
+    modelo = RECURSOS[recurso][0]
+    fila = (
+        VersionCatalogo.objects.using(router.db_for_read(modelo))
+        .filter(nombre=nombre_version(modelo))
+        .values_list("version", "actualizada").first()
+    )
+    return fila or (0, None)
+
+
+def etag(recurso, numero, request):
+    # La misma versión con otros parámetros (?fields, otra página) es
+    # otro contenido: los parámetros también entran en el ETag
+    parametros = urlencode(sorted(request.GET.lists()), doseq=True)
+    resumen = hashlib.md5(parametros.encode()).hexdigest()[:12]
+    return f'"{recurso}-{numero}-{resumen}"'
@@ -4,3 +4,17 @@ from django.apps import AppConfig
 class PruappConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'pruapp'
+
+    def ready(self):
+        # Conecta las señales (índice de búsqueda, etc.)
+        from . import signals  # noqa: F401
+
+        # Cada conexión a la base de datos mide sus consultas (ver metricas.py)
+        from django.db.backends.signals import connection_created
+        from .metricas import activas, instalar_en_conexion
+        if activas():
+            connection_created.connect(instalar_en_conexion, dispatch_uid="metricas_sql")
+
+        # PRAGMAs de rendimiento en cada conexión SQLite (ver sqlite.py)
+        from .sqlite import aplicar_pragmas
+        connection_created.connect(aplicar_pragmas, dispatch_uid="sqlite_pragmas")
@@ -0,0 +1,266 @@
+# =====================================================================
+# BENCH.PY - Utilidades para los comandos de benchmark
+# =====================================================================
+# Funciones compartidas por los comandos bench_* :
+#   - base_temporal(): crea una base de datos de prueba (nunca toca
+#     db.sqlite3) y la borra al terminar
+#   - concurrente() / aconcurrente(): ejecutan una función muchas veces
+#     con N hilos (o N tareas async) y miden cuánto tarda cada llamada
+#   - cliente_con_sesion(): cliente de pruebas ya logueado
+#   - resumir(): calcula peticiones/segundo y percentiles p50/p95/p99
+#   - guardar(): escribe el resultado en benchmarks/<nombre>-<fecha>.json
+#     para poder comparar entre commits
+#   - sembrar(): llena las tablas del catálogo con datos de prueba
+#   - servidor_local(): levanta un servidor WSGI real en un hilo
+# =====================================================================
+
+import asyncio
+import json
+import os
+import random
+import shutil
+import subprocess
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from datetime import date, datetime, timedelta
+from importlib import import_module
+
+from django.conf import settings
+from django.core.servers.basehttp import ThreadedWSGIServer, WSGIRequestHandler
+from django.core.wsgi import get_wsgi_application
+from django.db import close_old_connections, connection, connections, transaction
+from django.test import Client
+from django.test.utils import setup_test_environment, teardown_test_environment
+
+from .models import Producto, Insumo, Empleado
+
+CARPETA_RESULTADOS = os.path.join(settings.BASE_DIR, "benchmarks")
+
+# Cache desactivado: para medir el trabajo real de las vistas
+SIN_CACHE = {
+    "default": {"BACKEND": "django.core.cache.backends.dummy.DummyCache"},
+    "archivos": {"BACKEND": "django.core.cache.backends.dummy.DummyCache"},
+}
+
+
+@contextmanager
+def base_temporal():
+    """
+    Crea una base de datos de prueba en un archivo temporal, aplica las
+    migraciones y la elimina al salir. Se usa un archivo (no memoria)
+    para que varios hilos puedan escribir a la vez.
+    """
+    setup_test_environment()
+    carpeta = tempfile.mkdtemp(prefix="bench_")
+    if connection.vendor == "sqlite":
+        settings.DATABASES["default"].setdefault("TEST", {})["NAME"] = os.path.join(carpeta, "bench.sqlite3")
+    nombre_original = connection.creation.create_test_db(verbosity=0, autoclobber=True, serialize=False)
+    try:
+        yield
+    finally:
+        connections.close_all()
+        connection.creation.destroy_test_db(nombre_original, verbosity=0)
+        teardown_test_environment()
+        # Con WAL quedan los archivos -wal y -shm junto a la base
+        shutil.rmtree(carpeta, ignore_errors=True)
+
+
+def percentil(ordenados, p):
+    # ordenados: lista ya ordenada; p entre 0 y 100
+    if not ordenados:
+        return 0.0
+    posicion = min(len(ordenados) - 1, max(0, round(p / 100 * (len(ordenados) - 1))))
+    return ordenados[posicion]
+
+
+def concurrente(funcion, total, concurrencia):
+    """
+    Llama funcion(i) 'total' veces repartidas en 'concurrencia' hilos.
+    Devuelve (lista de tiempos en segundos, duración total).
+    """
+    def medir(i):
+        inicio = time.perf_counter()
+        try:
+            funcion(i)
+        finally:
+            # Cada hilo tiene su propia conexión; se cierra solo si pasó
+            # CONN_MAX_AGE o está rota (igual que al final de una petición)
+            close_old_connections()
+        return time.perf_counter() - inicio
+
+    inicio = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrencia) as pool:
+        tiempos = list(pool.map(medir, range(total)))
+    return tiempos, time.perf_counter() - inicio
+
+
+async def aconcurrente(funcion, total, concurrencia):
+    """
+    Versión async de concurrente(): 'concurrencia' tareas a la vez en el
+    mismo event loop, cada una llamando "await funcion(i)".
+    """
+    semaforo = asyncio.Semaphore(concurrencia)
+
+    async def medir(i):
+        async with semaforo:
+            inicio = time.perf_counter()
+            await funcion(i)
+            return time.perf_counter() - inicio
+
+    inicio = time.perf_counter()
+    tiempos = await asyncio.gather(*(medir(i) for i in range(total)))
+    return list(tiempos), time.perf_counter() - inicio
+
+
+def cliente_con_sesion(usuario, clase=Client):
+    """
+    Cliente de pruebas que ya tiene la sesión iniciada como 'usuario',
+    sin pasar por el login (que es lento a propósito, ver contrasenas.py).
+    """
+    sesion = import_module(settings.SESSION_ENGINE).SessionStore()
+    sesion["usuario_id"] = usuario.id
+    sesion["usuario_nombre"] = usuario.username
+    sesion.save()
+    cliente = clase()
+    cliente.cookies[settings.SESSION_COOKIE_NAME] = sesion.session_key
+    return cliente
+
+
+def resumir(tiempos, duracion, **extra):
+    """Peticiones por segundo y percentiles (en milisegundos)."""
+    ordenados = sorted(tiempos)
+    resultado = {
+        "peticiones": len(tiempos),
+        "req_s": round(len(tiempos) / duracion, 2) if duracion else 0.0,
+        "p50_ms": round(percentil(ordenados, 50) * 1000, 3),
+        "p95_ms": round(percentil(ordenados, 95) * 1000, 3),
+        "p99_ms": round(percentil(ordenados, 99) * 1000, 3),
+    }
+    resultado.update(extra)
+    return resultado
+
+
+def commit_actual():
+    try:
+        return subprocess.check_output(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=settings.BASE_DIR, stderr=subprocess.DEVNULL, text=True
+        ).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def guardar(nombre, resultados, carpeta=None, **parametros):
+    """Guarda los resultados en JSON y devuelve la ruta del archivo."""
+    carpeta = carpeta or CARPETA_RESULTADOS
+    os.makedirs(carpeta, exist_ok=True)
+    fecha = datetime.now()
+    ruta = os.path.join(carpeta, f"{nombre}-{fecha:%Y%m%d-%H%M%S}.json")
+    with open(ruta, "w", encoding="utf-8") as archivo:
+        json.dump({
+            "benchmark": nombre,
+            "fecha": fecha.isoformat(timespec="seconds"),
+            "commit": commit_actual(),
+            "parametros": parametros,
+            "resultados": resultados,
+        }, archivo, indent=2, ensure_ascii=False)
+    return ruta
+
+
+def imprimir_tabla(stdout, filas, columnas):
+    # Tabla simple en la consola: una fila por escenario
+    anchos = [max([len(c)] + [len(str(fila.get(c, ""))) for fila in filas]) for c in columnas]
+    stdout.write("  ".join(f"{c:>{ancho}}" for c, ancho in zip(columnas, anchos)))
+    for fila in filas:
+        stdout.write("  ".join(f"{str(fila.get(c, '')):>{ancho}}" for c, ancho in zip(columnas, anchos)))
+
+
+# =====================================================================
+# DATOS DE PRUEBA
+# =====================================================================
+PLATOS = ("Hamburguesa", "Pizza", "Perro caliente", "Salchipapa", "Arepa", "Empanada", "Gaseosa", "Jugo")
+ESTILOS = ("clásica", "doble", "especial", "de la casa", "picante", "mini", "familiar", "3L")
+INGREDIENTES = ("Harina", "Queso", "Tomate", "Carne", "Pan", "Papa", "Aceite", "Azúcar", "Leche", "Cebolla")
+NOMBRES = ("Ana", "Luis", "María", "Carlos", "Sofía", "Andrés", "Valentina", "Jorge", "Camila", "Diego")
+APELLIDOS = ("Gómez", "Rodríguez", "López", "Martínez", "García", "Pérez", "Cuevas", "Torres")
+ROLES = ("Cajero", "Mesero", "Chef")
+
+
+def _producto(azar, i):
+    return Producto(
+        nombre=f"{azar.choice(PLATOS)} {azar.choice(ESTILOS)} {i}",
+        precio=azar.randrange(2000, 80000, 500),
+        stock=azar.random() > 0.2,
+    )
+
+
+def _insumo(azar, i):
+    unidad = azar.choice(Insumo.Unidad.values)
+    return Insumo(
+        nombre=f"{azar.choice(INGREDIENTES)} {i}",
+        cantidad=azar.randint(0, 500),
+        unidad=unidad,
+        umbral=azar.choice((None, 10, 50)),
+        fecha=date.today() - timedelta(days=azar.randint(0, 60)),
+    )
+
+
+def _empleado(azar, i):
+    return Empleado(
+        nombre=f"{azar.choice(NOMBRES)} {azar.choice(APELLIDOS)} {i}",
+        rol=azar.choice(ROLES),
+        edad=azar.randint(18, 65),
+        telefono=f"3{azar.randint(100000000, 199999999)}",
+        estado=azar.random() > 0.1,
+    )
+
+
+def sembrar(filas, modelos=None, tamano_lote=5000, semilla=0, progreso=None):
+    """
+    Crea 'filas' filas en cada tabla del catálogo (Producto, Insumo,
+    Empleado) en lotes. Cada lote envía lote_guardado, así el índice de
+    búsqueda y los indicadores quedan al día igual que con importar_datos.
+    progreso: función opcional (modelo, creadas) que se llama por lote.
+    """
+    from .signals import lote_guardado
+
+    fabricas = {Producto: _producto, Insumo: _insumo, Empleado: _empleado}
+    azar = random.Random(semilla)
+    for modelo in modelos or fabricas:
+        inicio = modelo.objects.count()
+        for desde in range(0, filas, tamano_lote):
+            lote = [fabricas[modelo](azar, inicio + i) for i in range(desde, min(filas, desde + tamano_lote))]
+            with transaction.atomic():
+                modelo.objects.bulk_create(lote)
+                lote_guardado.send(sender=modelo, objetos=lote)
+            if progreso:
+                progreso(modelo, desde + len(lote))
+
+
+# =====================================================================
+# SERVIDOR WSGI LOCAL
+# =====================================================================
+class _ManejadorSilencioso(WSGIRequestHandler):
+    # Sin una línea en la consola por cada petición
+    def log_message(self, *args):
+        pass
+
+
+@contextmanager
+def servidor_local():
+    """
+    Levanta el servidor WSGI de Django (un hilo por petición) en un
+    puerto libre de 127.0.0.1 y devuelve la URL base ("http://127.0.0.1:PUERTO").
+    """
+    servidor = ThreadedWSGIServer(("127.0.0.1", 0), _ManejadorSilencioso)
+    servidor.set_app(get_wsgi_application())
+    hilo = threading.Thread(target=servidor.serve_forever, daemon=True)
+    hilo.start()
+    try:
+        yield f"http://127.0.0.1:{servidor.server_port}"
+    finally:
+        servidor.shutdown()
+        servidor.server_close()
+        hilo.join()
@@ -0,0 +1,324 @@
+# =====================================================================
+# BUSQUEDA.PY - Motor de búsqueda por texto para las listas
+# =====================================================================
+# Antes las búsquedas usaban nombre__icontains, que en SQLite se
+# convierte en LIKE '%texto%' y revisa TODA la tabla en cada búsqueda.
+#
+# Ahora usamos un índice de texto:
+#   - MotorFTS5: tablas virtuales FTS5 de SQLite (una por modelo).
+#     El "rowid" de cada fila es el ID del objeto. Se buscan prefijos
+#     ("har" encuentra "Harina") y se ordena por relevancia (bm25).
+#   - MotorMemoria: índice invertido en memoria, se usa cuando la base
+#     de datos no es SQLite o no tiene FTS5 (por ejemplo PostgreSQL).
+#     La relevancia es cuántas palabras coinciden completas.
+#
+# Las listas usan paginar_busqueda(): los resultados van del más
+# relevante al menos relevante (empate: por ID) y el cursor de cada
+# página es el par (relevancia, id) de la última fila, así que la
+# página 2 sigue donde terminó la 1 (ver paginar_por_clave en
+# paginacion.py). Cada página: una consulta al índice que devuelve
+# solo los IDs de esa página y otra por llave primaria.
+#
+# Los índices se mantienen al día con señales (ver signals.py). Cada
+# proceso tiene su propio MotorMemoria: antes de buscar se compara la
+# versión de la tabla (VersionCatalogo, ver cache.py) con la del índice
+# y, si otro proceso guardó algo, se aplican los cambios desde la última
+# lectura (columna "actualizado" y FilaEliminada, ver sincronizacion.py).
+# Si se cargan datos con bulk_create (que no dispara señales) se puede
+# reconstruir todo con: python manage.py reindexar_busqueda
+# =====================================================================
+
+import re
+import threading
+import unicodedata
+from bisect import bisect_left, bisect_right
+from functools import partial
+
+from django.db import connection
+from django.utils import timezone
+
+from . import sincronizacion
+from .api import RECURSOS
+from .cache import nombre_version, versiones
+from .models import Producto, Insumo, Empleado
+from .paginacion import paginar_por_clave
+
+# Qué campos se indexan de cada modelo.
+# El primer campo pesa más al ordenar los resultados.
+CAMPOS_INDEXADOS = {
+    Producto: ("nombre",),
+    Insumo: ("nombre",),
+    Empleado: ("nombre", "rol"),
+}
+
+# Pesos de cada columna para bm25 (mismo orden que CAMPOS_INDEXADOS)
+PESOS = {
+    Producto: (1.0,),
+    Insumo: (1.0,),
+    Empleado: (2.0, 1.0),
+}
+
+
+def nombre_tabla(modelo):
+    # Ej: pruapp_busqueda_insumo
+    return f"pruapp_busqueda_{modelo._meta.model_name}"
+
+
+def normalizar(texto):
+    # Minúsculas y sin tildes: "Azúcar" -> "azucar"
+    texto = unicodedata.normalize("NFKD", texto or "")
+    texto = "".join(c for c in texto if not unicodedata.combining(c))
+    return texto.lower()
+
+
+def palabras(texto):
+    # Divide el texto en palabras normalizadas
+    return re.findall(r"\w+", normalizar(texto))
+
+
+def _expresion_fts5(consulta):
+    # Cada palabra se busca como prefijo: "har"* encuentra "harina"
+    return " ".join(f'"{t}"*' for t in palabras(consulta))
+
+
+def valores_indexados(objeto):
+    return [getattr(objeto, campo) or "" for campo in CAMPOS_INDEXADOS[type(objeto)]]
+
+
+# =====================================================================
+# MOTOR FTS5 (SQLite)
+# =====================================================================
+class MotorFTS5:
+    nombre = "fts5"
+
+    def indexar(self, objeto):
+        self.indexar_lote(type(objeto), [objeto])
+
+    def indexar_lote(self, modelo, objetos):
+        # Indexa varios objetos con dos consultas (usado en importaciones masivas)
+        tabla = nombre_tabla(modelo)
+        columnas = ", ".join(CAMPOS_INDEXADOS[modelo])
+        marcas = ", ".join(["%s"] * len(CAMPOS_INDEXADOS[modelo]))
+        with connection.cursor() as cursor:
+            # FTS5 no tiene UPSERT: se borra la fila vieja y se inserta la nueva
+            cursor.executemany(f"DELETE FROM {tabla} WHERE rowid = %s", [[o.pk] for o in objetos])
+            cursor.executemany(
+                f"INSERT INTO {tabla} (rowid, {columnas}) VALUES (%s, {marcas})",
+                [[o.pk, *valores_indexados(o)] for o in objetos],
+            )
+
+    def eliminar(self, modelo, pk):
+        self.eliminar_lote(modelo, [pk])
+
+    def eliminar_lote(self, modelo, pks):
+        with connection.cursor() as cursor:
+            cursor.executemany(f"DELETE FROM {nombre_tabla(modelo)} WHERE rowid = %s", [[pk] for pk in pks])
+
+    def reconstruir(self, modelo):
+        tabla = nombre_tabla(modelo)
+        campos = CAMPOS_INDEXADOS[modelo]
+        columnas = ", ".join(campos)
+        origen = ", ".join(f'"{c}"' for c in campos)
+        with connection.cursor() as cursor:
+            cursor.execute(f"DELETE FROM {tabla}")
+            cursor.execute(
+                f"INSERT INTO {tabla} (rowid, {columnas}) "
+                f"SELECT id, {origen} FROM {modelo._meta.db_table}"
+            )
+
+    def pagina(self, modelo, consulta, limite, despues=None, antes=None):
+        # bm25 es más negativo cuanto más relevante: orden ascendente.
+        # El filtro por (relevancia, id) va afuera: bm25() solo se puede
+        # calcular en la consulta que hace el MATCH
+        expresion = _expresion_fts5(consulta)
+        if not expresion:
+            return []
+        tabla = nombre_tabla(modelo)
+        pesos = ", ".join(str(p) for p in PESOS[modelo])
+        condicion, parametros, orden = "", [], "relevancia, rowid"
+        if antes is not None:
+            condicion = "WHERE relevancia < %s OR (relevancia = %s AND rowid < %s)"
+            parametros = [antes[0], antes[0], antes[1]]
+            orden = "relevancia DESC, rowid DESC"
+        elif despues is not None:
+            condicion = "WHERE relevancia > %s OR (relevancia = %s AND rowid > %s)"
+            parametros = [despues[0], despues[0], despues[1]]
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"SELECT relevancia, rowid FROM ("
+                f"SELECT rowid, bm25({tabla}, {pesos}) AS relevancia FROM {tabla} WHERE {tabla} MATCH %s"
+                f") {condicion} ORDER BY {orden} LIMIT %s",
+                [expresion, *parametros, limite],
+            )
+            return [tuple(fila) for fila in cursor.fetchall()]
+
+
+# =====================================================================
+# MOTOR EN MEMORIA (respaldo)
+# =====================================================================
+class MotorMemoria:
+    """
+    Índice invertido: palabra -> conjunto de IDs.
+    Se construye la primera vez que se busca en un modelo. Cada proceso
+    tiene su propia copia: antes de buscar se pone al día con lo que
+    guardaron los demás (ver _indice).
+    """
+
+    nombre = "memoria"
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        # modelo -> {"palabras": {}, "docs": {}, "orden": [], "version": n, "leido": fecha}
+        self._indices = {}
+
+    def _indice(self, modelo):
+        # Una consulta (la versión). Si cambió desde la última lectura,
+        # otro proceso (o este) guardó algo: se aplican esos cambios.
+        version = versiones(modelo)[nombre_version(modelo)]
+        indice = self._indices.get(modelo)
+        if indice is None:
+            self._construir(modelo, version)
+        elif indice["version"] != version:
+            self._ponerse_al_dia(modelo, indice, version)
+        return self._indices[modelo]
+
+    def _ponerse_al_dia(self, modelo, indice, version):
+        # La fecha se toma ANTES de leer: lo que cambie mientras tanto
+        # entra en la próxima lectura
+        ahora = timezone.now()
+        recurso = next(nombre for nombre, (m, _) in RECURSOS.items() if m is modelo)
+        datos = sincronizacion.cambios_desde(indice["leido"], [recurso])
+        if datos is None:  # Muy viejo o demasiados cambios
+            self._construir(modelo, version)
+            return
+        campos = CAMPOS_INDEXADOS[modelo]
+        for pk in datos[recurso]["eliminados"]:
+            self._quitar(indice, pk)
+        for fila in datos[recurso]["cambios"]:
+            self._quitar(indice, fila["id"])
+            self._agregar(indice, fila["id"], [fila[campo] or "" for campo in campos])
+        indice["version"] = version
+        indice["leido"] = ahora
+
+    def _agregar(self, indice, pk, valores):
+        documento = [palabras(v) for v in valores]
+        indice["docs"][pk] = documento
+        for columna in documento:
+            for palabra in columna:
+                if palabra not in indice["palabras"]:
+                    indice["palabras"][palabra] = set()
+                    indice["orden"] = None  # Hay que reordenar la lista de palabras
+                indice["palabras"][palabra].add(pk)
+
+    def _quitar(self, indice, pk):
+        for columna in indice["docs"].pop(pk, []):
+            for palabra in columna:
+                ids = indice["palabras"].get(palabra)
+                if ids is not None:
+                    ids.discard(pk)
+                    if not ids:
+                        del indice["palabras"][palabra]
+                        indice["orden"] = None
+
+    def indexar(self, objeto):
+        self.indexar_lote(type(objeto), [objeto])
+
+    def indexar_lote(self, modelo, objetos):
+        with self._lock:
+            if modelo not in self._indices:
+                return  # Se construirá completo en la primera búsqueda
+            indice = self._indices[modelo]
+            for objeto in objetos:
+                self._quitar(indice, objeto.pk)
+                self._agregar(indice, objeto.pk, valores_indexados(objeto))
+
+    def eliminar(self, modelo, pk):
+        self.eliminar_lote(modelo, [pk])
+
+    def eliminar_lote(self, modelo, pks):
+        with self._lock:
+            if modelo in self._indices:
+                for pk in pks:
+                    self._quitar(self._indices[modelo], pk)
+
+    def reconstruir(self, modelo):
+        with self._lock:
+            self._construir(modelo, versiones(modelo)[nombre_version(modelo)])
+
+    def _construir(self, modelo, version):
+        # La versión y la fecha se leen antes que las filas
+        indice = {"palabras": {}, "docs": {}, "orden": None, "version": version, "leido": timezone.now()}
+        campos = CAMPOS_INDEXADOS[modelo]
+        for pk, *valores in modelo.objects.values_list("id", *campos).iterator():
+            self._agregar(indice, pk, valores)
+        self._indices[modelo] = indice
+
+    def _por_prefijo(self, indice, prefijo):
+        # La lista ordenada de palabras permite encontrar los prefijos con bisect
+        if indice["orden"] is None:
+            indice["orden"] = sorted(indice["palabras"])
+        orden = indice["orden"]
+        ids = set()
+        exactos = indice["palabras"].get(prefijo, set())
+        i = bisect_left(orden, prefijo)
+        while i < len(orden) and orden[i].startswith(prefijo):
+            ids |= indice["palabras"][orden[i]]
+            i += 1
+        return ids, exactos
+
+    def _coincidencias(self, modelo, terminos):
+        # (IDs que tienen todas las palabras, {id: palabras exactas})
+        with self._lock:
+            indice = self._indice(modelo)
+            resultado = None
+            puntaje = {}
+            for termino in terminos:
+                ids, exactos = self._por_prefijo(indice, termino)
+                resultado = ids if resultado is None else resultado & ids
+                for pk in exactos:
+                    puntaje[pk] = puntaje.get(pk, 0) + 1
+            return resultado, puntaje
+
+    def pagina(self, modelo, consulta, limite, despues=None, antes=None):
+        terminos = palabras(consulta)
+        if not terminos:
+            return []
+        resultado, puntaje = self._coincidencias(modelo, terminos)
+        # Primero las que tienen más palabras completas (relevancia más
+        # negativa, como bm25), luego por ID
+        ordenados = sorted((float(-puntaje.get(pk, 0)), pk) for pk in resultado)
+        if antes is not None:
+            return ordenados[:bisect_left(ordenados, antes)][::-1][:limite]
+        if despues is not None:
+            ordenados = ordenados[bisect_right(ordenados, despues):]
+        return ordenados[:limite]
+
+
+# =====================================================================
+# SELECCIÓN DEL MOTOR
+# =====================================================================
+_motor = None
+
+
+def fts5_disponible():
+    # Las tablas FTS5 se crean en la migración 0006 solo si SQLite las soporta
+    if connection.vendor != "sqlite":
+        return False
+    tablas = connection.introspection.table_names()
+    return all(nombre_tabla(m) in tablas for m in CAMPOS_INDEXADOS)
+
+
+def motor():
+    global _motor
+    if _motor is None:
+        _motor = MotorFTS5() if fts5_disponible() else MotorMemoria()
+    return _motor
+
+
+def paginar_busqueda(modelo, consulta, request):
+    """
+    PaginaCursor con los objetos del modelo que coinciden con la
+    consulta, del más relevante al menos relevante (lee ?despues=,
+    ?antes= y ?tamano= igual que paginar()).
+    """
+    return paginar_por_clave(partial(motor().pagina, modelo, consulta), modelo.objects.all(), request)
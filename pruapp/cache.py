@@ -0,0 +1,159 @@
+# =====================================================================
+# CACHE.PY - Cache de vistas y fragmentos con llaves versionadas
+# =====================================================================
+# Idea: en vez de borrar entradas del cache cuando cambia un dato,
+# cada tabla tiene un número de versión (modelo VersionCatalogo).
+# La llave del cache incluye ese número:
+#
+#     vista:menu_list:<URL>:producto=7
+#
+# Cuando se guarda o elimina un Producto, la versión pasa a 8 y la
+# próxima visita busca "producto=8" (que no existe) y vuelve a generar
+# la página. Las entradas viejas nunca se vuelven a leer y el cache
+# (LRU) las descarta solo. Así un cambio en el catálogo nunca muestra
+# datos viejos.
+#
+# Los backends se configuran en settings.CACHES:
+#   - "default":  memoria local (LocMemCache, descarta lo menos usado)
+#   - "archivos": archivos en disco (FileBasedCache, compartido entre
+#                 procesos de la misma máquina)
+# settings.CACHE_VISTAS elige cuál usar para las vistas.
+#
+# La versión se lee ANTES que las filas y de la misma base (la
+# principal; una vista cacheada no puede usar la réplica, ver
+# routers.py): si alguien guarda en medio, la página queda con la
+# versión vieja y la próxima visita la vuelve a generar. Las versiones
+# leídas quedan en request.versiones_catalogo para que los fragmentos
+# ({% version_catalogo %}) usen las mismas.
+# =====================================================================
+
+import hashlib
+from functools import wraps
+
+from asgiref.sync import iscoroutinefunction
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.cache.backends.base import DEFAULT_TIMEOUT
+from django.core.exceptions import ImproperlyConfigured
+from django.db.models import F
+from django.http import HttpResponse
+from django.utils import timezone
+
+from .models import VersionCatalogo
+
+
+def cache_vistas():
+    return caches[getattr(settings, "CACHE_VISTAS", "default")]
+
+
+def nombre_version(modelo):
+    # Producto -> "producto"; también acepta el texto directamente
+    return modelo if isinstance(modelo, str) else modelo._meta.model_name
+
+
+# =====================================================================
+# VERSIONES
+# =====================================================================
+def versiones(*modelos):
+    """Devuelve {"producto": 7, ...} con UNA consulta a la base de datos."""
+    nombres = [nombre_version(m) for m in modelos]
+    actuales = dict(VersionCatalogo.objects.filter(nombre__in=nombres).values_list("nombre", "version"))
+    return {nombre: actuales.get(nombre, 0) for nombre in nombres}
+
+
+async def aversiones(*modelos):
+    """Igual que versiones(), para vistas async."""
+    nombres = [nombre_version(m) for m in modelos]
+    consulta = VersionCatalogo.objects.filter(nombre__in=nombres).values_list("nombre", "version")
+    actuales = {nombre: version async for nombre, version in consulta}
+    return {nombre: actuales.get(nombre, 0) for nombre in nombres}
+
+
+def subir_version(modelo):
+    """Invalida todo lo cacheado que dependa de este modelo."""
+    nombre = nombre_version(modelo)
+    # UPDATE ... SET version = version + 1 (sin leer primero, sin carreras)
+    ahora = timezone.now()
+    if not VersionCatalogo.objects.filter(nombre=nombre).update(version=F("version") + 1, actualizada=ahora):
+        VersionCatalogo.objects.get_or_create(nombre=nombre, defaults={"actualizada": ahora})
+
+
+def llave_versionada(prefijo, texto, valores):
+    # Ej: vista:<md5 de la URL>:insumo=3,producto=7
+    resumen = hashlib.md5(texto.encode()).hexdigest()
+    partes = ",".join(f"{nombre}={version}" for nombre, version in sorted(valores.items()))
+    return f"{prefijo}:{resumen}:{partes}"
+
+
+# =====================================================================
+# CACHE DE VISTAS
+# =====================================================================
+def cachear_vista(*modelos, timeout=DEFAULT_TIMEOUT, requiere_sesion=True, variar_por=None):
+    """
+    Decorador: guarda el HTML de la vista en cache.
+    La llave depende de la URL completa y de la versión de los modelos
+    indicados (ej: @cachear_vista(Producto)).
+    variar_por: función opcional request -> texto que también entra en
+    la llave (ej: la fecha de hoy, para datos que cambian a medianoche).
+
+    Solo se usa para GET con respuesta 200. Si la vista requiere sesión
+    y el usuario no la tiene, se ejecuta la vista normal (que redirige).
+    """
+    def decorador(vista):
+        if getattr(vista, "usa_replica", False):
+            raise ImproperlyConfigured(f"{vista.__name__}: una vista cacheada no puede leer de la réplica")
+        if iscoroutinefunction(vista):
+            return _cachear_vista_async(vista, modelos, timeout, requiere_sesion, variar_por)
+
+        @wraps(vista)
+        def envoltura(request, *args, **kwargs):
+            if request.method not in ("GET", "HEAD"):
+                return vista(request, *args, **kwargs)
+            if requiere_sesion and 'usuario_id' not in request.session:
+                return vista(request, *args, **kwargs)
+
+            cache = cache_vistas()
+            valores = versiones(*modelos)
+            request.versiones_catalogo = dict(valores)
+            if variar_por is not None:
+                valores["variante"] = variar_por(request)
+            llave = llave_versionada(f"vista:{vista.__name__}", request.get_full_path(), valores)
+            guardado = cache.get(llave)
+            if guardado is not None:
+                contenido, tipo = guardado
+                return HttpResponse(contenido, content_type=tipo)
+
+            respuesta = vista(request, *args, **kwargs)
+            if respuesta.status_code == 200 and not respuesta.streaming:
+                cache.set(llave, (respuesta.content, respuesta["Content-Type"]), timeout)
+            return respuesta
+        return envoltura
+    return decorador
+
+
+def _cachear_vista_async(vista, modelos, timeout, requiere_sesion, variar_por):
+    # Misma lógica que cachear_vista, usando las versiones async del cache y la sesión
+    @wraps(vista)
+    async def envoltura(request, *args, **kwargs):
+        if request.method not in ("GET", "HEAD"):
+            return await vista(request, *args, **kwargs)
+        if requiere_sesion and not await request.session.ahas_key('usuario_id'):
+            return await vista(request, *args, **kwargs)
+
+        cache = cache_vistas()
+        valores = await aversiones(*modelos)
+        request.versiones_catalogo = dict(valores)
+        if variar_por is not None:
+            valores["variante"] = variar_por(request)
+        llave = llave_versionada(f"vista:{vista.__name__}", request.get_full_path(), valores)
+        guardado = await cache.aget(llave)
+        if guardado is not None:
+            contenido, tipo = guardado
+            return HttpResponse(contenido, content_type=tipo)
+
+        respuesta = await vista(request, *args, **kwargs)
+        if respuesta.status_code == 200 and not respuesta.streaming:
+            await cache.aset(llave, (respuesta.content, respuesta["Content-Type"]), timeout)
+        return respuesta
+    return envoltura
@@ -0,0 +1,85 @@
+# =====================================================================
+# CANTIDADES.PY - Convertir textos como "15 KG" en número + unidad
+# =====================================================================
+# Los insumos antes guardaban la cantidad como texto libre ("15 KG",
+# "10 litros", "5 Unidades"). Con esta función se separa el número de
+# la unidad para poder guardarlos en columnas propias y así la base de
+# datos puede sumar, ordenar y filtrar (ej: todo lo que tenga < 5 KG).
+# =====================================================================
+
+import re
+from decimal import Decimal, InvalidOperation
+
+# Nombres que aceptamos para cada unidad (en minúsculas y sin punto)
+ALIAS_UNIDADES = {
+    "KG": ("kg", "kgs", "kilo", "kilos", "kilogramo", "kilogramos"),
+    "G": ("g", "gr", "grs", "gramo", "gramos"),
+    "L": ("l", "lt", "lts", "litro", "litros"),
+    "ML": ("ml", "mililitro", "mililitros"),
+    "UN": ("u", "un", "und", "unds", "unidad", "unidades"),
+}
+
+_UNIDAD_POR_ALIAS = {alias: codigo for codigo, alias_lista in ALIAS_UNIDADES.items() for alias in alias_lista}
+
+# Cada unidad en su unidad base (1 KG = 1000 G). Solo se convierten las
+# de la misma magnitud: peso con peso, volumen con volumen.
+BASE_UNIDADES = {"KG": ("G", 1000), "G": ("G", 1), "L": ("ML", 1000), "ML": ("ML", 1), "UN": ("UN", 1)}
+
+# Un número (con coma o punto decimal) seguido opcionalmente de una palabra
+_PATRON = re.compile(r"^\s*(-?\d+(?:[.,]\d+)?)\s*([^\W\d_]+\.?)?\s*(.*)$")
+
+
+def unidad_desde_texto(texto):
+    # "Litros" -> "L", "kg." -> "KG". Devuelve None si no la reconoce
+    if not texto:
+        return None
+    return _UNIDAD_POR_ALIAS.get(texto.strip().rstrip(".").lower())
+
+
+def parsear_cantidad(texto, unidad_por_defecto="KG"):
+    """
+    Separa un texto de cantidad en (número, unidad, resto).
+
+      "15 KG"      -> (Decimal("15"), "KG", "")
+      "20 KG Hoy"  -> (Decimal("20"), "KG", "Hoy")
+      "1,5"        -> (Decimal("1.5"), unidad_por_defecto, "")
+
+    Lanza ValueError si el texto no empieza con un número.
+    """
+    coincidencia = _PATRON.match(str(texto or ""))
+    if not coincidencia:
+        raise ValueError(f"Cantidad no válida: {texto!r}")
+
+    numero, palabra, resto = coincidencia.groups()
+    try:
+        valor = Decimal(numero.replace(",", "."))
+    except InvalidOperation:
+        raise ValueError(f"Cantidad no válida: {texto!r}")
+
+    unidad = unidad_desde_texto(palabra)
+    if unidad is None:
+        # La palabra no era una unidad conocida: forma parte del resto
+        unidad = unidad_por_defecto
+        resto = " ".join(p for p in (palabra, resto) if p)
+    return valor, unidad, resto.strip()
+
+
+def factor_conversion(de, a):
+    """
+    Número por el que se multiplica una cantidad en 'de' para tenerla
+    en 'a' ("G", "KG" -> Decimal("0.001")). None si no son de la misma
+    magnitud (kilos a litros).
+    """
+    base_de, factor_de = BASE_UNIDADES[de]
+    base_a, factor_a = BASE_UNIDADES[a]
+    if base_de != base_a:
+        return None
+    return Decimal(factor_de) / Decimal(factor_a)
+
+
+def formatear_cantidad(valor, unidad):
+    # Decimal("15.000") + "KG" -> "15 KG"
+    if valor is None:
+        return ""
+    texto = format(valor.normalize(), "f") if isinstance(valor, Decimal) else str(valor)
+    return f"{texto} {unidad}"
@@ -0,0 +1,173 @@
+# =====================================================================
+# CONSULTAS.PY - Presupuesto de consultas SQL y detector de repetidas
+# =====================================================================
+# El problema "N+1": una plantilla que dentro de un {% for %} accede a
+# algo que no se trajo en la consulta principal hace UNA consulta por
+# fila. Con 25 filas no se nota; con 100 páginas por segundo sí.
+#
+# Dos herramientas:
+#   1. Para las pruebas (tests.py):
+#        - PresupuestoConsultasMixin.assertPresupuesto(maximo, url):
+#          pide la URL y falla si hizo más de 'maximo' consultas
+#        - @presupuesto_consultas(maximo): lo mismo para cualquier función
+#      Al fallar se muestran las consultas repetidas, que casi siempre
+#      son la causa.
+#   2. Para desarrollo: ConsultasRepetidasMiddleware escribe en el log
+#      las consultas que se repiten dentro de una misma petición, con
+#      la línea de código que las hizo. Solo funciona con DEBUG=True.
+# =====================================================================
+
+import logging
+import os
+import re
+import traceback
+from collections import Counter
+from contextlib import ExitStack
+from functools import wraps
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connection, connections
+from django.test.utils import CaptureQueriesContext
+
+logger = logging.getLogger("pruapp.consultas")
+
+# A partir de cuántas veces la misma consulta se considera repetida
+REPETICIONES_POR_DEFECTO = 3
+
+# Control de transacciones: se repiten siempre y no son un problema
+TRANSACCIONES = ("BEGIN", "SAVEPOINT", "RELEASE", "ROLLBACK", "COMMIT")
+
+
+def normalizar(sql):
+    # WHERE id = 7 y WHERE id = 8 son "la misma consulta" (típico del N+1)
+    sql = re.sub(r"'(?:[^']|'')*'", "?", sql)
+    return re.sub(r"\b\d+(?:\.\d+)?\b", "?", sql)
+
+
+def repetidas(sqls, minimo=REPETICIONES_POR_DEFECTO):
+    """[(sql, veces), ...] de las consultas que aparecen 'minimo' veces o más."""
+    conteo = Counter(normalizar(sql) for sql in sqls if not sql.startswith(TRANSACCIONES))
+    return [(sql, veces) for sql, veces in conteo.most_common() if veces >= minimo]
+
+
+def _detalle(capturadas):
+    sqls = [consulta["sql"] for consulta in capturadas]
+    lineas = [f"{len(sqls)} consultas:"]
+    lineas += [f"  {i}. {sql}" for i, sql in enumerate(sqls, 1)]
+    dobles = repetidas(sqls)
+    if dobles:
+        lineas.append("Repetidas:")
+        lineas += [f"  x{veces} {sql}" for sql, veces in dobles]
+    return "\n".join(lineas)
+
+
+# =====================================================================
+# PRUEBAS
+# =====================================================================
+class ExcedePresupuesto(AssertionError):
+    pass
+
+
+def presupuesto_consultas(maximo, using="default"):
+    """
+    Decorador: la función falla si hace más de 'maximo' consultas.
+        @presupuesto_consultas(3)
+        def test_algo(self): ...
+    """
+    def decorador(funcion):
+        @wraps(funcion)
+        def envoltura(*args, **kwargs):
+            with CaptureQueriesContext(connections[using]) as capturadas:
+                resultado = funcion(*args, **kwargs)
+            if len(capturadas) > maximo:
+                raise ExcedePresupuesto(
+                    f"{funcion.__name__}: {len(capturadas)} consultas (máximo {maximo})\n"
+                    + _detalle(capturadas.captured_queries)
+                )
+            return resultado
+        return envoltura
+    return decorador
+
+
+class PresupuestoConsultasMixin:
+    """Para TestCase: agrega assertPresupuesto()."""
+
+    def assertPresupuesto(self, maximo, url, metodo="get", cliente=None, **kwargs):
+        """
+        Pide la URL y verifica que no pase de 'maximo' consultas (sumando
+        todas las bases, por ejemplo "default" y "replica"). Devuelve la respuesta.
+        """
+        cliente = cliente or self.client
+        # Los espejos (TEST MIRROR) son la misma base: no se abren aparte
+        alias = [a for a in connections if not connections[a].settings_dict.get("TEST", {}).get("MIRROR")]
+        with ExitStack() as pila:
+            capturas = [pila.enter_context(CaptureQueriesContext(connections[a])) for a in alias]
+            respuesta = getattr(cliente, metodo)(url, **kwargs)
+        consultas = [consulta for captura in capturas for consulta in captura.captured_queries]
+        if len(consultas) > maximo:
+            self.fail(
+                f"{metodo.upper()} {url}: {len(consultas)} consultas (máximo {maximo})\n" + _detalle(consultas)
+            )
+        return respuesta
+
+
+# =====================================================================
+# DESARROLLO
+# =====================================================================
+# Módulos que envuelven las consultas: no interesan en el stack
+_INSTRUMENTOS = {__file__, os.path.join(os.path.dirname(__file__), "metricas.py")}
+
+
+def _origen():
+    # Las líneas del stack que son de este proyecto (no de Django)
+    base = str(settings.BASE_DIR)
+    propias = [
+        marco for marco in traceback.extract_stack()
+        if marco.filename.startswith(base) and marco.filename not in _INSTRUMENTOS
+        and os.sep + "site-packages" + os.sep not in marco.filename
+    ]
+    return "".join(traceback.format_list(propias[-5:])) or "  (sin código del proyecto en el stack)\n"
+
+
+class _Registro:
+    # Función para connection.execute_wrapper: anota cada consulta y su origen
+    def __init__(self):
+        self.veces = Counter()
+        self.origenes = {}
+
+    def __call__(self, execute, sql, params, many, context):
+        if sql.startswith(TRANSACCIONES):
+            return execute(sql, params, many, context)
+        self.veces[sql] += 1
+        if self.veces[sql] == 2:
+            # Se guarda el stack la primera vez que se repite (donde está el bucle)
+            self.origenes[sql] = _origen()
+        return execute(sql, params, many, context)
+
+
+class ConsultasRepetidasMiddleware:
+    """
+    Solo con DEBUG=True: escribe un aviso en el log "pruapp.consultas"
+    por cada consulta que se repite en la misma petición, con el código
+    que la hizo. Ajustable con settings.CONSULTAS_REPETIDAS_MINIMO.
+    """
+
+    def __init__(self, get_response):
+        if not settings.DEBUG:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.minimo = getattr(settings, "CONSULTAS_REPETIDAS_MINIMO", REPETICIONES_POR_DEFECTO)
+
+    def __call__(self, request):
+        registro = _Registro()
+        with connection.execute_wrapper(registro):
+            respuesta = self.get_response(request)
+        for sql, veces in registro.veces.most_common():
+            if veces < self.minimo:
+                break
+            logger.warning(
+                "%s %s: consulta repetida %d veces\n  %s\n%s",
+                request.method, request.path, veces, sql, registro.origenes.get(sql, ""),
+            )
+        return respuesta
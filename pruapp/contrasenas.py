@@ -0,0 +1,132 @@
+# =====================================================================
+# CONTRASENAS.PY - Cifrado y verificación de contraseñas
+# =====================================================================
+# Antes las contraseñas se guardaban en texto plano y el login hacía
+# usuario.password == passw. Ahora se usan los "hashers" de Django
+# (PBKDF2 por defecto), que son lentos A PROPÓSITO (~100ms por
+# verificación) para que adivinar contraseñas sea caro.
+#
+# Para que esa lentitud no bloquee al servidor:
+#   - Las vistas async (el login con VISTAS_ASYNC=1, ver views_async.py)
+#     usan averificar()/acifrar(): el cálculo se hace en un grupo (pool)
+#     LIMITADO de hilos o procesos (settings.HASHER_POOL y
+#     settings.HASHER_TRABAJADORES) y el event loop sigue atendiendo
+#     mientras tanto. Si llegan muchos logins a la vez, esperan en fila
+#     en vez de acaparar la CPU.
+#   - pbkdf2 de hashlib suelta el GIL, así que los hilos sí corren en
+#     paralelo.
+#   - Las vistas sync (verificar()/cifrar()) calculan en su propio hilo:
+#     el trabajador queda ocupado igual mientras espera, así que pasar
+#     por el pool solo agregaría el salto entre hilos.
+#
+# Actualización transparente: si la contraseña guardada usa un hasher
+# viejo, menos iteraciones que las actuales, o está en texto plano
+# (usuarios antiguos), se vuelve a cifrar al hacer login.
+# =====================================================================
+
+import asyncio
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+
+from django.conf import settings
+from django.contrib.auth.hashers import check_password, make_password, identify_hasher, get_hasher
+from django.utils.crypto import constant_time_compare
+
+_pool = None
+_lock = threading.Lock()
+
+
+def _iniciar_proceso():
+    # Cada proceso del pool necesita Django configurado para leer PASSWORD_HASHERS
+    import django
+    os.environ.setdefault("DJANGO_SETTINGS_MODULE", "prueba2.settings")
+    django.setup()
+
+
+def pool():
+    global _pool
+    if _pool is None:
+        with _lock:
+            if _pool is None:
+                trabajadores = getattr(settings, "HASHER_TRABAJADORES", None) or os.cpu_count() or 2
+                if getattr(settings, "HASHER_POOL", "hilos") == "procesos":
+                    _pool = ProcessPoolExecutor(max_workers=trabajadores, initializer=_iniciar_proceso)
+                else:
+                    _pool = ThreadPoolExecutor(max_workers=trabajadores, thread_name_prefix="hasher")
+    return _pool
+
+
+def reiniciar_pool():
+    # Cierra el pool actual; el siguiente uso crea uno nuevo con la configuración vigente
+    global _pool
+    with _lock:
+        if _pool is not None:
+            _pool.shutdown(wait=True)
+        _pool = None
+
+
+def es_hash(valor):
+    # True si el valor tiene formato de hash de Django ("pbkdf2_sha256$...")
+    try:
+        identify_hasher(valor)
+    except ValueError:
+        return False
+    return True
+
+
+def necesita_rehash(valor):
+    """True si la contraseña guardada debe volver a cifrarse."""
+    if not es_hash(valor):
+        return True  # Texto plano (usuarios antiguos)
+    actual = get_hasher()
+    return identify_hasher(valor).algorithm != actual.algorithm or actual.must_update(valor)
+
+
+def _comparar(password, valor):
+    # Se ejecuta en el pool (async) o en el hilo de la vista (sync)
+    if not es_hash(valor):
+        return constant_time_compare(password or "", valor or "")
+    return check_password(password, valor)
+
+
+def cifrar(password):
+    """Devuelve el hash de la contraseña."""
+    return make_password(password)
+
+
+def verificar(password, valor):
+    """True si la contraseña coincide con el valor guardado."""
+    return _comparar(password, valor)
+
+
+async def averificar(password, valor):
+    """Igual que verificar(), pero para vistas async: se calcula en el pool."""
+    return await asyncio.wrap_future(pool().submit(_comparar, password, valor))
+
+
+async def acifrar(password):
+    """Igual que cifrar(), calculado en el pool."""
+    return await asyncio.wrap_future(pool().submit(make_password, password))
+
+
+def verificar_usuario(usuario, password):
+    """
+    Verifica la contraseña de un Practica y, si es correcta y el hash
+    está desactualizado, lo vuelve a cifrar y lo guarda.
+    """
+    if not verificar(password, usuario.password):
+        return False
+    if necesita_rehash(usuario.password):
+        usuario.password = cifrar(password)
+        usuario.save(update_fields=["password"])
+    return True
+
+
+async def averificar_usuario(usuario, password):
+    if not await averificar(password, usuario.password):
+        return False
+    if necesita_rehash(usuario.password):
+        usuario.password = await acifrar(password)
+        await usuario.asave(update_fields=["password"])
+    return True
@@ -0,0 +1,101 @@
+# =====================================================================
+# ESTATICOS.PY - Archivos estáticos minificados y en un solo CSS
+# =====================================================================
+# settings.STORAGES["staticfiles"] apunta a EstaticosMinificados.
+# Al correr "python manage.py collectstatic":
+#   1. Los .css copiados a STATIC_ROOT se minifican (sin comentarios ni
+#      espacios de sobra).
+#   2. Se arma cada paquete de PAQUETES juntando sus archivos en orden
+#      (styles.css + panel.css -> app.css): una sola petición.
+#   3. WhiteNoise (CompressedManifestStaticFilesStorage) les pone el hash
+#      del contenido en el nombre (app.3f9a0c1b2d4e.css) y crea las
+#      versiones .gz/.br. Como el nombre cambia con el contenido, se
+#      sirven con cache "para siempre".
+#
+# En las plantillas: {% load catalogo %}{% paquete_css 'pruapp/css/app.css' %}
+# Sin collectstatic (desarrollo, pruebas) el paquete no existe y se
+# enlazan los archivos originales por separado. Eso solo se permite con
+# ESTATICOS_SIN_MANIFEST (= DEBUG, ver settings.py): en producción un
+# collectstatic que falta o quedó viejo es un error, no enlaces rotos.
+# =====================================================================
+
+import re
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from whitenoise.storage import CompressedManifestStaticFilesStorage
+
+# Paquete -> archivos que lo forman (en este orden)
+PAQUETES = {
+    "pruapp/css/app.css": ("pruapp/css/styles.css", "pruapp/css/panel.css"),
+}
+
+# Un texto entre comillas (se deja tal cual) o un comentario (se quita)
+_TEXTOS_Y_COMENTARIOS = re.compile(r"""("(?:\\.|[^"\\])*"|'(?:\\.|[^'\\])*')|/\*.*?\*/""", re.DOTALL)
+_ESPACIOS = re.compile(r"\s+")
+_ALREDEDOR = re.compile(r"\s*([{};,>])\s*")
+
+
+def _compactar(texto):
+    texto = _ESPACIOS.sub(" ", texto)
+    texto = _ALREDEDOR.sub(r"\1", texto)
+    # "color: red" -> "color:red" (el espacio ANTES de ":" sí importa en
+    # selectores como "a :hover", por eso solo se quita el de después)
+    texto = texto.replace(": ", ":")
+    return texto.replace(";}", "}")
+
+
+def minificar_css(texto):
+    """
+    Quita comentarios y espacios que no cambian el resultado. Lo que va
+    entre comillas (content: "a: b", url("...")) no se toca.
+    """
+    partes = []
+    fuera = []  # CSS desde el último texto entre comillas
+    inicio = 0
+    for coincidencia in _TEXTOS_Y_COMENTARIOS.finditer(texto):
+        fuera.append(texto[inicio:coincidencia.start()])
+        inicio = coincidencia.end()
+        if coincidencia.group(1):
+            partes.append(_compactar("".join(fuera)))
+            partes.append(coincidencia.group(1))
+            fuera = []
+    fuera.append(texto[inicio:])
+    partes.append(_compactar("".join(fuera)))
+    return "".join(partes).strip()
+
+
+class EstaticosMinificados(CompressedManifestStaticFilesStorage):
+    """CompressedManifestStaticFilesStorage + CSS minificado + PAQUETES."""
+
+    def post_process(self, paths, dry_run=False, **options):
+        if not dry_run:
+            paths = dict(paths)
+            for nombre in [n for n in paths if n.endswith(".css")]:
+                self._reemplazar(nombre, minificar_css(self._leer(nombre)))
+                # El hash se calcula leyendo "paths": que lea la copia minificada
+                paths[nombre] = (self, nombre)
+            for paquete, partes in PAQUETES.items():
+                if all(parte in paths for parte in partes):
+                    self._reemplazar(paquete, "\n".join(self._leer(parte) for parte in partes))
+                    paths[paquete] = (self, paquete)
+        yield from super().post_process(paths, dry_run, **options)
+
+    def stored_name(self, name):
+        # Sin collectstatic no hay manifest: en desarrollo y pruebas se usa
+        # el nombre original; en producción el ValueError sigue de largo
+        try:
+            return super().stored_name(name)
+        except ValueError:
+            if not settings.ESTATICOS_SIN_MANIFEST:
+                raise
+            return name
+
+    def _leer(self, nombre):
+        with self.open(nombre) as archivo:
+            return archivo.read().decode("utf-8")
+
+    def _reemplazar(self, nombre, texto):
+        if self.exists(nombre):
+            self.delete(nombre)
+        self.save(nombre, ContentFile(texto.encode("utf-8")))
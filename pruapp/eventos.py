@@ -0,0 +1,262 @@
+# =====================================================================
+# EVENTOS.PY - Avisos en vivo (Server-Sent Events) de stock e inventario
+# =====================================================================
+# En vez de que las terminales pidan menu_list o inventario_list cada
+# pocos segundos, abren una conexión a /eventos/ (views_async.eventos)
+# y el servidor les escribe una línea cada vez que:
+#   - un producto pasa a agotado o vuelve a estar en stock
+#   - cambia la cantidad (o la unidad) de un insumo
+#
+#     event: producto
+#     data: {"modelo": "producto", "id": 7, "stock": false}
+#
+# Cómo se reparten:
+#   - signals.py llama a publicar() al confirmar la transacción.
+#   - Difusor: cada conexión abierta tiene una asyncio.Queue en el event
+#     loop del worker; publicar() deja el evento en todas. Una conexión
+#     sin eventos es solo una corutina dormida y una cola vacía, así que
+#     un worker ASGI aguanta miles (ver "manage.py bench_eventos").
+#   - Con varios workers (procesos) cada uno tiene su Difusor. Si está
+#     settings.EVENTOS_REDIS_URL, publicar() envía el evento a un canal
+#     pub/sub con el protocolo de Redis y cada worker lo recibe de ahí.
+#     Sirve un Redis (o Valkey) de verdad o "manage.py canal_eventos",
+#     un servidor local mínimo compatible, sin instalar nada.
+#
+# Si una conexión se atrasa (cola llena) se cierra; el cliente se vuelve
+# a conectar y se pone al día con /sync/ (ver sincronizacion.py).
+# Necesita ASGI (uvicorn). Con WSGI el handler junta toda la respuesta
+# antes de enviarla y este flujo no termina: el worker no se liberaría
+# nunca, por eso views_async.eventos responde 501 si no es ASGI.
+# =====================================================================
+
+import asyncio
+import itertools
+import json
+import logging
+import socket
+import threading
+from urllib.parse import urlparse
+
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+CANAL = "pruapp:eventos"
+TAMANO_COLA = 100     # Eventos pendientes por conexión antes de cerrarla
+LATIDO = 15           # Segundos sin eventos antes de mandar un comentario
+REINTENTO_MS = 3000   # Cuánto espera el navegador para reconectarse
+FIN = None            # En la cola: cerrar la conexión
+
+
+# =====================================================================
+# DIFUSOR (dentro del proceso)
+# =====================================================================
+class Difusor:
+    """Reparte cada evento a las colas de las conexiones de este proceso."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._colas = {}  # event loop -> set de colas
+        self._ids = itertools.count(1)
+
+    def suscribir(self):
+        """Cola nueva en el event loop actual (llamar desde una corutina)."""
+        loop = asyncio.get_running_loop()
+        cola = asyncio.Queue(TAMANO_COLA)
+        with self._lock:
+            self._colas.setdefault(loop, set()).add(cola)
+        return cola
+
+    def desuscribir(self, cola):
+        with self._lock:
+            for loop, colas in list(self._colas.items()):
+                colas.discard(cola)
+                if not colas:
+                    del self._colas[loop]
+
+    def suscriptores(self):
+        with self._lock:
+            return sum(len(colas) for colas in self._colas.values())
+
+    def publicar(self, tipo, datos):
+        """Entrega el evento en este proceso. Se puede llamar desde cualquier hilo."""
+        evento = (next(self._ids), tipo, datos)
+        with self._lock:
+            loops = list(self._colas)
+        for loop in loops:
+            # Una llamada por event loop, no una por conexión
+            try:
+                loop.call_soon_threadsafe(self._entregar, loop, evento)
+            except RuntimeError:  # El loop ya se cerró
+                with self._lock:
+                    self._colas.pop(loop, None)
+
+    def _entregar(self, loop, evento):
+        # Corre dentro del event loop: las colas no se tocan desde otro hilo
+        with self._lock:
+            colas = list(self._colas.get(loop, ()))
+        for cola in colas:
+            try:
+                cola.put_nowait(evento)
+            except asyncio.QueueFull:
+                # Conexión atrasada: se vacía su cola y se le pide cerrar
+                while not cola.empty():
+                    cola.get_nowait()
+                cola.put_nowait(FIN)
+                self.desuscribir(cola)
+
+
+difusor = Difusor()
+
+
+def formatear(evento):
+    """Texto de un evento en el formato de Server-Sent Events."""
+    numero, tipo, datos = evento
+    return f"id: {numero}\nevent: {tipo}\ndata: {json.dumps(datos)}\n\n"
+
+
+async def flujo():
+    """Generador async para StreamingHttpResponse (text/event-stream)."""
+    cola = difusor.suscribir()
+    asegurar_escucha_redis()
+    try:
+        yield f"retry: {REINTENTO_MS}\n\n"
+        while True:
+            try:
+                evento = await asyncio.wait_for(cola.get(), LATIDO)
+            except asyncio.TimeoutError:
+                # Comentario: mantiene viva la conexión en proxies y balanceadores
+                yield ": latido\n\n"
+                continue
+            if evento is FIN:
+                return
+            yield formatear(evento)
+    finally:
+        # También al desconectarse el cliente (Django cancela el generador)
+        difusor.desuscribir(cola)
+
+
+def publicar(tipo, datos):
+    """Envía el evento a todas las conexiones (de todos los workers si hay Redis)."""
+    if settings.EVENTOS_REDIS_URL:
+        try:
+            _publicador().publicar(CANAL, json.dumps({"tipo": tipo, "datos": datos}))
+            return
+        except OSError as error:
+            # Sin el canal al menos se avisa a las conexiones de este worker
+            logger.warning("No se pudo publicar en %s: %s", settings.EVENTOS_REDIS_URL, error)
+    difusor.publicar(tipo, datos)
+
+
+# =====================================================================
+# PROTOCOLO DE REDIS (RESP), solo lo necesario para pub/sub
+# =====================================================================
+# Lo usan publicar()/la escucha de cada worker y el servidor local de
+# "manage.py canal_eventos". No hace falta instalar el paquete redis.
+def codificar(*partes):
+    """Comando o respuesta como arreglo RESP: *2\\r\\n$4\\r\\nPING\\r\\n..."""
+    salida = [f"*{len(partes)}\r\n".encode()]
+    for parte in partes:
+        if isinstance(parte, int):
+            salida.append(f":{parte}\r\n".encode())
+        else:
+            datos = parte if isinstance(parte, bytes) else str(parte).encode()
+            salida.append(f"${len(datos)}\r\n".encode() + datos + b"\r\n")
+    return b"".join(salida)
+
+
+async def leer_valor(lector):
+    """Lee un valor RESP de un asyncio.StreamReader (ConnectionError si se cerró)."""
+    linea = await lector.readline()
+    if not linea.endswith(b"\r\n"):
+        raise ConnectionError("Conexión cerrada")
+    tipo, resto = linea[:1], linea[1:-2]
+    if tipo == b"*":
+        return [await leer_valor(lector) for _ in range(int(resto))]
+    if tipo == b"$":
+        largo = int(resto)
+        return None if largo < 0 else (await lector.readexactly(largo + 2))[:-2]
+    if tipo == b":":
+        return int(resto)
+    if tipo == b"-":
+        raise ConnectionError(resto.decode())
+    return resto  # "+OK", "+PONG"
+
+
+def _direccion(url):
+    partes = urlparse(url)
+    return partes.hostname or "127.0.0.1", partes.port or 6379
+
+
+class _Publicador:
+    # Una conexión por proceso, compartida por los hilos (con lock)
+    def __init__(self, url):
+        self._direccion = _direccion(url)
+        self._lock = threading.Lock()
+        self._socket = None
+
+    def publicar(self, canal, mensaje):
+        with self._lock:
+            for intento in range(2):  # Si la conexión se cortó, una vez más con una nueva
+                try:
+                    if self._socket is None:
+                        self._socket = socket.create_connection(self._direccion, timeout=2)
+                    self._socket.sendall(codificar("PUBLISH", canal, mensaje))
+                    respuesta = self._socket.recv(64)
+                    if not respuesta.startswith(b":"):
+                        raise OSError(f"Respuesta inesperada: {respuesta!r}")
+                    return
+                except OSError:
+                    if self._socket is not None:
+                        self._socket.close()
+                        self._socket = None
+                    if intento:
+                        raise
+
+
+_publicadores = {}
+
+
+def _publicador():
+    url = settings.EVENTOS_REDIS_URL
+    if url not in _publicadores:
+        _publicadores[url] = _Publicador(url)
+    return _publicadores[url]
+
+
+# Una escucha por event loop (normalmente uno por worker)
+_escuchas = {}
+
+
+def asegurar_escucha_redis():
+    """Arranca (una vez por event loop) la tarea que recibe los eventos del canal."""
+    if not settings.EVENTOS_REDIS_URL:
+        return
+    loop = asyncio.get_running_loop()
+    tarea = _escuchas.get(loop)
+    if tarea is None or tarea.done():
+        _escuchas[loop] = loop.create_task(_escuchar(settings.EVENTOS_REDIS_URL))
+
+
+async def _escuchar(url):
+    host, puerto = _direccion(url)
+    espera = 0.5
+    while True:
+        escritor = None
+        try:
+            lector, escritor = await asyncio.open_connection(host, puerto)
+            escritor.write(codificar("SUBSCRIBE", CANAL))
+            await escritor.drain()
+            espera = 0.5
+            while True:
+                mensaje = await leer_valor(lector)
+                if isinstance(mensaje, list) and mensaje[0] == b"message":
+                    evento = json.loads(mensaje[2])
+                    difusor.publicar(evento["tipo"], evento["datos"])
+        except (OSError, ConnectionError, asyncio.IncompleteReadError) as error:
+            logger.warning("Canal de eventos %s no disponible (%s); reintentando", url, error)
+            await asyncio.sleep(espera)
+            espera = min(espera * 2, 10)
+        finally:
+            if escritor is not None:
+                escritor.close()
@@ -0,0 +1,284 @@
+# =====================================================================
+# INTERCAMBIO.PY - Importar y exportar datos en CSV o JSONL
+# =====================================================================
+# Antes, para cargar el catálogo había que hacer un POST por cada fila
+# (un objects.create() y una transacción por fila).
+#
+# IMPORTAR:
+#   - Se lee el archivo fila por fila (nunca completo en memoria)
+#   - Las filas se agrupan en lotes de 'tamano_lote'
+#   - Cada lote se valida en Python (sin consultas a la base de datos)
+#     y se guarda con bulk_create / bulk_update en UNA transacción
+#   - Las filas con errores se reportan y no detienen la importación
+#   - Una fila con un id que ya existe actualiza SOLO las columnas que
+#     trae el archivo (un CSV "id,stock" no toca nombre, precio, ...).
+#     Una fila nueva necesita todas las columnas obligatorias.
+#
+# EXPORTAR:
+#   - Un generador que va leyendo la tabla por partes (iterator) y
+#     devolviendo líneas de texto, listo para StreamingHttpResponse
+#   - Con ASGI, aexportar(): lo mismo con aiterator (un generador
+#     normal Django lo leería completo antes de enviar nada)
+# =====================================================================
+
+import csv
+import io
+import json
+from itertools import islice
+
+from django.core.exceptions import ValidationError
+from django.db import models, transaction
+from django.utils import timezone
+
+from .models import Producto, Insumo, Empleado
+from .signals import lote_guardado, lote_por_guardar
+
+# Nombre usado en las URLs y comandos -> modelo
+MODELOS = {
+    "productos": Producto,
+    "insumos": Insumo,
+    "empleados": Empleado,
+}
+
+# Columnas que se importan/exportan de cada modelo (en este orden)
+CAMPOS = {
+    Producto: ("id", "nombre", "imagen_url", "precio", "stock"),
+    Insumo: ("id", "nombre", "cantidad", "unidad", "umbral", "ultima_info", "fecha"),
+    Empleado: ("id", "nombre", "foto_url", "rol", "edad", "telefono", "estado"),
+}
+
+# Textos aceptados en las columnas de sí/no (stock, estado)
+BOOLEANOS = {
+    "true": True, "t": True, "1": True, "si": True, "sí": True, "yes": True, "on": True,
+    "false": False, "f": False, "0": False, "no": False, "off": False,
+}
+
+FORMATOS = ("csv", "jsonl")
+TAMANO_LOTE = 1000
+MAXIMO_RECHAZOS = 1000  # Cuántos errores se guardan en el reporte
+
+
+class ResultadoImportacion:
+    def __init__(self):
+        self.creados = 0
+        self.actualizados = 0
+        self.rechazados = 0
+        self.errores = []  # Lista de (número de línea, mensaje)
+
+    def rechazar(self, linea, mensaje):
+        self.rechazados += 1
+        if len(self.errores) < MAXIMO_RECHAZOS:
+            self.errores.append((linea, mensaje))
+
+    def como_dict(self):
+        return {
+            "creados": self.creados,
+            "actualizados": self.actualizados,
+            "rechazados": self.rechazados,
+            "errores": [{"linea": linea, "error": mensaje} for linea, mensaje in self.errores],
+        }
+
+
+# =====================================================================
+# LECTURA DE ARCHIVOS
+# =====================================================================
+def leer_filas(archivo, formato):
+    """
+    Devuelve (número de línea, dict) por cada fila del archivo.
+    'archivo' es un archivo de texto abierto (o cualquier iterable de líneas).
+    """
+    if formato == "csv":
+        lector = csv.DictReader(archivo)
+        for fila in lector:
+            yield lector.line_num, fila
+    elif formato == "jsonl":
+        for numero, linea in enumerate(archivo, start=1):
+            if not linea.strip():
+                continue
+            try:
+                fila = json.loads(linea)
+            except json.JSONDecodeError as e:
+                yield numero, ValueError(f"JSON no válido: {e}")
+                continue
+            yield numero, fila if isinstance(fila, dict) else ValueError("Se esperaba un objeto JSON")
+    else:
+        raise ValueError(f"Formato no soportado: {formato}")
+
+
+def abrir_texto(archivo_binario):
+    # Los archivos subidos llegan en binario; se leen como texto UTF-8
+    return io.TextIOWrapper(archivo_binario, encoding="utf-8-sig", newline="")
+
+
+# =====================================================================
+# VALIDACIÓN
+# =====================================================================
+def _validar(modelo, nombres, fila):
+    valores = {}
+    errores = []
+    for nombre in nombres:
+        campo = modelo._meta.get_field(nombre)
+        crudo = fila.get(nombre)
+        if isinstance(crudo, str):
+            crudo = crudo.strip()
+        if nombre == "id":
+            if crudo in (None, ""):
+                continue
+        if crudo in (None, ""):
+            if campo.has_default():
+                continue
+            crudo = None if campo.null else ""
+        elif isinstance(campo, models.BooleanField) and isinstance(crudo, str):
+            crudo = BOOLEANOS.get(crudo.lower(), crudo)
+        try:
+            valores[nombre] = campo.clean(crudo, None)
+        except ValidationError as e:
+            errores.append(f"{nombre}: {'; '.join(e.messages)}")
+    if errores:
+        raise ValidationError(errores)
+    return valores
+
+
+def validar_fila(modelo, fila):
+    """
+    Convierte y valida las columnas que trae la fila usando los campos
+    del modelo. field.clean() revisa tipo, longitud, opciones y
+    validadores sin tocar la base de datos (a diferencia de full_clean,
+    que revisa unicidad). Devuelve el dict de valores; una celda vacía
+    de un campo con valor por defecto no entra.
+    """
+    return _validar(modelo, [nombre for nombre in CAMPOS[modelo] if nombre in fila], fila)
+
+
+def completar_fila(modelo, valores):
+    """
+    Para una fila NUEVA: valida también las columnas que no trae (como
+    si vinieran vacías) y devuelve los valores completos para crearla.
+    """
+    faltan = [nombre for nombre in CAMPOS[modelo] if nombre != "id" and nombre not in valores]
+    return {**valores, **_validar(modelo, faltan, {})}
+
+
+# =====================================================================
+# IMPORTAR
+# =====================================================================
+def _guardar_lote(modelo, lote, resultado):
+    """Guarda un lote de (línea, valores) en una sola transacción."""
+    ids = [valores["id"] for _, valores in lote if "id" in valores]
+
+    with transaction.atomic():
+        # Una sola consulta trae las filas que ya existen (completas: los
+        # receptores de las señales ven el objeto entero, no solo lo que
+        # cambió)
+        existentes = modelo.objects.in_bulk(ids) if ids else {}
+
+        nuevos = []
+        # Columnas actualizadas -> objetos: bulk_update escribe las mismas
+        # columnas en todas las filas, así que se agrupan
+        actualizar = {}
+        for linea, valores in lote:
+            objeto = existentes.get(valores.get("id"))
+            if objeto is None:
+                try:
+                    nuevos.append(modelo(**completar_fila(modelo, valores)))
+                except ValidationError as e:
+                    resultado.rechazar(linea, "; ".join(e.messages))
+                continue
+            campos = tuple(nombre for nombre in valores if nombre != "id")
+            for nombre in campos:
+                setattr(objeto, nombre, valores[nombre])
+            actualizar.setdefault(campos, []).append(objeto)
+
+        if nuevos:
+            modelo.objects.bulk_create(nuevos)
+            # bulk_create/bulk_update no envían post_save: avisamos con una señal propia
+            lote_guardado.send(sender=modelo, objetos=nuevos)
+        # bulk_update no llena "actualizado" (auto_now): ver sincronizacion.py
+        ahora = timezone.now()
+        for campos, objetos in actualizar.items():
+            if not campos:
+                continue  # Solo el id: nada que cambiar
+            # Aviso previo: algunos receptores necesitan los valores anteriores
+            lote_por_guardar.send(sender=modelo, objetos=objetos, campos=list(campos))
+            for objeto in objetos:
+                objeto.actualizado = ahora
+            modelo.objects.bulk_update(objetos, [*campos, "actualizado"])
+            lote_guardado.send(sender=modelo, objetos=objetos, campos=list(campos))
+
+    resultado.creados += len(nuevos)
+    resultado.actualizados += sum(len(objetos) for objetos in actualizar.values())
+
+
+def importar(modelo, archivo, formato, tamano_lote=TAMANO_LOTE):
+    """Importa un archivo CSV/JSONL completo y devuelve un ResultadoImportacion."""
+    resultado = ResultadoImportacion()
+    filas = leer_filas(archivo, formato)
+    while True:
+        bloque = list(islice(filas, tamano_lote))
+        if not bloque:
+            break
+        lote = []
+        vistos = set()
+        for linea, fila in bloque:
+            if isinstance(fila, Exception):
+                resultado.rechazar(linea, str(fila))
+                continue
+            try:
+                valores = validar_fila(modelo, fila)
+            except ValidationError as e:
+                resultado.rechazar(linea, "; ".join(e.messages))
+                continue
+            # Un mismo ID dos veces en el lote rompería bulk_create
+            if "id" in valores:
+                if valores["id"] in vistos:
+                    resultado.rechazar(linea, f"id {valores['id']} repetido en el archivo")
+                    continue
+                vistos.add(valores["id"])
+            lote.append((linea, valores))
+        if lote:
+            _guardar_lote(modelo, lote, resultado)
+    return resultado
+
+
+# =====================================================================
+# EXPORTAR
+# =====================================================================
+class _Linea:
+    # Objeto "archivo" mínimo para que csv.writer escriba en una variable
+    def write(self, texto):
+        return texto
+
+
+def _formato(campos, formato):
+    # (líneas del encabezado, función fila -> línea) de cada formato
+    if formato == "csv":
+        escritor = csv.writer(_Linea())
+        return [escritor.writerow(campos)], escritor.writerow
+    if formato == "jsonl":
+        return [], lambda fila: json.dumps(dict(zip(campos, fila)), default=str, ensure_ascii=False) + "\n"
+    raise ValueError(f"Formato no soportado: {formato}")
+
+
+def exportar(modelo, formato, tamano_lote=TAMANO_LOTE):
+    """Generador de líneas de texto con todas las filas del modelo."""
+    campos = CAMPOS[modelo]
+    encabezado, linea = _formato(campos, formato)
+    yield from encabezado
+    for fila in modelo.objects.order_by("id").values_list(*campos).iterator(chunk_size=tamano_lote):
+        yield linea(fila)
+
+
+async def aexportar(modelo, formato, tamano_lote=TAMANO_LOTE):
+    """
+    Igual que exportar(), pero async (para ASGI): con un generador
+    normal Django lo lee COMPLETO con sync_to_async(list) antes de
+    enviar el primer byte. Aquí se lee un lote por vez.
+    """
+    campos = CAMPOS[modelo]
+    encabezado, linea = _formato(campos, formato)
+    for texto in encabezado:
+        yield texto
+    # .values() y no .values_list(): con varias columnas, el aiterator de
+    # values_list hace la consulta dentro del event loop (Django 5.2)
+    async for fila in modelo.objects.order_by("id").values(*campos).aiterator(chunk_size=tamano_lote):
+        yield linea([fila[campo] for campo in campos])
@@ -0,0 +1,199 @@
+# =====================================================================
+# INVENTARIO.PY - Historial de movimientos de los insumos
+# =====================================================================
+# editar_insumo sobrescribe Insumo.cantidad, así que no había forma de
+# saber cuánta harina se gastó esta semana. Ahora cada cambio de
+# cantidad queda anotado en InsumoMovimiento (con señales, ver
+# signals.py) y esas filas nunca se modifican:
+#   - crear un insumo:        ENTRADA por la cantidad inicial
+#   - editarlo:               ENTRADA si sube, CONSUMO si baja
+#                             (AJUSTE si además cambió la unidad)
+#   - importaciones (lotes):  AJUSTE por la diferencia, un INSERT por lote
+#   - eliminarlo:             AJUSTE que deja el saldo en 0
+#
+# Cada movimiento guarda su unidad. Un cambio de unidad (10 KG -> 10000 G)
+# no es una diferencia de cantidad: son dos AJUSTES, uno que deja en 0 la
+# unidad vieja y otro que abre la nueva. Así los saldos se llevan por
+# unidad (nunca se suman kilos con gramos).
+#
+# Saldos: InsumoSaldo tiene el saldo actual de cada insumo en cada
+# unidad y escribir() le suma los movimientos nuevos (una lectura y una
+# escritura por lote, sin recorrer el historial). Cada movimiento guarda
+# además el saldo que dejó: el saldo en una fecha pasada es el del
+# último movimiento hasta esa fecha (una búsqueda en el índice).
+#
+# Si Insumo.cantidad se cambia sin pasar por Django (un UPDATE a mano)
+# el historial deja de cuadrar: "manage.py cuadrar_inventario" agrega
+# los ajustes que falten.
+# =====================================================================
+
+from decimal import Decimal
+
+from django.db import transaction
+from django.db.models import OuterRef, Subquery, Sum
+
+from .models import Insumo, InsumoMovimiento, InsumoSaldo
+
+TAMANO_LOTE = 1000  # Filas por INSERT
+
+Tipo = InsumoMovimiento.Tipo
+
+
+def valores_previos(ids):
+    """{id: {"cantidad", "unidad"}} de cómo están guardados los insumos (una consulta)."""
+    return {fila.pop("id"): fila for fila in Insumo.objects.filter(id__in=ids).values("id", "cantidad", "unidad")}
+
+
+def diferencias(insumos, previos, tipo=None):
+    """
+    Movimientos (sin guardar) con lo que cambió cada insumo respecto a
+    'previos' ({id: valores}, ver valores_previos). Un insumo que no está
+    en 'previos' es nuevo: entra toda su cantidad. Sin 'tipo' se elige
+    por el signo (ENTRADA / CONSUMO). Si cambió la unidad: un AJUSTE que
+    saca lo anterior en la unidad vieja y otro que pone lo nuevo.
+    """
+    movimientos = []
+    for insumo in insumos:
+        previo = previos.get(insumo.pk)
+        if previo is None:
+            movimientos.append(_movimiento(insumo.pk, insumo.unidad, insumo.cantidad, Tipo.ENTRADA))
+            continue
+        unidad = previo.get("unidad", insumo.unidad)
+        cantidad = previo.get("cantidad", insumo.cantidad)
+        if unidad != insumo.unidad:
+            movimientos.append(_movimiento(insumo.pk, unidad, -cantidad, Tipo.AJUSTE))
+            movimientos.append(_movimiento(insumo.pk, insumo.unidad, insumo.cantidad, Tipo.AJUSTE))
+        else:
+            movimientos.append(_movimiento(insumo.pk, insumo.unidad, insumo.cantidad - cantidad, tipo))
+    return movimientos
+
+
+def bajas(ids, insumos):
+    """Movimientos que dejan en 0 los insumos eliminados (ya sin pk: los ids van aparte)."""
+    return [_movimiento(id_, insumo.unidad, -insumo.cantidad, Tipo.AJUSTE) for id_, insumo in zip(ids, insumos)]
+
+
+def _movimiento(insumo_id, unidad, cantidad, tipo):
+    if tipo is None:
+        tipo = Tipo.ENTRADA if cantidad > 0 else Tipo.CONSUMO
+    return InsumoMovimiento(insumo_id=insumo_id, tipo=tipo, cantidad=cantidad, unidad=unidad)
+
+
+def escribir(movimientos):
+    """
+    Guarda los movimientos (un INSERT por lote) y suma cada uno al saldo
+    de su insumo en su unidad. Los saldos se leen con SELECT ... FOR
+    UPDATE: dos escrituras del mismo insumo a la vez esperan su turno en
+    vez de partir del mismo saldo (SQLite ya las ordena con BEGIN
+    IMMEDIATE, ver settings.py).
+    """
+    movimientos = [m for m in movimientos if m.cantidad]
+    if not movimientos:
+        return
+    claves = {(m.insumo_id, m.unidad) for m in movimientos}
+    ids = {insumo_id for insumo_id, _ in claves}
+    # Sin savepoint: si algo falla aquí, falla también el guardado del insumo
+    with transaction.atomic(savepoint=False):
+        saldos = _bloquear_saldos(ids, claves)
+        for movimiento in movimientos:
+            actual = saldos[(movimiento.insumo_id, movimiento.unidad)]
+            actual.saldo += movimiento.cantidad
+            movimiento.saldo = actual.saldo
+        InsumoMovimiento.objects.bulk_create(movimientos, batch_size=TAMANO_LOTE)
+        for movimiento in movimientos:
+            saldos[(movimiento.insumo_id, movimiento.unidad)].movimiento_id = movimiento.id
+        InsumoSaldo.objects.bulk_update(
+            [saldos[clave] for clave in claves], ["saldo", "movimiento_id"], batch_size=TAMANO_LOTE,
+        )
+
+
+def _bloquear_saldos(ids, claves):
+    # {(insumo_id, unidad): InsumoSaldo} de las claves, bloqueados. Las que
+    # no existen se crean antes en 0 (ignore_conflicts: si otro proceso la
+    # crea a la vez queda una sola) para poder bloquearlas también.
+    saldos = _leer_saldos(ids)
+    faltan = claves - saldos.keys()
+    if faltan:
+        InsumoSaldo.objects.bulk_create(
+            [InsumoSaldo(insumo_id=insumo_id, unidad=unidad) for insumo_id, unidad in faltan], ignore_conflicts=True,
+        )
+        saldos = _leer_saldos(ids)
+    return saldos
+
+
+def _leer_saldos(ids):
+    filas = InsumoSaldo.objects.select_for_update().filter(insumo_id__in=ids)
+    return {(saldo.insumo_id, saldo.unidad): saldo for saldo in filas}
+
+
+# =====================================================================
+# SALDOS
+# =====================================================================
+def saldos(ids=None, hasta=None):
+    """
+    {insumo_id: {unidad: saldo}} de los insumos (todos si ids es None)
+    en la fecha 'hasta' (o ahora). Solo aparecen las unidades con saldo.
+    Una consulta: sin fecha, la tabla de saldos; con fecha, el saldo
+    del último movimiento anterior (por índice) de cada insumo y unidad.
+    """
+    filas = InsumoSaldo.objects.order_by()
+    if ids is not None:
+        filas = filas.filter(insumo_id__in=ids)
+    if hasta is not None:
+        anterior = InsumoMovimiento.objects.filter(
+            insumo_id=OuterRef("insumo_id"), unidad=OuterRef("unidad"), fecha__lte=hasta,
+        ).order_by("-id")
+        filas = filas.annotate(saldo_en_fecha=Subquery(anterior.values("saldo")[:1]))
+        valores = filas.values_list("insumo_id", "unidad", "saldo_en_fecha")
+    else:
+        valores = filas.values_list("insumo_id", "unidad", "saldo")
+    resultado = {}
+    for insumo_id, unidad, saldo in valores:
+        if saldo:
+            resultado.setdefault(insumo_id, {})[unidad] = saldo
+    return resultado
+
+
+def saldo(insumo_id, hasta=None):
+    """{unidad: saldo} de un insumo en la fecha 'hasta' (o ahora), con una consulta."""
+    return saldos([insumo_id], hasta).get(insumo_id, {})
+
+
+def consumo(desde, hasta, ids=None):
+    """{insumo_id: {unidad: cantidad consumida}} entre dos fechas (en positivo)."""
+    movimientos = InsumoMovimiento.objects.filter(fecha__gte=desde, fecha__lt=hasta, tipo=Tipo.CONSUMO)
+    if ids is not None:
+        movimientos = movimientos.filter(insumo_id__in=ids)
+    filas = (
+        movimientos.order_by().values("insumo_id", "unidad").annotate(total=Sum("cantidad"))
+        .values_list("insumo_id", "unidad", "total")
+    )
+    resultado = {}
+    for insumo_id, unidad, total in filas:
+        resultado.setdefault(insumo_id, {})[unidad] = -total
+    return resultado
+
+
+def cuadrar(tamano_lote=TAMANO_LOTE):
+    """
+    Agrega los AJUSTES que hagan falta para que el saldo de cada insumo
+    sea su cantidad actual en su unidad (y 0 en las demás). Devuelve
+    cuántos insumos ajustó.
+    """
+    actuales = saldos()
+    ajustes = []
+    ajustados = 0
+    for insumo_id, cantidad, unidad in Insumo.objects.order_by("id").values_list("id", "cantidad", "unidad").iterator(
+        chunk_size=tamano_lote,
+    ):
+        esperado = {unidad: cantidad} if cantidad else {}
+        actual = actuales.get(insumo_id, {})
+        nuevos = [
+            _movimiento(insumo_id, u, esperado.get(u, Decimal(0)) - actual.get(u, Decimal(0)), Tipo.AJUSTE)
+            for u in sorted(esperado.keys() | actual.keys())
+            if esperado.get(u, Decimal(0)) != actual.get(u, Decimal(0))
+        ]
+        ajustes.extend(nuevos)
+        ajustados += bool(nuevos)
+    escribir(ajustes)
+    return ajustados
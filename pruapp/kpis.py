@@ -0,0 +1,131 @@
+# =====================================================================
+# KPIS.PY - Indicadores del dashboard precalculados
+# =====================================================================
+# Contar productos en stock, empleados activos, etc. con COUNT(*) en
+# cada visita cuesta más a medida que crecen las tablas. En cambio los
+# totales viven en ResumenDashboard (una sola fila) e InsumosPorFecha
+# y se ajustan con +1 / -1 cada vez que cambia una fila:
+#
+#   - pre_save:  se lee cómo estaba la fila antes de guardarla
+#   - post_save: se resta lo que aportaba antes y se suma lo de ahora
+#   - pre_delete / post_delete: se lee y se resta lo que aportaba
+#   - cargas masivas: lo mismo, una consulta por lote (ver signals.py)
+#
+# Lo anterior se lee de la base con SELECT ... FOR UPDATE y los totales
+# se ajustan con UPDATE ... SET campo = campo + n, todo en la misma
+# transacción que el guardado (ver GuardaEnTransaccion en models.py):
+# si dos peticiones editan la misma fila a la vez, la segunda espera y
+# parte de lo que dejó la primera (no del objeto que tenía en memoria),
+# así que el cambio no se cuenta dos veces ni se pierde.
+#
+# Así el dashboard lee siempre 2 filas, sin importar el tamaño de las
+# tablas. Si algo se desincroniza (por ejemplo un UPDATE hecho a mano
+# en la base de datos) se reconstruye con:
+#     python manage.py reconstruir_kpis
+# =====================================================================
+
+from collections import Counter
+
+from django.db import transaction
+from django.db.models import Count, F, Q
+from django.utils import timezone
+
+from .models import Producto, Insumo, Empleado, ResumenDashboard, InsumosPorFecha
+
+ID_RESUMEN = 1
+
+# Campos que influyen en los indicadores de cada modelo
+CAMPOS_KPI = {
+    Producto: ("stock",),
+    Empleado: ("estado",),
+    Insumo: ("fecha",),
+}
+
+
+def aportes(modelo, valores):
+    """
+    Qué suma una fila a los indicadores.
+    Devuelve ({campo_del_resumen: n}, {fecha: n}).
+    """
+    if modelo is Producto:
+        return {"productos_en_stock" if valores["stock"] else "productos_agotados": 1}, {}
+    if modelo is Empleado:
+        return {"empleados_activos" if valores["estado"] else "empleados_inactivos": 1}, {}
+    fechas = {valores["fecha"]: 1} if valores["fecha"] else {}
+    return {"insumos_total": 1}, fechas
+
+
+def valores_kpi(objeto):
+    return {campo: getattr(objeto, campo) for campo in CAMPOS_KPI[type(objeto)]}
+
+
+def valores_previos(modelo, ids):
+    """
+    {id: valores} de cómo están guardadas las filas ahora (una consulta).
+    Quedan bloqueadas hasta el final de la transacción: llamarla dentro
+    de una.
+    """
+    campos = CAMPOS_KPI[modelo]
+    filas = modelo.objects.select_for_update().filter(id__in=ids).values("id", *campos)
+    return {fila.pop("id"): fila for fila in filas}
+
+
+def aplicar(modelo, previos, nuevos):
+    """
+    Ajusta los indicadores: resta lo que aportaban las filas 'previos'
+    y suma lo que aportan las filas 'nuevos' (listas de valores_kpi).
+    """
+    resumen, fechas = Counter(), Counter()
+    for valores in previos:
+        campos, por_fecha = aportes(modelo, valores)
+        resumen.subtract(campos)
+        fechas.subtract(por_fecha)
+    for valores in nuevos:
+        campos, por_fecha = aportes(modelo, valores)
+        resumen.update(campos)
+        fechas.update(por_fecha)
+
+    cambios = {campo: F(campo) + n for campo, n in resumen.items() if n}
+    if cambios and not ResumenDashboard.objects.filter(id=ID_RESUMEN).update(**cambios):
+        # La fila no existe (base nueva o borrada a mano): se cuenta todo
+        reconstruir()
+        return
+
+    for fecha, n in fechas.items():
+        if not n:
+            continue
+        fila, creada = InsumosPorFecha.objects.get_or_create(fecha=fecha, defaults={"total": n})
+        if not creada:
+            InsumosPorFecha.objects.filter(id=fila.id).update(total=F("total") + n)
+
+
+def reconstruir():
+    """Recalcula todos los indicadores desde cero."""
+    productos = Producto.objects.aggregate(
+        en_stock=Count("id", filter=Q(stock=True)), agotados=Count("id", filter=Q(stock=False)),
+    )
+    empleados = Empleado.objects.aggregate(
+        activos=Count("id", filter=Q(estado=True)), inactivos=Count("id", filter=Q(estado=False)),
+    )
+    por_fecha = (
+        Insumo.objects.exclude(fecha=None).order_by().values("fecha").annotate(total=Count("id"))
+    )
+    with transaction.atomic():
+        ResumenDashboard.objects.update_or_create(id=ID_RESUMEN, defaults={
+            "productos_en_stock": productos["en_stock"],
+            "productos_agotados": productos["agotados"],
+            "empleados_activos": empleados["activos"],
+            "empleados_inactivos": empleados["inactivos"],
+            "insumos_total": Insumo.objects.count(),
+        })
+        InsumosPorFecha.objects.all().delete()
+        InsumosPorFecha.objects.bulk_create(
+            [InsumosPorFecha(fecha=fila["fecha"], total=fila["total"]) for fila in por_fecha]
+        )
+
+
+def indicadores():
+    """Lo que muestra el dashboard: 2 consultas por llave primaria/única."""
+    resumen = ResumenDashboard.objects.filter(id=ID_RESUMEN).first() or ResumenDashboard()
+    hoy = InsumosPorFecha.objects.filter(fecha=timezone.localdate()).values_list("total", flat=True).first()
+    return {"resumen": resumen, "insumos_hoy": hoy or 0}
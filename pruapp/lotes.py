@@ -0,0 +1,95 @@
+# =====================================================================
+# LOTES.PY - Acciones sobre varias filas marcadas en una lista
+# =====================================================================
+# Antes para borrar 20 productos había que pulsar 20 veces "eliminar":
+# 20 peticiones GET, cada una con su DELETE y sus señales (índice de
+# búsqueda, versión del cache, indicadores...), o sea decenas de
+# consultas por fila.
+#
+# Ahora las listas tienen casillas y una barra de acciones que envía
+# por POST todos los IDs marcados a /lote/<lista>/ y aquí se hace:
+#   - eliminar:   UN QuerySet.delete() dentro de eliminacion_en_lote()
+#                 (las señales se procesan una vez por lote, no por fila)
+#   - actualizar: UN QuerySet.update() (ej: marcar N productos agotados)
+#                 con lote_por_guardar / lote_guardado, igual que en
+#                 las importaciones (ver intercambio.py)
+# todo en una sola transacción.
+# =====================================================================
+
+from django.db import transaction
+from django.utils import timezone
+
+from .models import Practica, Producto, Insumo, Empleado
+from .signals import eliminacion_en_lote, lote_guardado, lote_por_guardar
+
+# Una página tiene como mucho PAGINACION_TAMANO_MAXIMO filas; esto es
+# solo un tope para no aceptar listas enormes de IDs
+MAXIMO_IDS = 1000
+
+# Nombre en la URL -> (modelo, lista a la que se vuelve, acciones)
+# Cada acción: (texto en la barra, valores del UPDATE); None = eliminar
+LISTAS = {
+    "productos": (Producto, "menu_list", {
+        "eliminar": ("Eliminar", None),
+        "agotar": ("Marcar agotados", {"stock": False}),
+        "reponer": ("Marcar en stock", {"stock": True}),
+    }),
+    "insumos": (Insumo, "inventario_list", {
+        "eliminar": ("Eliminar", None),
+    }),
+    "empleados": (Empleado, "empleados_list", {
+        "eliminar": ("Eliminar", None),
+        "desactivar": ("Marcar inactivos", {"estado": False}),
+        "activar": ("Marcar activos", {"estado": True}),
+    }),
+    "usuarios": (Practica, "usuarios", {
+        "eliminar": ("Eliminar", None),
+    }),
+}
+
+
+def leer_ids(valores):
+    """IDs enviados por las casillas (sin repetir). ValueError si no son válidos."""
+    ids = {int(valor) for valor in valores}
+    if not ids or len(ids) > MAXIMO_IDS:
+        raise ValueError(f"Marca entre 1 y {MAXIMO_IDS} filas")
+    return sorted(ids)
+
+
+def eliminar(modelo, ids):
+    """Borra las filas con esos IDs y devuelve cuántas borró."""
+    with transaction.atomic(), eliminacion_en_lote():
+        # Bloquear antes: los indicadores restan lo que había al borrar
+        ids = list(modelo.objects.select_for_update().filter(id__in=ids).values_list("id", flat=True))
+        _, por_modelo = modelo.objects.filter(id__in=ids).delete()
+    return por_modelo.get(modelo._meta.label, 0)
+
+
+def actualizar(modelo, ids, valores):
+    """
+    Pone 'valores' en las filas con esos IDs y devuelve cuántas cambiaron.
+    Las que ya tenían esos valores no se tocan.
+    """
+    with transaction.atomic():
+        objetos = list(modelo.objects.select_for_update().filter(id__in=ids).exclude(**valores))
+        if not objetos:
+            return 0
+        campos = list(valores)
+        lote_por_guardar.send(sender=modelo, objetos=objetos, campos=campos)
+        # .update() no llena "actualizado" (auto_now): ver sincronizacion.py
+        guardar = {**valores, "actualizado": timezone.now()}
+        modelo.objects.filter(id__in=[o.pk for o in objetos]).update(**guardar)
+        for objeto in objetos:
+            for campo, valor in guardar.items():
+                setattr(objeto, campo, valor)
+        lote_guardado.send(sender=modelo, objetos=objetos, campos=campos)
+    return len(objetos)
+
+
+def aplicar(lista, accion, ids):
+    """Ejecuta la acción de LISTAS[lista] sobre los IDs; devuelve las filas afectadas."""
+    modelo, _, acciones = LISTAS[lista]
+    valores = acciones[accion][1]
+    if valores is None:
+        return eliminar(modelo, ids)
+    return actualizar(modelo, ids, valores)
@@ -0,0 +1,114 @@
+# =====================================================================
+# python manage.py bench_asgi --filas 1000 --peticiones 300 --concurrencia 32
+# =====================================================================
+# Compara el camino WSGI (vistas normales, un hilo por petición) con el
+# camino ASGI (vistas async de views_async.py, un event loop).
+#
+# Cada modo corre en un proceso aparte porque urls.py elige las vistas
+# al arrancar (VISTAS_ASYNC). Las peticiones pasan por todo Django
+# (middlewares, sesión, vista, plantilla) usando WSGIHandler/ASGIHandler
+# a través de Client/AsyncClient, sobre una base de datos temporal.
+# El cache de vistas se desactiva para medir el trabajo real.
+# =====================================================================
+
+import asyncio
+import json
+import os
+import subprocess
+import sys
+import threading
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.test import AsyncClient, override_settings
+
+from pruapp import bench
+from pruapp.models import Practica, Producto, Insumo, Empleado
+
+URLS = ("/menu/", "/inventario/", "/empleados/")
+
+
+class Command(BaseCommand):
+    help = "Compara peticiones/segundo y p99 de las vistas WSGI contra las ASGI"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--filas", type=int, default=1000, help="Filas de cada tabla")
+        parser.add_argument("--peticiones", type=int, default=300, help="Peticiones por URL")
+        parser.add_argument("--concurrencia", type=int, default=32)
+        parser.add_argument("--modo", choices=("ambos", "wsgi", "asgi"), default="ambos")
+        parser.add_argument("--sin-guardar", action="store_true")
+
+    def handle(self, *args, **options):
+        if options["modo"] != "ambos":
+            # Proceso hijo: mide un solo modo y devuelve JSON por la salida estándar
+            self.stdout.write(json.dumps(self.medir(options)))
+            return
+
+        resultados = []
+        for modo in ("wsgi", "asgi"):
+            entorno = dict(os.environ, VISTAS_ASYNC="1" if modo == "asgi" else "0")
+            comando = [
+                sys.executable, os.path.join(settings.BASE_DIR, "manage.py"), "bench_asgi", "--modo", modo,
+                "--filas", str(options["filas"]), "--peticiones", str(options["peticiones"]),
+                "--concurrencia", str(options["concurrencia"]),
+            ]
+            proceso = subprocess.run(comando, env=entorno, capture_output=True, text=True)
+            if proceso.returncode != 0:
+                raise CommandError(f"Falló el modo {modo}:\n{proceso.stderr}")
+            resultados.extend(json.loads(proceso.stdout.strip().splitlines()[-1]))
+
+        bench.imprimir_tabla(self.stdout, resultados, ["modo", "url", "req_s", "p50_ms", "p95_ms", "p99_ms"])
+        if not options["sin_guardar"]:
+            ruta = bench.guardar("asgi_vs_wsgi", resultados, filas=options["filas"],
+                                 peticiones=options["peticiones"], concurrencia=options["concurrencia"])
+            self.stdout.write(self.style.SUCCESS(f"Resultados en {ruta}"))
+
+    def medir(self, options):
+        modo = options["modo"]
+        if settings.VISTAS_ASYNC != (modo == "asgi"):
+            raise CommandError("VISTAS_ASYNC no coincide con el modo pedido")
+
+        resultados = []
+        with bench.base_temporal(), override_settings(CACHES=bench.SIN_CACHE):
+            usuario = Practica.objects.create(username="bench", password="!")
+            filas = options["filas"]
+            Producto.objects.bulk_create([Producto(nombre=f"Producto {i}", precio=i) for i in range(filas)])
+            Insumo.objects.bulk_create([Insumo(nombre=f"Insumo {i}", cantidad=i) for i in range(filas)])
+            Empleado.objects.bulk_create([
+                Empleado(nombre=f"Empleado {i}", rol="Mesero", edad=30, telefono="300") for i in range(filas)
+            ])
+
+            for url in URLS:
+                if modo == "wsgi":
+                    tiempos, duracion = self.medir_wsgi(usuario, url, options)
+                else:
+                    tiempos, duracion = asyncio.run(self.medir_asgi(usuario, url, options))
+                resultados.append(bench.resumir(tiempos, duracion, modo=modo, url=url))
+        return resultados
+
+    def medir_wsgi(self, usuario, url, options):
+        # Un cliente por hilo (Client no se comparte entre hilos)
+        local = threading.local()
+
+        def pedir(i):
+            if not hasattr(local, "cliente"):
+                local.cliente = bench.cliente_con_sesion(usuario)
+            if local.cliente.get(url).status_code != 200:
+                raise RuntimeError(f"{url} no respondió 200")
+
+        return bench.concurrente(pedir, options["peticiones"], options["concurrencia"])
+
+    async def medir_asgi(self, usuario, url, options):
+        from asgiref.sync import sync_to_async
+
+        clientes = [
+            await sync_to_async(bench.cliente_con_sesion)(usuario, AsyncClient)
+            for _ in range(options["concurrencia"])
+        ]
+
+        async def pedir(i):
+            respuesta = await clientes[i % len(clientes)].get(url)
+            if respuesta.status_code != 200:
+                raise RuntimeError(f"{url} no respondió 200")
+
+        return await bench.aconcurrente(pedir, options["peticiones"], options["concurrencia"])
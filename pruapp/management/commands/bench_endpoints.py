@@ -0,0 +1,227 @@
+# =====================================================================
+# python manage.py bench_endpoints --filas 10k --peticiones 200 --concurrencia 8
+# =====================================================================
+# Mide peticiones/segundo, p50/p95/p99 y consultas SQL por petición de
+# cada URL de pruapp (login, listas, búsqueda, dashboard y el CRUD).
+#
+# Pasos:
+#   1. Crea una base de datos temporal (nunca toca db.sqlite3) y la
+#      llena con --filas filas por tabla (ver bench.sembrar).
+#   2. Pide cada URL de dos formas (--via):
+#        - "cliente":  django.test.Client, sin red (solo Django)
+#        - "servidor": HTTP real contra un servidor WSGI local
+#   3. Guarda todo en benchmarks/endpoints-<fecha>.json con el commit
+#      actual, para comparar dos commits con un diff.
+#
+# Las consultas por petición salen del registro de métricas
+# (metricas.py). El cache de vistas se desactiva salvo --con-cache.
+# --base-actual usa la base configurada tal cual (por ejemplo después
+# de "manage.py sembrar_datos --filas 1m") en vez de una temporal;
+# OJO: las pruebas de crear/editar/eliminar modifican esa base.
+# =====================================================================
+
+import secrets
+import threading
+from contextlib import nullcontext
+from urllib.error import HTTPError
+from urllib.parse import urlencode
+from urllib.request import HTTPRedirectHandler, Request, build_opener
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.test import override_settings
+
+from pruapp import bench, contrasenas, metricas
+from pruapp.models import Practica, Producto, Insumo, Empleado
+from pruapp.management.commands.sembrar_datos import leer_filas
+
+CLAVE = "bench-clave"
+CSRF = secrets.token_hex(16)  # 32 caracteres: Django lo acepta como token sin máscara
+
+
+class Escenario:
+    """Una URL a medir. ruta y datos son funciones de (i, ids)."""
+
+    def __init__(self, nombre, vista, ruta, metodo="get", datos=None, esperado=200, modelo=None):
+        self.nombre = nombre
+        self.vista = vista        # name= de urls.py (para leer las métricas)
+        self.ruta = ruta
+        self.metodo = metodo
+        self.datos = datos
+        self.esperado = esperado
+        self.modelo = modelo      # Si usa ids existentes, de qué tabla
+
+
+def _fijo(ruta):
+    return lambda i, ids: ruta
+
+
+def _con_id(patron):
+    return lambda i, ids: patron.format(ids[i % len(ids)])
+
+
+DATOS_PRODUCTO = lambda i, ids: {"nombre": f"Bench {i}", "precio": "12000", "stock": "on"}
+DATOS_INSUMO = lambda i, ids: {"nombre": f"Bench {i}", "cantidad": "5", "unidad": "KG", "umbral": "2", "fecha": "2025-08-27"}
+DATOS_EMPLEADO = lambda i, ids: {"nombre": f"Bench {i}", "rol": "Chef", "edad": "30", "telefono": "300", "estado": "on"}
+
+# Primero las lecturas, luego las escrituras y al final los eliminar
+ESCENARIOS = (
+    Escenario("login", "login", _fijo("/login/"), "post",
+              lambda i, ids: {"username": "bench", "password": CLAVE}, esperado=302),
+    Escenario("dashboard", "dashboard", _fijo("/dashboard/")),
+    Escenario("menu_list", "menu_list", _fijo("/menu/")),
+    Escenario("menu_pagina", "menu_list", _con_id("/menu/?despues={}"), modelo=Producto),
+    Escenario("menu_busqueda", "menu_list", _fijo("/menu/?q=pizza")),
+    Escenario("inventario_list", "inventario_list", _fijo("/inventario/")),
+    Escenario("inventario_busqueda", "inventario_list", _fijo("/inventario/?q=harina")),
+    Escenario("empleados_list", "empleados_list", _fijo("/empleados/")),
+    Escenario("empleados_busqueda", "empleados_list", _fijo("/empleados/?q=chef")),
+    Escenario("crear_producto", "crear_producto", _fijo("/menu/nuevo/"), "post", DATOS_PRODUCTO, 302),
+    Escenario("editar_producto", "editar_producto", _con_id("/menu/editar/{}/"), "post", DATOS_PRODUCTO, 302, Producto),
+    Escenario("crear_insumo", "crear_insumo", _fijo("/inventario/nuevo/"), "post", DATOS_INSUMO, 302),
+    Escenario("editar_insumo", "editar_insumo", _con_id("/inventario/editar/{}/"), "post", DATOS_INSUMO, 302, Insumo),
+    Escenario("crear_empleado", "crear_empleado", _fijo("/empleados/nuevo/"), "post", DATOS_EMPLEADO, 302),
+    Escenario("editar_empleado", "editar_empleado", _con_id("/empleados/editar/{}/"), "post", DATOS_EMPLEADO, 302, Empleado),
+    Escenario("eliminar_producto", "eliminar_producto", _con_id("/menu/eliminar/{}/"), esperado=302, modelo=Producto),
+    Escenario("eliminar_insumo", "eliminar_insumo", _con_id("/inventario/eliminar/{}/"), esperado=302, modelo=Insumo),
+    Escenario("eliminar_empleado", "eliminar_empleado", _con_id("/empleados/eliminar/{}/"), esperado=302, modelo=Empleado),
+)
+
+
+class _SinRedirecciones(HTTPRedirectHandler):
+    # Un 302 es la respuesta esperada de login/crear/editar: no se sigue
+    def redirect_request(self, *args, **kwargs):
+        return None
+
+
+class ClienteHttp:
+    """Cliente HTTP mínimo (urllib) con cookie de sesión y token CSRF."""
+
+    def __init__(self, base, sesion):
+        self.base = base
+        self.cookie = f"{settings.SESSION_COOKIE_NAME}={sesion}; {settings.CSRF_COOKIE_NAME}={CSRF}"
+        self.abridor = build_opener(_SinRedirecciones)
+
+    def pedir(self, metodo, ruta, datos=None):
+        cuerpo = urlencode(datos).encode() if datos is not None else None
+        peticion = Request(self.base + ruta, data=cuerpo, method=metodo.upper())
+        peticion.add_header("Cookie", self.cookie)
+        if cuerpo is not None:
+            peticion.add_header("Content-Type", "application/x-www-form-urlencoded")
+            peticion.add_header("X-CSRFToken", CSRF)
+        try:
+            with self.abridor.open(peticion) as respuesta:
+                respuesta.read()
+                return respuesta.status
+        except HTTPError as error:
+            error.read()
+            return error.code
+
+
+class Command(BaseCommand):
+    help = "Mide req/s, percentiles y consultas por petición de todas las URLs de pruapp"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--filas", default="10k", help="Filas por tabla (ej: 10k, 100k, 1m)")
+        parser.add_argument("--peticiones", type=int, default=200, help="Peticiones por escenario")
+        parser.add_argument("--concurrencia", type=int, default=8)
+        parser.add_argument("--via", choices=("cliente", "servidor", "ambos"), default="ambos")
+        parser.add_argument("--solo", nargs="+", choices=[e.nombre for e in ESCENARIOS],
+                            help="Medir solo estos escenarios")
+        parser.add_argument("--con-cache", action="store_true", help="No desactivar el cache de vistas")
+        parser.add_argument("--base-actual", action="store_true",
+                            help="Usar la base configurada (ya sembrada) en vez de una temporal")
+        parser.add_argument("--sin-guardar", action="store_true")
+
+    def handle(self, *args, **options):
+        filas = leer_filas(options["filas"])
+        escenarios = [e for e in ESCENARIOS if not options["solo"] or e.nombre in options["solo"]]
+        vias = ("cliente", "servidor") if options["via"] == "ambos" else (options["via"],)
+        cambios = {"DEBUG": False}  # Con DEBUG Django guarda cada consulta en memoria
+        cambios["MINIATURAS"] = False  # Sin descargas en segundo plano durante la medición
+        if not options["con_cache"]:
+            cambios["CACHES"] = bench.SIN_CACHE
+
+        resultados = []
+        base = nullcontext() if options["base_actual"] else bench.base_temporal()
+        with base, override_settings(**cambios):
+            if not options["base_actual"]:
+                self.stdout.write(f"Sembrando {filas} filas por tabla...")
+                bench.sembrar(filas)
+            usuario, _ = Practica.objects.update_or_create(
+                username="bench", defaults={"password": contrasenas.cifrar(CLAVE)}
+            )
+            for via in vias:
+                for escenario in escenarios:
+                    resultado = self.medir(via, escenario, usuario, options)
+                    resultados.append(resultado)
+                    self.stdout.write(
+                        f"  {via:>8} {escenario.nombre:<20} {resultado['req_s']:>8} req/s  "
+                        f"p99 {resultado['p99_ms']} ms  {resultado['consultas']} consultas  "
+                        f"{resultado['errores']} errores"
+                    )
+
+        bench.imprimir_tabla(
+            self.stdout, resultados, ["via", "escenario", "req_s", "p50_ms", "p95_ms", "p99_ms", "consultas", "errores"]
+        )
+        if not options["sin_guardar"]:
+            ruta = bench.guardar(
+                "endpoints", resultados, filas=filas, peticiones=options["peticiones"],
+                concurrencia=options["concurrencia"], con_cache=options["con_cache"],
+                base_actual=options["base_actual"],
+            )
+            self.stdout.write(self.style.SUCCESS(f"Resultados en {ruta}"))
+
+    def medir(self, via, escenario, usuario, options):
+        total = options["peticiones"]
+        ids = []
+        if escenario.modelo is not None:
+            # Para eliminar se toman ids distintos (los últimos); para editar da igual
+            ids = list(escenario.modelo.objects.order_by("-id").values_list("id", flat=True)[:total])
+
+        errores = []
+        if via == "cliente":
+            tiempos, duracion = self.medir_cliente(escenario, usuario, ids, total, options["concurrencia"], errores)
+        else:
+            tiempos, duracion = self.medir_servidor(escenario, usuario, ids, total, options["concurrencia"], errores)
+        consultas = metricas.registro.promedio("pruapp_sql_consultas", escenario.vista)
+        return bench.resumir(
+            tiempos, duracion, via=via, escenario=escenario.nombre, url=escenario.ruta(0, ids or [0]),
+            consultas=round(consultas, 2) if consultas is not None else None, errores=len(errores),
+        )
+
+    def _comprobar(self, escenario, estado, errores):
+        # Una respuesta distinta a la esperada (ej: "database is locked") se
+        # cuenta como error pero no detiene la medición
+        if estado != escenario.esperado:
+            errores.append(estado)
+
+    def medir_cliente(self, escenario, usuario, ids, total, concurrencia, errores):
+        local = threading.local()  # Un Client por hilo
+
+        def pedir(i):
+            if not hasattr(local, "cliente"):
+                local.cliente = bench.cliente_con_sesion(usuario)
+            ruta = escenario.ruta(i, ids)
+            if escenario.metodo == "post":
+                respuesta = local.cliente.post(ruta, escenario.datos(i, ids))
+            else:
+                respuesta = local.cliente.get(ruta)
+            self._comprobar(escenario, respuesta.status_code, errores)
+
+        metricas.registro.reiniciar()
+        return bench.concurrente(pedir, total, concurrencia)
+
+    def medir_servidor(self, escenario, usuario, ids, total, concurrencia, errores):
+        local = threading.local()
+        with bench.servidor_local() as url_base:
+            def pedir(i):
+                if not hasattr(local, "cliente"):
+                    sesion = bench.cliente_con_sesion(usuario).cookies[settings.SESSION_COOKIE_NAME].value
+                    local.cliente = ClienteHttp(url_base, sesion)
+                datos = escenario.datos(i, ids) if escenario.datos else None
+                estado = local.cliente.pedir(escenario.metodo, escenario.ruta(i, ids), datos)
+                self._comprobar(escenario, estado, errores)
+
+            metricas.registro.reiniciar()
+            return bench.concurrente(pedir, total, concurrencia)
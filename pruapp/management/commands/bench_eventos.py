@@ -0,0 +1,83 @@
+# =====================================================================
+# python manage.py bench_eventos --clientes 5000 [--eventos 20]
+# =====================================================================
+# Abre N conexiones de eventos en vivo (eventos.flujo(), lo mismo que
+# sirve /eventos/) en un solo event loop, publica eventos desde otro
+# hilo (como hacen las señales al guardar) y mide cuánto tarda cada
+# conexión en recibir cada evento, más la memoria por conexión.
+#
+# Con --redis-url los eventos pasan por el canal pub/sub (por ejemplo
+# "manage.py canal_eventos" en otra terminal). No usa la base de datos.
+# =====================================================================
+
+import asyncio
+import threading
+import time
+import tracemalloc
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.test import override_settings
+
+from pruapp import bench, eventos
+
+
+class Command(BaseCommand):
+    help = "Latencia de entrega de los eventos en vivo (SSE) con N conexiones abiertas"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--clientes", type=int, nargs="+", default=[100, 1000, 5000])
+        parser.add_argument("--eventos", type=int, default=20, help="Eventos publicados por escenario")
+        parser.add_argument("--redis-url", default="", help="Publicar por el canal pub/sub (ej: redis://127.0.0.1:6380/)")
+        parser.add_argument("--sin-guardar", action="store_true")
+
+    def handle(self, *args, **options):
+        resultados = []
+        with override_settings(EVENTOS_REDIS_URL=options["redis_url"]):
+            for clientes in options["clientes"]:
+                resultados.append(asyncio.run(self.escenario(max(1, clientes), max(1, options["eventos"]))))
+
+        bench.imprimir_tabla(self.stdout, resultados, [
+            "clientes", "peticiones", "p50_ms", "p95_ms", "p99_ms", "kb_por_cliente",
+        ])
+        if not options["sin_guardar"]:
+            ruta = bench.guardar("eventos", resultados, eventos=options["eventos"], redis=bool(options["redis_url"]))
+            self.stdout.write(self.style.SUCCESS(f"Resultados en {ruta}"))
+
+    async def escenario(self, clientes, total):
+        tracemalloc.start()
+        antes = tracemalloc.get_traced_memory()[0]
+        flujos = [eventos.flujo() for _ in range(clientes)]
+        for flujo in flujos:
+            await anext(flujo)  # "retry:": ya está suscrita
+        memoria = tracemalloc.get_traced_memory()[0] - antes
+        tracemalloc.stop()
+        redis = bool(settings.EVENTOS_REDIS_URL)
+        if redis:
+            await asyncio.sleep(0.2)  # Que la escucha alcance a suscribirse al canal
+
+        tiempos = []
+        inicio_total = time.perf_counter()
+        for numero in range(total):
+            inicio = time.perf_counter()
+            # Desde otro hilo, como signals.py al confirmar la transacción
+            hilo = threading.Thread(target=eventos.publicar, args=("producto", {"id": numero, "stock": False}))
+            hilo.start()
+            llegadas = await asyncio.gather(*(self.recibir(flujo, inicio) for flujo in flujos))
+            hilo.join()
+            tiempos.extend(llegadas)
+        duracion = time.perf_counter() - inicio_total
+
+        for flujo in flujos:
+            await flujo.aclose()
+        for tarea in eventos._escuchas.values():
+            tarea.cancel()
+        eventos._escuchas.clear()
+        return bench.resumir(
+            tiempos, duracion, clientes=clientes, redis=redis,
+            kb_por_cliente=round(memoria / clientes / 1024, 2),
+        )
+
+    async def recibir(self, flujo, inicio):
+        await asyncio.wait_for(anext(flujo), 10)
+        return time.perf_counter() - inicio
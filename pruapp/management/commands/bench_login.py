@@ -0,0 +1,53 @@
+# =====================================================================
+# python manage.py bench_login --peticiones 100 --concurrencia 16 --trabajadores 1,2,4
+# =====================================================================
+# Mide cuántos logins por segundo aguanta el servidor con contraseñas
+# cifradas, probando distintos tamaños del pool de verificación
+# (ver contrasenas.py). Usa una base de datos temporal.
+# El pool solo lo usa el login async: correr con VISTAS_ASYNC=1 (con el
+# login sync el tamaño del pool no cambia nada).
+# =====================================================================
+
+from django.core.management.base import BaseCommand
+from django.test import Client, override_settings
+
+from pruapp import bench, contrasenas
+from pruapp.models import Practica
+
+
+class Command(BaseCommand):
+    help = "Benchmark de login concurrente con el pool de verificación de contraseñas"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--peticiones", type=int, default=100)
+        parser.add_argument("--concurrencia", type=int, default=16, help="Hilos que hacen login a la vez")
+        parser.add_argument("--trabajadores", default="1,2,4",
+                            help="Tamaños del pool a probar, separados por coma")
+        parser.add_argument("--pool", choices=("hilos", "procesos"), default="hilos")
+        parser.add_argument("--sin-guardar", action="store_true", help="No escribir el JSON de resultados")
+
+    def handle(self, *args, **options):
+        tamanos = [int(t) for t in options["trabajadores"].split(",") if t.strip()]
+        resultados = []
+
+        with bench.base_temporal():
+            Practica.objects.create(username="bench", password=contrasenas.cifrar("clave-bench"))
+
+            def login(i):
+                respuesta = Client().post("/login/", {"username": "bench", "password": "clave-bench"})
+                if respuesta.status_code != 302:
+                    raise RuntimeError(f"Login falló con estado {respuesta.status_code}")
+
+            for tamano in tamanos:
+                with override_settings(HASHER_POOL=options["pool"], HASHER_TRABAJADORES=tamano):
+                    contrasenas.reiniciar_pool()
+                    login(0)  # Calentar el pool
+                    tiempos, duracion = bench.concurrente(login, options["peticiones"], options["concurrencia"])
+                    resultados.append(bench.resumir(tiempos, duracion, trabajadores=tamano))
+                contrasenas.reiniciar_pool()
+
+        bench.imprimir_tabla(self.stdout, resultados, ["trabajadores", "peticiones", "req_s", "p50_ms", "p95_ms", "p99_ms"])
+        if not options["sin_guardar"]:
+            ruta = bench.guardar("login", resultados, pool=options["pool"],
+                                 peticiones=options["peticiones"], concurrencia=options["concurrencia"])
+            self.stdout.write(self.style.SUCCESS(f"Resultados en {ruta}"))
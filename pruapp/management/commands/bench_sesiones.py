@@ -0,0 +1,80 @@
+# =====================================================================
+# python manage.py bench_sesiones --peticiones 300 [--url /menu/]
+# =====================================================================
+# Compara los motores de sesión (settings.MOTORES_SESION) pidiendo la
+# misma URL con un usuario ya logueado: consultas SQL por petición (en
+# total y a django_session), peticiones/segundo y percentiles.
+#
+# El cache de vistas se desactiva (si no, menu_list casi no consulta);
+# las sesiones usan un cache en memoria aparte para que "cache" no
+# caiga siempre a la base. Usa una base temporal.
+# =====================================================================
+
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+
+from pruapp import bench
+from pruapp.models import Practica
+
+CACHE_SESIONES = {"BACKEND": "django.core.cache.backends.locmem.LocMemCache", "LOCATION": "bench-sesiones"}
+
+
+class Command(BaseCommand):
+    help = "Consultas y req/s de una URL con cada motor de sesión (db, cache, firmada)"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--peticiones", type=int, default=300)
+        parser.add_argument("--filas", type=int, default=1000, help="Filas por tabla en la base temporal")
+        parser.add_argument("--url", default="/menu/")
+        parser.add_argument("--motores", nargs="+", choices=list(settings.MOTORES_SESION), default=list(settings.MOTORES_SESION))
+        parser.add_argument("--sin-guardar", action="store_true")
+
+    def handle(self, *args, **options):
+        total = options["peticiones"]
+        resultados = []
+        with bench.base_temporal():
+            bench.sembrar(options["filas"])
+            usuario = Practica.objects.create(username="bench", password="!")
+            for nombre in options["motores"]:
+                ajustes = override_settings(
+                    DEBUG=False, MINIATURAS=False,
+                    CACHES={**bench.SIN_CACHE, "sesiones": CACHE_SESIONES},
+                    SESSION_ENGINE=settings.MOTORES_SESION[nombre], SESSION_CACHE_ALIAS="sesiones",
+                )
+                with ajustes:
+                    # Cliente nuevo: SessionMiddleware lee SESSION_ENGINE al crearse
+                    cliente = bench.cliente_con_sesion(usuario)
+                    self.pedir(cliente, options["url"])  # Calentar (primera lectura de la sesión)
+
+                    tiempos, consultas, de_sesion = [], 0, 0
+                    inicio_total = time.perf_counter()
+                    for _ in range(total):
+                        with CaptureQueriesContext(connection) as capturadas:
+                            inicio = time.perf_counter()
+                            self.pedir(cliente, options["url"])
+                            tiempos.append(time.perf_counter() - inicio)
+                        consultas += len(capturadas)
+                        de_sesion += sum("django_session" in c["sql"] for c in capturadas.captured_queries)
+                    duracion = time.perf_counter() - inicio_total
+
+                resultados.append(bench.resumir(
+                    tiempos, duracion, motor=nombre,
+                    consultas=round(consultas / total, 2), consultas_sesion=round(de_sesion / total, 2),
+                ))
+
+        bench.imprimir_tabla(self.stdout, resultados, [
+            "motor", "peticiones", "req_s", "p50_ms", "p95_ms", "p99_ms", "consultas", "consultas_sesion",
+        ])
+        if not options["sin_guardar"]:
+            ruta = bench.guardar("sesiones", resultados, url=options["url"], peticiones=total, filas=options["filas"])
+            self.stdout.write(self.style.SUCCESS(f"Resultados en {ruta}"))
+
+    def pedir(self, cliente, url):
+        respuesta = cliente.get(url)
+        if respuesta.status_code != 200:
+            raise CommandError(f"{url} respondió {respuesta.status_code} (¿sesión no válida?)")
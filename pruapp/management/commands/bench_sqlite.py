@@ -0,0 +1,119 @@
+# =====================================================================
+# python manage.py bench_sqlite --filas 10k --peticiones 400 --concurrencia 8 --escrituras 0.2
+# =====================================================================
+# Compara lecturas y escrituras concurrentes con los dos perfiles de
+# SQLite de settings.py (SQLITE_PERFIL):
+#   - "basico":     configuración por defecto de Django
+#   - "produccion": WAL, synchronous=NORMAL, mmap, busy_timeout,
+#                   BEGIN IMMEDIATE y conexiones persistentes
+#
+# Cada perfil corre en un proceso aparte (los ajustes se leen al
+# arrancar) sobre una base temporal en archivo. La carga mezcla:
+#   - lecturas:   GET /inventario/?despues=<id>
+#   - escrituras: POST /inventario/editar/<id>/  (--escrituras = proporción)
+# y reporta req/s, percentiles de cada tipo y cuántas fallaron
+# (por ejemplo con "database is locked").
+# =====================================================================
+
+import json
+import os
+import subprocess
+import sys
+import threading
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test import override_settings
+
+from pruapp import bench, sqlite
+from pruapp.models import Practica, Insumo
+from pruapp.management.commands.sembrar_datos import leer_filas
+
+PERFILES = ("basico", "produccion")
+
+
+class Command(BaseCommand):
+    help = "Lecturas/escrituras concurrentes con SQLite por defecto contra el perfil de producción"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--filas", default="10k", help="Insumos en la base (ej: 10k, 100k)")
+        parser.add_argument("--peticiones", type=int, default=400)
+        parser.add_argument("--concurrencia", type=int, default=8)
+        parser.add_argument("--escrituras", type=float, default=0.2, help="Proporción de escrituras (0 a 1)")
+        parser.add_argument("--perfil", choices=("ambos",) + PERFILES, default="ambos")
+        parser.add_argument("--sin-guardar", action="store_true")
+
+    def handle(self, *args, **options):
+        if not 0 <= options["escrituras"] <= 1:
+            raise CommandError("--escrituras debe estar entre 0 y 1")
+        if options["perfil"] != "ambos":
+            # Proceso hijo: mide un perfil y devuelve JSON por la salida estándar
+            self.stdout.write(json.dumps(self.medir(options)))
+            return
+
+        resultados = []
+        for perfil in PERFILES:
+            comando = [
+                sys.executable, os.path.join(settings.BASE_DIR, "manage.py"), "bench_sqlite", "--perfil", perfil,
+                "--filas", options["filas"], "--peticiones", str(options["peticiones"]),
+                "--concurrencia", str(options["concurrencia"]), "--escrituras", str(options["escrituras"]),
+            ]
+            proceso = subprocess.run(comando, env=dict(os.environ, SQLITE_PERFIL=perfil), capture_output=True, text=True)
+            if proceso.returncode != 0:
+                raise CommandError(f"Falló el perfil {perfil}:\n{proceso.stderr}")
+            resultados.append(json.loads(proceso.stdout.strip().splitlines()[-1]))
+
+        bench.imprimir_tabla(self.stdout, resultados, [
+            "perfil", "req_s", "p99_ms", "lectura_p50_ms", "lectura_p99_ms",
+            "escritura_p50_ms", "escritura_p99_ms", "errores",
+        ])
+        if not options["sin_guardar"]:
+            ruta = bench.guardar("sqlite", resultados, filas=options["filas"], peticiones=options["peticiones"],
+                                 concurrencia=options["concurrencia"], escrituras=options["escrituras"])
+            self.stdout.write(self.style.SUCCESS(f"Resultados en {ruta}"))
+
+    def medir(self, options):
+        perfil = options["perfil"]
+        if settings.SQLITE_PERFIL != perfil:
+            raise CommandError("SQLITE_PERFIL no coincide con el perfil pedido")
+
+        with bench.base_temporal(), override_settings(CACHES=bench.SIN_CACHE, DEBUG=False):
+            bench.sembrar(leer_filas(options["filas"]), [Insumo])
+            usuario = Practica.objects.create(username="bench", password="!")
+            ids = list(Insumo.objects.values_list("id", flat=True))
+            pragmas = sqlite.estado(connection)
+
+            # Cada cuántas peticiones va una escritura (0 = ninguna)
+            cada = round(1 / options["escrituras"]) if options["escrituras"] else 0
+            local = threading.local()
+            errores = []
+
+            def es_escritura(i):
+                return cada and i % cada == 0
+
+            def pedir(i):
+                if not hasattr(local, "cliente"):
+                    local.cliente = bench.cliente_con_sesion(usuario)
+                insumo_id = ids[(i * 7919) % len(ids)]  # Repartido por toda la tabla
+                if es_escritura(i):
+                    respuesta = local.cliente.post(f"/inventario/editar/{insumo_id}/", {
+                        "nombre": f"Insumo {i}", "cantidad": str(i % 100), "unidad": "KG", "umbral": "10",
+                    })
+                    esperado = 302
+                else:
+                    respuesta = local.cliente.get(f"/inventario/?despues={insumo_id}")
+                    esperado = 200
+                if respuesta.status_code != esperado:
+                    errores.append(i)
+
+            tiempos, duracion = bench.concurrente(pedir, options["peticiones"], options["concurrencia"])
+
+        lecturas = bench.resumir([t for i, t in enumerate(tiempos) if not es_escritura(i)], duracion)
+        escrituras = bench.resumir([t for i, t in enumerate(tiempos) if es_escritura(i)], duracion)
+        return bench.resumir(
+            tiempos, duracion, perfil=perfil, pragmas=pragmas, errores=len(errores),
+            conn_max_age=settings.DATABASES["default"].get("CONN_MAX_AGE", 0),
+            lectura_p50_ms=lecturas["p50_ms"], lectura_p99_ms=lecturas["p99_ms"],
+            escritura_p50_ms=escrituras["p50_ms"], escritura_p99_ms=escrituras["p99_ms"],
+        )
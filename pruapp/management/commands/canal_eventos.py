@@ -0,0 +1,89 @@
+# =====================================================================
+# python manage.py canal_eventos [--puerto 6380]
+# =====================================================================
+# Servidor pub/sub mínimo que habla el protocolo de Redis (SUBSCRIBE,
+# UNSUBSCRIBE, PUBLISH, PING). Reparte los eventos en vivo entre varios
+# workers sin instalar Redis (ver pruapp/eventos.py):
+#
+#     python manage.py canal_eventos --puerto 6380
+#     EVENTOS_REDIS_URL=redis://127.0.0.1:6380/ uvicorn prueba2.asgi:application --workers 4
+#
+# No guarda nada: si un worker no está conectado pierde esos eventos
+# (sus clientes se ponen al día con /sync/). En producción se puede
+# usar un Redis o Valkey real con la misma URL.
+# =====================================================================
+
+import asyncio
+
+from django.core.management.base import BaseCommand
+
+from pruapp.eventos import codificar, leer_valor
+
+
+class CanalPubSub:
+    def __init__(self):
+        self.canales = {}  # canal -> set de escritores suscritos
+
+    async def atender(self, lector, escritor):
+        suscritos = set()
+        try:
+            while True:
+                comando = await leer_valor(lector)
+                if not isinstance(comando, list) or not comando:
+                    escritor.write(b"-ERR se esperaba un arreglo RESP\r\n")
+                    continue
+                nombre, argumentos = comando[0].upper(), comando[1:]
+                if nombre == b"SUBSCRIBE":
+                    for canal in argumentos:
+                        self.canales.setdefault(canal, set()).add(escritor)
+                        suscritos.add(canal)
+                        escritor.write(codificar("subscribe", canal, len(suscritos)))
+                elif nombre == b"UNSUBSCRIBE":
+                    for canal in argumentos or list(suscritos):
+                        self._quitar(canal, escritor)
+                        suscritos.discard(canal)
+                        escritor.write(codificar("unsubscribe", canal, len(suscritos)))
+                elif nombre == b"PUBLISH" and len(argumentos) == 2:
+                    canal, mensaje = argumentos
+                    destinos = list(self.canales.get(canal, ()))
+                    for destino in destinos:
+                        destino.write(codificar("message", canal, mensaje))
+                    escritor.write(f":{len(destinos)}\r\n".encode())
+                elif nombre == b"PING":
+                    escritor.write(b"+PONG\r\n")
+                elif nombre == b"QUIT":
+                    escritor.write(b"+OK\r\n")
+                    break
+                else:
+                    escritor.write(b"-ERR comando no soportado\r\n")
+                await escritor.drain()
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            for canal in suscritos:
+                self._quitar(canal, escritor)
+            escritor.close()
+
+    def _quitar(self, canal, escritor):
+        escritores = self.canales.get(canal)
+        if escritores is not None:
+            escritores.discard(escritor)
+            if not escritores:
+                del self.canales[canal]
+
+
+class Command(BaseCommand):
+    help = "Canal pub/sub compatible con Redis para repartir los eventos en vivo entre workers"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--host", default="127.0.0.1")
+        parser.add_argument("--puerto", type=int, default=6380)
+
+    def handle(self, *args, **options):
+        asyncio.run(self.servir(options["host"], options["puerto"]))
+
+    async def servir(self, host, puerto):
+        servidor = await asyncio.start_server(CanalPubSub().atender, host, puerto)
+        self.stdout.write(f"Canal de eventos en redis://{host}:{puerto}/ (Ctrl+C para salir)")
+        async with servidor:
+            await servidor.serve_forever()
@@ -0,0 +1,20 @@
+# =====================================================================
+# python manage.py cuadrar_inventario
+# =====================================================================
+# Compara la cantidad de cada insumo con el saldo de su historial de
+# movimientos (ver inventario.py) y agrega un AJUSTE donde no coinciden.
+# Normalmente cuadran solos con las señales; esto es para cuando se
+# cambiaron cantidades sin pasar por Django.
+# =====================================================================
+
+from django.core.management.base import BaseCommand
+
+from pruapp import inventario
+
+
+class Command(BaseCommand):
+    help = "Agrega ajustes al historial de inventario donde el saldo no coincide con la cantidad"
+
+    def handle(self, *args, **options):
+        ajustados = inventario.cuadrar()
+        self.stdout.write(self.style.SUCCESS(f"Insumos ajustados: {ajustados}"))
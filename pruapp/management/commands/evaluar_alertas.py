@@ -0,0 +1,22 @@
+# =====================================================================
+# python manage.py evaluar_alertas
+# =====================================================================
+# Revisa los insumos que cambiaron desde la última vez y actualiza las
+# alertas de stock bajo (ver alertas.py). Pensado para correr cada
+# minuto con cron o después de una importación masiva.
+# =====================================================================
+
+from django.core.management.base import BaseCommand
+
+from pruapp import alertas
+
+
+class Command(BaseCommand):
+    help = "Evalúa las alertas de stock bajo de los insumos que cambiaron"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--lote", type=int, default=alertas.TAMANO_LOTE)
+
+    def handle(self, *args, **options):
+        revisados = alertas.evaluar_pendientes(options["lote"])
+        self.stdout.write(self.style.SUCCESS(f"Insumos revisados: {revisados}"))
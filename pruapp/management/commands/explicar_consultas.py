@@ -0,0 +1,150 @@
+# =====================================================================
+# python manage.py explicar_consultas --filas 2k
+# =====================================================================
+# Pide una vez cada URL de pruapp (los mismos escenarios que
+# bench_endpoints), guarda las consultas SQL que hizo cada vista y
+# corre EXPLAIN QUERY PLAN (EXPLAIN en PostgreSQL) sobre cada una.
+# Además revisa las consultas del catálogo que usan los índices de la
+# migración 0012 (CONSULTAS_INDICES).
+#
+# Marca como problema:
+#   - SQLite: "SCAN <tabla>" sin índice (recorre la tabla completa).
+#     Si la consulta termina en LIMIT y no ordena aparte (sin "USE TEMP
+#     B-TREE") el recorrido sigue el orden pedido y se detiene pronto,
+#     así que no se marca (por ejemplo la primera página por id).
+#   - PostgreSQL: "Seq Scan on <tabla>".
+#
+# Usa una base temporal (nunca toca db.sqlite3) salvo --base-actual.
+# Con --estricto termina con error si encuentra algún recorrido
+# completo (útil en CI).
+# =====================================================================
+
+import re
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test import override_settings
+from django.utils import timezone
+
+from pruapp import bench
+from pruapp.consultas import TRANSACCIONES, normalizar
+from pruapp.models import Practica, Producto, Insumo, Empleado, FilaEliminada, InsumoMovimiento
+from pruapp.management.commands.bench_endpoints import ESCENARIOS
+from pruapp.management.commands.sembrar_datos import leer_filas
+
+# Consultas que deben usar los índices nuevos (nombre -> queryset)
+CONSULTAS_INDICES = {
+    "productos_en_stock": lambda: Producto.objects.filter(stock=True).order_by("nombre")[:25],
+    "empleados_activos_por_rol": lambda: Empleado.objects.filter(estado=True, rol="Chef").order_by("nombre")[:25],
+    "insumos_por_fecha": lambda: Insumo.objects.exclude(fecha=None).order_by("-fecha", "-id")[:25],
+    # /sync/ (ver sincronizacion.py)
+    "sync_cambios": lambda: Producto.objects.filter(actualizado__gte=timezone.now()).order_by("actualizado", "id"),
+    "sync_eliminados": lambda: FilaEliminada.objects.filter(modelo="producto", eliminada__gte=timezone.now()),
+    # Saldo en una fecha = el del último movimiento anterior (ver inventario.py)
+    "inventario_saldo": lambda: InsumoMovimiento.objects.filter(
+        insumo_id=1, unidad="KG", fecha__lte=timezone.now(),
+    ).order_by("-id").values("saldo")[:1],
+    "inventario_consumo": lambda: InsumoMovimiento.objects.filter(fecha__gte=timezone.now(), tipo="C"),
+}
+
+# Solo tiene plan lo que lee filas
+EXPLICABLES = ("SELECT", "UPDATE", "DELETE", "WITH")
+
+
+class _Captura:
+    # Función para connection.execute_wrapper: guarda (sql, params)
+    def __init__(self):
+        self.consultas = []
+
+    def __call__(self, execute, sql, params, many, context):
+        if not many and sql.lstrip().upper().startswith(EXPLICABLES):
+            self.consultas.append((sql, params))
+        return execute(sql, params, many, context)
+
+
+def plan(sql, params):
+    """Líneas del plan de la consulta (texto)."""
+    prefijo = connection.ops.explain_query_prefix()
+    with connection.cursor() as cursor:
+        cursor.execute(f"{prefijo} {sql}", params)
+        filas = cursor.fetchall()
+    # SQLite: (id, padre, no_usado, detalle); PostgreSQL: (texto,)
+    return [fila[-1] for fila in filas]
+
+
+def recorridos_completos(lineas, sql):
+    """Las líneas del plan que recorren una tabla completa."""
+    if connection.vendor == "postgresql":
+        return [linea.strip() for linea in lineas if "Seq Scan on" in linea]
+    ordena_aparte = any("USE TEMP B-TREE" in linea for linea in lineas)
+    con_limite = re.search(r"\bLIMIT\s+\S+\s*$", sql.strip(), re.IGNORECASE) is not None
+    if con_limite and not ordena_aparte:
+        return []
+    return [
+        linea for linea in lineas
+        if re.match(r"SCAN \S+$", linea) and linea != "SCAN CONSTANT ROW"
+    ]
+
+
+class Command(BaseCommand):
+    help = "EXPLAIN QUERY PLAN de las consultas de cada vista; marca los recorridos completos de tabla"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--filas", default="2k", help="Filas por tabla en la base temporal (ej: 2k, 10k)")
+        parser.add_argument("--base-actual", action="store_true",
+                            help="Usar la base configurada en vez de una temporal (OJO: crea/edita/elimina filas)")
+        parser.add_argument("--planes", action="store_true", help="Mostrar el plan de todas las consultas")
+        parser.add_argument("--estricto", action="store_true", help="Terminar con error si hay recorridos completos")
+
+    def handle(self, *args, **options):
+        if options["base_actual"]:
+            marcadas = self.revisar(options)
+        else:
+            with bench.base_temporal():
+                bench.sembrar(leer_filas(options["filas"]))
+                marcadas = self.revisar(options)
+
+        if marcadas:
+            self.stdout.write(self.style.WARNING(f"{marcadas} consultas recorren una tabla completa"))
+            if options["estricto"]:
+                raise CommandError("Hay consultas sin índice")
+        else:
+            self.stdout.write(self.style.SUCCESS("Ninguna consulta recorre una tabla completa"))
+
+    def revisar(self, options):
+        # Sin cache (si no, la segunda vista no consulta nada), sin DEBUG
+        # y sin descargar miniaturas en segundo plano
+        with override_settings(CACHES=bench.SIN_CACHE, DEBUG=False, MINIATURAS=False):
+            usuario, _ = Practica.objects.get_or_create(username="explicar", defaults={"password": "!"})
+            cliente = bench.cliente_con_sesion(usuario)
+
+            consultas = {}  # sql normalizado -> (origen, sql, params)
+            for escenario in ESCENARIOS:
+                ids = list(escenario.modelo.objects.order_by("-id").values_list("id", flat=True)[:1]) if escenario.modelo else [0]
+                captura = _Captura()
+                with connection.execute_wrapper(captura):
+                    ruta = escenario.ruta(0, ids)
+                    datos = escenario.datos(0, ids) if escenario.datos else None
+                    getattr(cliente, escenario.metodo)(ruta, datos)
+                for sql, params in captura.consultas:
+                    consultas.setdefault(normalizar(sql), (escenario.nombre, sql, params))
+
+            for nombre, consulta in CONSULTAS_INDICES.items():
+                sql, params = consulta().query.sql_with_params()
+                consultas.setdefault(normalizar(sql), (nombre, sql, params))
+
+            marcadas = 0
+            for origen, sql, params in consultas.values():
+                if sql.startswith(TRANSACCIONES):
+                    continue
+                lineas = plan(sql, params)
+                completos = recorridos_completos(lineas, sql)
+                marcadas += bool(completos)
+                if completos or options["planes"]:
+                    estilo = self.style.WARNING if completos else self.style.HTTP_INFO
+                    self.stdout.write(estilo(f"[{origen}] {sql}"))
+                    for linea in lineas:
+                        marca = "  <- tabla completa" if linea.strip() in completos else ""
+                        self.stdout.write(f"    {linea}{marca}")
+            self.stdout.write(f"{len(consultas)} consultas distintas revisadas")
+        return marcadas
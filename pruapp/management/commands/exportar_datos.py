@@ -0,0 +1,31 @@
+# =====================================================================
+# python manage.py exportar_datos productos --formato csv > productos.csv
+# python manage.py exportar_datos empleados --salida empleados.jsonl
+# =====================================================================
+# Exporta la tabla completa leyéndola por partes (ver intercambio.py).
+# =====================================================================
+
+from django.core.management.base import BaseCommand
+
+from pruapp import intercambio
+
+
+class Command(BaseCommand):
+    help = "Exporta Productos, Insumos o Empleados a CSV o JSONL"
+
+    def add_arguments(self, parser):
+        parser.add_argument("modelo", choices=sorted(intercambio.MODELOS))
+        parser.add_argument("--formato", choices=intercambio.FORMATOS, default="csv")
+        parser.add_argument("--salida", help="Archivo de salida (por defecto la salida estándar)")
+        parser.add_argument("--lote", type=int, default=intercambio.TAMANO_LOTE,
+                            help="Filas leídas de la base de datos por consulta")
+
+    def handle(self, *args, **options):
+        modelo = intercambio.MODELOS[options["modelo"]]
+        lineas = intercambio.exportar(modelo, options["formato"], options["lote"])
+        if options["salida"]:
+            with open(options["salida"], "w", encoding="utf-8", newline="") as archivo:
+                archivo.writelines(lineas)
+        else:
+            for linea in lineas:
+                self.stdout.write(linea, ending="")
@@ -0,0 +1,63 @@
+# =====================================================================
+# python manage.py forecast_insumos [--limite 20] [--sintetico 10000]
+# =====================================================================
+# Muestra los insumos que se van a agotar primero según su consumo de
+# los últimos días (ver pronostico.py) y deja el resultado en el cache
+# que usa el dashboard.
+#
+# Con --sintetico N no lee la base: arma una matriz de N insumos x
+# --dias días con consumos al azar y mide cuánto tarda el cálculo.
+# Requiere NumPy (pip install -r requirements-pronostico.txt).
+# =====================================================================
+
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from pruapp import bench, pronostico
+
+
+class Command(BaseCommand):
+    help = "Pronostica en cuántos días se agota cada insumo (media móvil y suavizado exponencial)"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--limite", type=int, default=20, help="Insumos a mostrar")
+        parser.add_argument("--sintetico", type=int, metavar="N", help="Medir con N insumos de datos al azar")
+        parser.add_argument("--dias", type=int, default=pronostico.DIAS, help="Días de historial (con --sintetico)")
+
+    def handle(self, *args, **options):
+        if not pronostico.disponible():
+            raise CommandError("NumPy no está instalado (pip install -r requirements-pronostico.txt)")
+        if options["sintetico"]:
+            self.sintetico(options["sintetico"], options["dias"])
+            return
+
+        inicio = time.perf_counter()
+        proximos = pronostico.proximos_a_agotarse(options["limite"])
+        duracion = time.perf_counter() - inicio
+        bench.imprimir_tabla(self.stdout, [
+            {
+                "insumo": fila["insumo"].nombre,
+                "cantidad": fila["insumo"].cantidad_texto,
+                "consumo_dia": round(fila["consumo_diario"], 3),
+                "dias": round(fila["dias"], 1),
+                "agotado_el": fila["fecha"] or "",
+            }
+            for fila in proximos
+        ], ["insumo", "cantidad", "consumo_dia", "dias", "agotado_el"])
+        self.stdout.write(self.style.SUCCESS(f"{len(proximos)} insumos con consumo ({duracion * 1000:.0f} ms)"))
+
+    def sintetico(self, insumos, dias):
+        np = pronostico.np
+        azar = np.random.default_rng(0)
+        # Consumo diario al azar, con días sin consumo
+        consumo = azar.gamma(2.0, 1.5, size=(insumos, dias)) * (azar.random((insumos, dias)) < 0.8)
+        cantidades = azar.uniform(0, 200, size=insumos)
+
+        inicio = time.perf_counter()
+        _, _, restantes = pronostico.pronosticar(consumo, cantidades)
+        duracion = time.perf_counter() - inicio
+        self.stdout.write(
+            f"{insumos} insumos x {dias} días: {duracion * 1000:.1f} ms "
+            f"(mediana {np.median(restantes):.1f} días restantes)"
+        )
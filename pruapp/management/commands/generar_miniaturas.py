@@ -0,0 +1,54 @@
+# =====================================================================
+# python manage.py generar_miniaturas [--todas] [--reintentar] [--hilos 4]
+# =====================================================================
+# Genera las miniaturas de las fotos que todavía no tienen (por ejemplo
+# filas que ya existían antes de miniaturas.py, o si Pillow no estaba
+# instalado). Cada URL distinta se descarga una sola vez.
+#   --todas       revisa también las filas que ya tienen miniatura
+#   --reintentar  vuelve a intentar las URLs que fallaron MAXIMO_INTENTOS veces
+# =====================================================================
+
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import close_old_connections
+
+from pruapp import miniaturas
+
+
+class Command(BaseCommand):
+    help = "Descarga y convierte a WebP las fotos de productos y empleados"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--todas", action="store_true")
+        parser.add_argument("--reintentar", action="store_true")
+        parser.add_argument("--hilos", type=int, default=4, help="Descargas simultáneas")
+
+    def handle(self, *args, **options):
+        if not miniaturas.disponible():
+            raise CommandError("Miniaturas desactivadas o Pillow no instalado (requirements-imagenes.txt)")
+
+        direcciones = set()
+        for modelo, (campo_url, campo_hash) in miniaturas.CAMPOS.items():
+            filas = modelo.objects.exclude(**{f"{campo_url}__isnull": True}).exclude(**{campo_url: ""})
+            if not options["todas"]:
+                filas = filas.filter(**{campo_hash: ""})
+            direcciones.update(filas.order_by().values_list(campo_url, flat=True).distinct())
+        self.stdout.write(f"{len(direcciones)} URLs distintas")
+
+        def procesar(direccion):
+            close_old_connections()
+            try:
+                return miniaturas.procesar_url(direccion, reintentar=options["reintentar"])
+            finally:
+                close_old_connections()
+
+        listas = fallidas = 0
+        with ThreadPoolExecutor(max_workers=max(1, options["hilos"])) as pool:
+            for registro in pool.map(procesar, sorted(direcciones)):
+                if registro.hash:
+                    listas += 1
+                else:
+                    fallidas += 1
+                    self.stdout.write(self.style.WARNING(f"  {registro.url}: {registro.error}"))
+        self.stdout.write(self.style.SUCCESS(f"Con miniatura: {listas}, sin miniatura: {fallidas}"))
@@ -0,0 +1,47 @@
+# =====================================================================
+# python manage.py importar_datos productos archivo.csv
+# python manage.py importar_datos insumos archivo.jsonl --lote 5000
+# =====================================================================
+# Carga masiva desde CSV o JSONL (ver intercambio.py).
+# Si la fila trae "id" y ya existe, se actualiza; si no, se crea.
+# =====================================================================
+
+import sys
+
+from django.core.management.base import BaseCommand, CommandError
+
+from pruapp import intercambio
+
+
+class Command(BaseCommand):
+    help = "Importa Productos, Insumos o Empleados desde un archivo CSV o JSONL"
+
+    def add_arguments(self, parser):
+        parser.add_argument("modelo", choices=sorted(intercambio.MODELOS))
+        parser.add_argument("archivo", help="Ruta del archivo, o - para leer de la entrada estándar")
+        parser.add_argument("--formato", choices=intercambio.FORMATOS,
+                            help="Por defecto se deduce de la extensión del archivo")
+        parser.add_argument("--lote", type=int, default=intercambio.TAMANO_LOTE,
+                            help="Filas por transacción (bulk_create/bulk_update)")
+
+    def handle(self, *args, **options):
+        modelo = intercambio.MODELOS[options["modelo"]]
+        ruta = options["archivo"]
+        formato = options["formato"] or ruta.rsplit(".", 1)[-1].lower()
+        if formato not in intercambio.FORMATOS:
+            raise CommandError("Indica el formato con --formato csv|jsonl")
+        if options["lote"] < 1:
+            raise CommandError("--lote debe ser mayor que 0")
+
+        if ruta == "-":
+            resultado = intercambio.importar(modelo, sys.stdin, formato, options["lote"])
+        else:
+            with open(ruta, encoding="utf-8-sig", newline="") as archivo:
+                resultado = intercambio.importar(modelo, archivo, formato, options["lote"])
+
+        for linea, mensaje in resultado.errores:
+            self.stderr.write(f"Línea {linea}: {mensaje}")
+        self.stdout.write(self.style.SUCCESS(
+            f"Creados: {resultado.creados}  Actualizados: {resultado.actualizados}  "
+            f"Rechazados: {resultado.rechazados}"
+        ))
@@ -0,0 +1,24 @@
+# =====================================================================
+# python manage.py purgar_eliminadas [--lote 1000]
+# =====================================================================
+# Borra las anotaciones de filas eliminadas (FilaEliminada) más viejas
+# que sincronizacion.RETENCION. Un cliente con un token así de viejo
+# recibe "recargar": true en /sync/, así que ya no se necesitan.
+#
+# Con cron, una vez al día:   30 4 * * *  python manage.py purgar_eliminadas
+# =====================================================================
+
+from django.core.management.base import BaseCommand
+
+from pruapp.sincronizacion import RETENCION, purgar_eliminadas
+
+
+class Command(BaseCommand):
+    help = "Borra las anotaciones de filas eliminadas que ya no usa /sync/ (por lotes)"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--lote", type=int, default=1000, help="Filas por DELETE")
+
+    def handle(self, *args, **options):
+        borradas = purgar_eliminadas(max(1, options["lote"]))
+        self.stdout.write(f"Anotaciones de más de {RETENCION.days} días borradas: {borradas}")
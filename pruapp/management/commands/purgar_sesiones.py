@@ -0,0 +1,61 @@
+# =====================================================================
+# python manage.py purgar_sesiones [--lote 1000] [--cada 3600]
+# =====================================================================
+# Borra de django_session las sesiones vencidas. Django no las borra
+# solo: sin esto la tabla crece con cada login para siempre.
+#
+# A diferencia de "manage.py clearsessions" borra por lotes (cada lote
+# es una transacción corta; en SQLite un DELETE de millones de filas
+# bloquearía las escrituras de la página todo ese tiempo) y no falla
+# con SESIONES=firmada (no hay tabla, no hay nada que borrar).
+#
+# Con cron, una vez al día:   0 4 * * *  python manage.py purgar_sesiones
+# O como proceso aparte:      python manage.py purgar_sesiones --cada 3600
+# Con SESIONES=cache las copias del cache vencen solas.
+# =====================================================================
+
+import time
+from importlib import import_module
+
+from django.conf import settings
+from django.contrib.sessions.backends.db import SessionStore as SesionEnBase
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+from django.utils import timezone
+
+
+def purgar(lote=1000):
+    """Borra las sesiones vencidas en lotes de 'lote' y devuelve cuántas borró."""
+    motor = import_module(settings.SESSION_ENGINE)
+    if not issubclass(motor.SessionStore, SesionEnBase):
+        return 0
+    modelo = motor.SessionStore.get_model_class()
+    borradas = 0
+    while True:
+        llaves = list(
+            modelo.objects.filter(expire_date__lt=timezone.now()).values_list("pk", flat=True)[:lote]
+        )
+        if not llaves:
+            return borradas
+        borradas += modelo.objects.filter(pk__in=llaves).delete()[0]
+
+
+class Command(BaseCommand):
+    help = "Borra las sesiones vencidas de la base de datos (por lotes)"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--lote", type=int, default=1000, help="Sesiones por DELETE")
+        parser.add_argument("--cada", type=int, default=0,
+                            help="Repetir cada N segundos (0 = una sola vez)")
+
+    def handle(self, *args, **options):
+        if not issubclass(import_module(settings.SESSION_ENGINE).SessionStore, SesionEnBase):
+            self.stdout.write("Las sesiones van en la cookie firmada: no hay tabla que purgar")
+            return
+        while True:
+            borradas = purgar(max(1, options["lote"]))
+            self.stdout.write(f"{timezone.now():%Y-%m-%d %H:%M:%S} sesiones vencidas borradas: {borradas}")
+            if not options["cada"]:
+                return
+            close_old_connections()
+            time.sleep(options["cada"])
@@ -0,0 +1,28 @@
+# =====================================================================
+# python manage.py reconstruir_kpis
+# =====================================================================
+# Vuelve a calcular desde cero los indicadores del dashboard (ver
+# kpis.py). Normalmente se mantienen solos con las señales; esto es
+# para cuando se cambiaron datos sin pasar por Django.
+# =====================================================================
+
+from django.core.management.base import BaseCommand
+
+from pruapp import kpis
+from pruapp import cache
+
+
+class Command(BaseCommand):
+    help = "Recalcula la tabla de indicadores del dashboard"
+
+    def handle(self, *args, **options):
+        kpis.reconstruir()
+        # El dashboard está en cache: se invalida para que muestre lo nuevo
+        cache.subir_version("kpi")
+        datos = kpis.indicadores()
+        resumen = datos["resumen"]
+        self.stdout.write(self.style.SUCCESS(
+            f"Productos en stock: {resumen.productos_en_stock}, agotados: {resumen.productos_agotados} | "
+            f"Empleados activos: {resumen.empleados_activos}, inactivos: {resumen.empleados_inactivos} | "
+            f"Insumos: {resumen.insumos_total}, actualizados hoy: {datos['insumos_hoy']}"
+        ))
@@ -0,0 +1,21 @@
+# =====================================================================
+# python manage.py reindexar_busqueda
+# =====================================================================
+# Reconstruye el índice de búsqueda desde cero.
+# Útil después de cargas masivas con bulk_create (que no envían señales).
+# =====================================================================
+
+from django.core.management.base import BaseCommand
+
+from pruapp import busqueda
+
+
+class Command(BaseCommand):
+    help = "Reconstruye el índice de búsqueda de Producto, Insumo y Empleado"
+
+    def handle(self, *args, **options):
+        motor = busqueda.motor()
+        for modelo in busqueda.CAMPOS_INDEXADOS:
+            motor.reconstruir(modelo)
+            self.stdout.write(f"{modelo.__name__}: índice reconstruido ({motor.nombre})")
+        self.stdout.write(self.style.SUCCESS("Listo"))
@@ -0,0 +1,52 @@
+# =====================================================================
+# python manage.py sembrar_datos --filas 100k
+# =====================================================================
+# Llena Producto, Insumo y Empleado con datos inventados para probar el
+# rendimiento con tablas grandes. Acepta números o abreviaturas:
+#     --filas 10000   --filas 10k   --filas 100k   --filas 1m
+# OJO: escribe en la base de datos configurada (settings.DATABASES).
+# bench_endpoints usa su propia base temporal y no necesita esto.
+# =====================================================================
+
+from django.core.management.base import BaseCommand, CommandError
+
+from pruapp import bench
+from pruapp.signals import MODELOS_CATALOGO
+
+SUFIJOS = {"k": 1_000, "m": 1_000_000}
+
+
+def leer_filas(texto):
+    # "10k" -> 10000, "1m" -> 1000000, "500" -> 500
+    texto = texto.strip().lower().replace("_", "")
+    multiplicador = SUFIJOS.get(texto[-1:], 1)
+    numero = texto[:-1] if texto[-1:] in SUFIJOS else texto
+    try:
+        filas = int(numero) * multiplicador
+    except ValueError:
+        raise CommandError(f"Cantidad de filas no válida: {texto}")
+    if filas <= 0:
+        raise CommandError("La cantidad de filas debe ser mayor que cero")
+    return filas
+
+
+class Command(BaseCommand):
+    help = "Crea filas de prueba en productos, insumos y empleados"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--filas", default="10k", help="Filas por tabla (ej: 10k, 100k, 1m)")
+        parser.add_argument("--tablas", nargs="+", choices=[m._meta.model_name for m in MODELOS_CATALOGO],
+                            help="Solo estas tablas (por defecto todas)")
+        parser.add_argument("--lote", type=int, default=5000)
+        parser.add_argument("--semilla", type=int, default=0, help="Misma semilla = mismos datos")
+
+    def handle(self, *args, **options):
+        filas = leer_filas(options["filas"])
+        modelos = [m for m in MODELOS_CATALOGO if not options["tablas"] or m._meta.model_name in options["tablas"]]
+
+        def progreso(modelo, creadas):
+            if creadas % (options["lote"] * 20) == 0 or creadas == filas:
+                self.stdout.write(f"  {modelo._meta.model_name}: {creadas}/{filas}")
+
+        bench.sembrar(filas, modelos, options["lote"], options["semilla"], progreso)
+        self.stdout.write(self.style.SUCCESS(f"Listo: {filas} filas en {len(modelos)} tablas"))
@@ -0,0 +1,80 @@
+# =====================================================================
+# python manage.py tamano_paginas [--filas 100]
+# =====================================================================
+# Cuántos bytes manda cada página: el HTML (tal cual y con gzip), los
+# atributos style="..." que quedan en el HTML y los archivos estáticos
+# que pide (CSS, imágenes) la primera vez. Los estáticos tienen cache
+# permanente (nombre con hash), así que en las visitas siguientes solo
+# cuenta el HTML.
+#
+# Usa una base temporal con --filas filas por tabla y guarda el
+# resultado en benchmarks/paginas-<fecha>.json (comparar entre commits).
+# =====================================================================
+
+import gzip
+import os
+import re
+
+from django.conf import settings
+from django.contrib.staticfiles import finders
+from django.core.management.base import BaseCommand
+from django.test import override_settings
+
+from pruapp import bench
+from pruapp.models import Practica
+
+PAGINAS = (
+    ("login", "/login/"),
+    ("dashboard", "/dashboard/"),
+    ("menu", "/menu/"),
+    ("inventario", "/inventario/"),
+    ("empleados", "/empleados/"),
+    ("nuevo_producto", "/menu/nuevo/"),
+    ("nuevo_insumo", "/inventario/nuevo/"),
+    ("nuevo_empleado", "/empleados/nuevo/"),
+)
+
+# href="/static/..." o src="/static/..." (sin el #fragmento de los íconos)
+PATRON_ESTATICO = re.compile(r'(?:href|src)="(/static/[^"#]+)')
+
+
+def tamano_estatico(url, static_url):
+    # Bytes del archivo fuente (sin comprimir) que corresponde a la URL
+    ruta = finders.find(url[len(static_url):]) if url.startswith(static_url) else None
+    return os.path.getsize(ruta) if ruta else 0
+
+
+class Command(BaseCommand):
+    help = "Bytes de HTML, estilos en línea y estáticos de cada página"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--filas", type=int, default=100, help="Filas por tabla en la base temporal")
+        parser.add_argument("--sin-guardar", action="store_true")
+
+    def handle(self, *args, **options):
+        resultados = []
+        with bench.base_temporal(), override_settings(CACHES=bench.SIN_CACHE, DEBUG=False, MINIATURAS=False):
+            bench.sembrar(options["filas"])
+            usuario = Practica.objects.create(username="tamano", password="!")
+            cliente = bench.cliente_con_sesion(usuario)
+            static_url = "/" + settings.STATIC_URL.lstrip("/")
+
+            for nombre, url in PAGINAS:
+                html = cliente.get(url).content
+                texto = html.decode()
+                estaticos = sorted(set(PATRON_ESTATICO.findall(texto)))
+                resultados.append({
+                    "pagina": nombre,
+                    "html_bytes": len(html),
+                    "html_gzip_bytes": len(gzip.compress(html, 6)),
+                    "estilos_en_linea": texto.count(' style="'),
+                    "estaticos": len(estaticos),
+                    "estaticos_bytes": sum(tamano_estatico(u, static_url) for u in estaticos),
+                })
+
+        bench.imprimir_tabla(self.stdout, resultados, [
+            "pagina", "html_bytes", "html_gzip_bytes", "estilos_en_linea", "estaticos", "estaticos_bytes",
+        ])
+        if not options["sin_guardar"]:
+            ruta = bench.guardar("paginas", resultados, filas=options["filas"])
+            self.stdout.write(self.style.SUCCESS(f"Resultados en {ruta}"))
@@ -0,0 +1,263 @@
+# =====================================================================
+# METRICAS.PY - Mediciones de cada petición en formato Prometheus
+# =====================================================================
+# Por cada petición se anota, agrupado por el nombre de la URL
+# (name="inventario_list", etc.):
+#   - cuánto tardó la petición completa (histograma)
+#   - cuántas consultas SQL hizo y cuánto tiempo pasó en la base de datos
+#   - cuánto tardó en armar la plantilla
+#   - cuántos bytes tenía la respuesta
+#
+# Todo se guarda en memoria del proceso y se publica en /metrics con el
+# formato de texto de Prometheus. Con varios workers cada uno publica
+# sus propios números (Prometheus los suma).
+#
+# Cómo se mide cada parte:
+#   - SQL: una función en connection.execute_wrappers (la misma lista
+#     que usa connection.execute_wrapper()); se agrega a cada conexión
+#     nueva con la señal connection_created (ver apps.py).
+#   - Plantillas: el motor PlantillasMedidas (settings.TEMPLATES) mide
+#     el render de la plantilla principal. Incluye las consultas que
+#     hagan los tags dentro de la plantilla (también cuentan como SQL).
+#   - La petición: MedicionMiddleware, el primero de settings.MIDDLEWARE,
+#     así el tiempo incluye la sesión y los demás middlewares.
+#
+# El costo por petición son unos pocos perf_counter() y un lock, para
+# poder dejarlo activo en producción. Viene apagado: se activa con
+# METRICAS=1.
+#
+# Los números incluyen las rutas, cuántas peticiones hubo y cuánto
+# tardaron: /metrics solo responde a quien mande el token de
+# METRICAS_TOKEN (en Prometheus: authorization.credentials del
+# scrape_config). Sin token configurado no responde a nadie.
+# =====================================================================
+
+import hmac
+import threading
+import time
+from bisect import bisect_left
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.template.backends.django import DjangoTemplates
+
+# Límites (en segundos / cantidad / bytes) de las cubetas de cada histograma
+CUBETAS_SEGUNDOS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+CUBETAS_CONSULTAS = (0, 1, 2, 5, 10, 20, 50, 100)
+CUBETAS_BYTES = (1024, 4096, 16384, 65536, 262144, 1048576)
+
+# Medición de la petición actual (funciona con hilos y con async)
+_medicion = ContextVar("medicion", default=None)
+
+
+def activas():
+    return getattr(settings, "METRICAS", False)
+
+
+def autorizado(request):
+    # "Authorization: Bearer <token>"; compare_digest para no filtrar el
+    # token por el tiempo de la comparación
+    token = getattr(settings, "METRICAS_TOKEN", "")
+    tipo, _, enviado = request.headers.get("Authorization", "").partition(" ")
+    return bool(token) and tipo.lower() == "bearer" and hmac.compare_digest(enviado.encode(), token.encode())
+
+
+# =====================================================================
+# REGISTRO EN MEMORIA
+# =====================================================================
+class Histograma:
+    def __init__(self, cubetas):
+        self.cubetas = cubetas
+        self.conteos = [0] * (len(cubetas) + 1)  # La última es +Inf
+        self.suma = 0.0
+        self.total = 0
+
+    def observar(self, valor):
+        self.conteos[bisect_left(self.cubetas, valor)] += 1
+        self.suma += valor
+        self.total += 1
+
+
+class Registro:
+    """Histogramas y contadores por vista, protegidos con un lock."""
+
+    HISTOGRAMAS = {
+        "pruapp_peticion_segundos": ("Duración de la petición completa", CUBETAS_SEGUNDOS),
+        "pruapp_sql_consultas": ("Consultas SQL por petición", CUBETAS_CONSULTAS),
+        "pruapp_respuesta_bytes": ("Tamaño del cuerpo de la respuesta", CUBETAS_BYTES),
+    }
+    CONTADORES = {
+        "pruapp_sql_segundos_total": "Tiempo total dentro de la base de datos",
+        "pruapp_plantilla_segundos_total": "Tiempo total armando plantillas",
+    }
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reiniciar()
+
+    def reiniciar(self):
+        with self._lock:
+            self.histogramas = {nombre: {} for nombre in self.HISTOGRAMAS}
+            self.contadores = {nombre: {} for nombre in self.CONTADORES}
+
+    def anotar(self, vista, duracion, medicion, tamano):
+        with self._lock:
+            self._observar("pruapp_peticion_segundos", vista, duracion)
+            self._observar("pruapp_sql_consultas", vista, medicion.consultas)
+            if tamano is not None:
+                self._observar("pruapp_respuesta_bytes", vista, tamano)
+            self._sumar("pruapp_sql_segundos_total", vista, medicion.sql)
+            self._sumar("pruapp_plantilla_segundos_total", vista, medicion.plantillas)
+
+    def _observar(self, nombre, vista, valor):
+        por_vista = self.histogramas[nombre]
+        if vista not in por_vista:
+            por_vista[vista] = Histograma(self.HISTOGRAMAS[nombre][1])
+        por_vista[vista].observar(valor)
+
+    def _sumar(self, nombre, vista, valor):
+        por_vista = self.contadores[nombre]
+        por_vista[vista] = por_vista.get(vista, 0.0) + valor
+
+    def promedio(self, nombre, vista):
+        """Promedio de un histograma para una vista (None si no hay datos)."""
+        with self._lock:
+            histograma = self.histogramas[nombre].get(vista)
+            return histograma.suma / histograma.total if histograma and histograma.total else None
+
+    def exportar(self):
+        """Texto en el formato de exposición de Prometheus."""
+        lineas = []
+        with self._lock:
+            for nombre, (ayuda, cubetas) in self.HISTOGRAMAS.items():
+                lineas.append(f"# HELP {nombre} {ayuda}")
+                lineas.append(f"# TYPE {nombre} histogram")
+                for vista, histograma in sorted(self.histogramas[nombre].items()):
+                    acumulado = 0
+                    for limite, conteo in zip(cubetas + ("+Inf",), histograma.conteos):
+                        acumulado += conteo
+                        lineas.append(f'{nombre}_bucket{{vista="{vista}",le="{limite}"}} {acumulado}')
+                    lineas.append(f'{nombre}_sum{{vista="{vista}"}} {histograma.suma}')
+                    lineas.append(f'{nombre}_count{{vista="{vista}"}} {histograma.total}')
+            for nombre, ayuda in self.CONTADORES.items():
+                lineas.append(f"# HELP {nombre} {ayuda}")
+                lineas.append(f"# TYPE {nombre} counter")
+                for vista, valor in sorted(self.contadores[nombre].items()):
+                    lineas.append(f'{nombre}{{vista="{vista}"}} {valor}')
+        return "\n".join(lineas) + "\n"
+
+
+registro = Registro()
+
+
+class Medicion:
+    # Lo que se va sumando durante una petición
+    __slots__ = ("consultas", "sql", "plantillas")
+
+    def __init__(self):
+        self.consultas = 0
+        self.sql = 0.0
+        self.plantillas = 0.0
+
+
+# =====================================================================
+# SQL
+# =====================================================================
+def medir_sql(execute, sql, params, many, context):
+    medicion = _medicion.get()
+    if medicion is None:
+        return execute(sql, params, many, context)
+    inicio = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        medicion.sql += time.perf_counter() - inicio
+        medicion.consultas += 1
+
+
+def instalar_en_conexion(sender, connection, **kwargs):
+    # Receptor de connection_created: cada conexión nueva queda medida
+    if medir_sql not in connection.execute_wrappers:
+        connection.execute_wrappers.append(medir_sql)
+
+
+# =====================================================================
+# PLANTILLAS
+# =====================================================================
+class PlantillaMedida:
+    def __init__(self, plantilla):
+        self.plantilla = plantilla
+
+    def __getattr__(self, nombre):
+        return getattr(self.plantilla, nombre)
+
+    def render(self, context=None, request=None):
+        medicion = _medicion.get()
+        if medicion is None:
+            return self.plantilla.render(context, request)
+        inicio = time.perf_counter()
+        try:
+            return self.plantilla.render(context, request)
+        finally:
+            medicion.plantillas += time.perf_counter() - inicio
+
+
+class PlantillasMedidas(DjangoTemplates):
+    """El motor de plantillas de Django, midiendo cuánto tarda cada render."""
+
+    def from_string(self, template_code):
+        return PlantillaMedida(super().from_string(template_code))
+
+    def get_template(self, template_name):
+        return PlantillaMedida(super().get_template(template_name))
+
+
+# =====================================================================
+# MIDDLEWARE
+# =====================================================================
+def nombre_vista(request):
+    coincidencia = getattr(request, "resolver_match", None)
+    return (coincidencia.url_name if coincidencia else None) or "sin_ruta"
+
+
+def tamano_respuesta(respuesta):
+    # Las respuestas por partes (streaming) no se pueden medir sin leerlas
+    return None if respuesta.streaming else len(respuesta.content)
+
+
+class MedicionMiddleware:
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        if not activas():
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        medicion = Medicion()
+        token = _medicion.set(medicion)
+        inicio = time.perf_counter()
+        try:
+            respuesta = self.get_response(request)
+        finally:
+            _medicion.reset(token)
+        registro.anotar(nombre_vista(request), time.perf_counter() - inicio, medicion, tamano_respuesta(respuesta))
+        return respuesta
+
+    async def __acall__(self, request):
+        medicion = Medicion()
+        token = _medicion.set(medicion)
+        inicio = time.perf_counter()
+        try:
+            respuesta = await self.get_response(request)
+        finally:
+            _medicion.reset(token)
+        registro.anotar(nombre_vista(request), time.perf_counter() - inicio, medicion, tamano_respuesta(respuesta))
+        return respuesta
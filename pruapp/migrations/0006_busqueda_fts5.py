@@ -0,0 +1,52 @@
+# Crea las tablas de búsqueda FTS5 (ver pruapp/busqueda.py)
+# Si SQLite no tiene FTS5, o la base de datos no es SQLite, no hace nada
+# y la aplicación usa el índice en memoria.
+
+from django.db import migrations
+
+TABLAS = {
+    # tabla de búsqueda: (tabla origen, columnas)
+    "pruapp_busqueda_producto": ("pruapp_producto", ("nombre",)),
+    "pruapp_busqueda_insumo": ("pruapp_insumo", ("nombre",)),
+    "pruapp_busqueda_empleado": ("pruapp_empleado", ("nombre", "rol")),
+}
+
+
+def soporta_fts5(connection):
+    if connection.vendor != "sqlite":
+        return False
+    with connection.cursor() as cursor:
+        cursor.execute("PRAGMA compile_options")
+        return any("FTS5" in fila[0] for fila in cursor.fetchall())
+
+
+def crear_tablas(apps, schema_editor):
+    if not soporta_fts5(schema_editor.connection):
+        return
+    for tabla, (origen, columnas) in TABLAS.items():
+        schema_editor.execute(
+            f"CREATE VIRTUAL TABLE {tabla} USING fts5({', '.join(columnas)}, "
+            f"tokenize='unicode61 remove_diacritics 2', prefix='2 3')"
+        )
+        schema_editor.execute(
+            f"INSERT INTO {tabla} (rowid, {', '.join(columnas)}) "
+            f"SELECT id, {', '.join(columnas)} FROM {origen}"
+        )
+
+
+def borrar_tablas(apps, schema_editor):
+    if schema_editor.connection.vendor != "sqlite":
+        return
+    for tabla in TABLAS:
+        schema_editor.execute(f"DROP TABLE IF EXISTS {tabla}")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('pruapp', '0005_empleado'),
+    ]
+
+    operations = [
+        migrations.RunPython(crear_tablas, borrar_tablas),
+    ]
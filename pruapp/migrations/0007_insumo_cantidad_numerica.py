@@ -0,0 +1,76 @@
+# Convierte Insumo.cantidad de texto ("15 KG") a número + unidad.
+# Los textos que no se pueden leer quedan en 0 y el texto original se
+# guarda en ultima_info para no perder el dato.
+
+from decimal import Decimal
+
+from django.db import migrations, models
+
+from pruapp.cantidades import parsear_cantidad, formatear_cantidad
+
+
+def texto_a_numero(apps, schema_editor):
+    Insumo = apps.get_model('pruapp', 'Insumo')
+    cambiados = []
+    for insumo in Insumo.objects.all().iterator():
+        try:
+            valor, unidad, resto = parsear_cantidad(insumo.cantidad)
+        except ValueError:
+            valor, unidad, resto = Decimal(0), 'KG', ''
+            nota = f"Cantidad original: {insumo.cantidad}"
+            insumo.ultima_info = f"{insumo.ultima_info} | {nota}" if insumo.ultima_info else nota
+        if resto:
+            insumo.ultima_info = f"{insumo.ultima_info} | {resto}" if insumo.ultima_info else resto
+        insumo.cantidad_num = valor
+        insumo.unidad = unidad
+        cambiados.append(insumo)
+    Insumo.objects.bulk_update(cambiados, ['cantidad_num', 'unidad', 'ultima_info'], batch_size=500)
+
+
+def numero_a_texto(apps, schema_editor):
+    Insumo = apps.get_model('pruapp', 'Insumo')
+    cambiados = []
+    for insumo in Insumo.objects.all().iterator():
+        insumo.cantidad = formatear_cantidad(insumo.cantidad_num, insumo.unidad)
+        cambiados.append(insumo)
+    Insumo.objects.bulk_update(cambiados, ['cantidad'], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('pruapp', '0006_busqueda_fts5'),
+    ]
+
+    operations = [
+        # Default vacío para poder deshacer la migración (se vuelve a crear la columna)
+        migrations.AlterField(
+            model_name='insumo',
+            name='cantidad',
+            field=models.CharField(default='', max_length=50),
+        ),
+        migrations.AddField(
+            model_name='insumo',
+            name='cantidad_num',
+            field=models.DecimalField(decimal_places=3, default=0, max_digits=12),
+        ),
+        migrations.AddField(
+            model_name='insumo',
+            name='unidad',
+            field=models.CharField(choices=[('KG', 'Kilogramos'), ('G', 'Gramos'), ('L', 'Litros'), ('ML', 'Mililitros'), ('UN', 'Unidades')], default='KG', max_length=2),
+        ),
+        migrations.RunPython(texto_a_numero, numero_a_texto),
+        migrations.RemoveField(
+            model_name='insumo',
+            name='cantidad',
+        ),
+        migrations.RenameField(
+            model_name='insumo',
+            old_name='cantidad_num',
+            new_name='cantidad',
+        ),
+        migrations.AddIndex(
+            model_name='insumo',
+            index=models.Index(fields=['unidad', 'cantidad'], name='insumo_unidad_cantidad_idx'),
+        ),
+    ]
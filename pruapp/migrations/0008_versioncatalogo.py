@@ -0,0 +1,21 @@
+# Generated by Django 5.2.8 on 2026-10-18 08:40
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('pruapp', '0007_insumo_cantidad_numerica'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='VersionCatalogo',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('nombre', models.CharField(max_length=50, unique=True)),
+                ('version', models.BigIntegerField(default=1)),
+            ],
+        ),
+    ]
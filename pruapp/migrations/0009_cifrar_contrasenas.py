@@ -0,0 +1,28 @@
+# Cifra las contraseñas de Practica que estaban guardadas en texto plano.
+# Usa el hasher por defecto de Django (PBKDF2). No se puede deshacer:
+# de un hash no se puede volver al texto original.
+
+from django.contrib.auth.hashers import identify_hasher, make_password
+from django.db import migrations
+
+
+def cifrar_texto_plano(apps, schema_editor):
+    Practica = apps.get_model('pruapp', 'Practica')
+    for usuario in Practica.objects.all().iterator():
+        try:
+            identify_hasher(usuario.password)
+        except ValueError:
+            # No tiene formato de hash: es texto plano
+            usuario.password = make_password(usuario.password)
+            usuario.save(update_fields=['password'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('pruapp', '0008_versioncatalogo'),
+    ]
+
+    operations = [
+        migrations.RunPython(cifrar_texto_plano, migrations.RunPython.noop),
+    ]
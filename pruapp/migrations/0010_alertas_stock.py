@@ -0,0 +1,38 @@
+# Generated by Django 5.2.8 on 2026-10-18 08:45
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('pruapp', '0009_cifrar_contrasenas'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='InsumoPendiente',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('insumo_id', models.BigIntegerField(unique=True)),
+                ('marcado', models.DateTimeField()),
+            ],
+        ),
+        migrations.AddField(
+            model_name='insumo',
+            name='umbral',
+            field=models.DecimalField(blank=True, decimal_places=3, max_digits=12, null=True),
+        ),
+        migrations.CreateModel(
+            name='AlertaStock',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('cantidad', models.DecimalField(decimal_places=3, max_digits=12)),
+                ('umbral', models.DecimalField(decimal_places=3, max_digits=12)),
+                ('creada', models.DateTimeField(auto_now_add=True)),
+                ('actualizada', models.DateTimeField(auto_now=True)),
+                ('insumo', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='alerta', to='pruapp.insumo')),
+            ],
+        ),
+    ]
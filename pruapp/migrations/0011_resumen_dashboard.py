@@ -0,0 +1,62 @@
+# Generated by Django 5.2.8 on 2026-10-18 08:46
+
+from django.db import migrations, models
+from django.db.models import Count, Q
+
+
+def calcular(apps, schema_editor):
+    # Llena el resumen con los datos que ya existen (lo mismo que kpis.reconstruir)
+    Producto = apps.get_model("pruapp", "Producto")
+    Empleado = apps.get_model("pruapp", "Empleado")
+    Insumo = apps.get_model("pruapp", "Insumo")
+    ResumenDashboard = apps.get_model("pruapp", "ResumenDashboard")
+    InsumosPorFecha = apps.get_model("pruapp", "InsumosPorFecha")
+
+    productos = Producto.objects.aggregate(
+        en_stock=Count("id", filter=Q(stock=True)), agotados=Count("id", filter=Q(stock=False)),
+    )
+    empleados = Empleado.objects.aggregate(
+        activos=Count("id", filter=Q(estado=True)), inactivos=Count("id", filter=Q(estado=False)),
+    )
+    ResumenDashboard.objects.create(
+        id=1,
+        productos_en_stock=productos["en_stock"],
+        productos_agotados=productos["agotados"],
+        empleados_activos=empleados["activos"],
+        empleados_inactivos=empleados["inactivos"],
+        insumos_total=Insumo.objects.count(),
+    )
+    por_fecha = Insumo.objects.exclude(fecha=None).order_by().values("fecha").annotate(total=Count("id"))
+    InsumosPorFecha.objects.bulk_create(
+        [InsumosPorFecha(fecha=fila["fecha"], total=fila["total"]) for fila in por_fecha]
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('pruapp', '0010_alertas_stock'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='InsumosPorFecha',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('fecha', models.DateField(unique=True)),
+                ('total', models.BigIntegerField(default=0)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='ResumenDashboard',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('productos_en_stock', models.BigIntegerField(default=0)),
+                ('productos_agotados', models.BigIntegerField(default=0)),
+                ('empleados_activos', models.BigIntegerField(default=0)),
+                ('empleados_inactivos', models.BigIntegerField(default=0)),
+                ('insumos_total', models.BigIntegerField(default=0)),
+            ],
+        ),
+        migrations.RunPython(calcular, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 5.2.8 on 2026-10-18 09:01
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('pruapp', '0011_resumen_dashboard'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='alertastock',
+            index=models.Index(fields=['-actualizada'], name='alerta_actualizada_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='empleado',
+            index=models.Index(condition=models.Q(('estado', True)), fields=['rol', 'nombre'], name='empleado_activo_rol_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='insumo',
+            index=models.Index(fields=['fecha', 'id'], name='insumo_fecha_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='producto',
+            index=models.Index(condition=models.Q(('stock', True)), fields=['nombre'], name='producto_en_stock_nombre_idx'),
+        ),
+    ]
@@ -0,0 +1,34 @@
+# Generated by Django 5.2.8 on 2026-10-18 09:03
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('pruapp', '0012_indices_catalogo'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ImagenRemota',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('url', models.URLField(max_length=500, unique=True)),
+                ('hash', models.CharField(blank=True, max_length=16)),
+                ('error', models.CharField(blank=True, max_length=200)),
+                ('intentos', models.PositiveSmallIntegerField(default=0)),
+                ('actualizada', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+        migrations.AddField(
+            model_name='empleado',
+            name='foto_hash',
+            field=models.CharField(blank=True, default='', max_length=16),
+        ),
+        migrations.AddField(
+            model_name='producto',
+            name='imagen_hash',
+            field=models.CharField(blank=True, default='', max_length=16),
+        ),
+    ]
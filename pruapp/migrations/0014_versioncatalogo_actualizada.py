@@ -0,0 +1,19 @@
+# Generated by Django 5.2.8 on 2026-10-18 09:20
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('pruapp', '0013_miniaturas'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='versioncatalogo',
+            name='actualizada',
+            field=models.DateTimeField(default=django.utils.timezone.now),
+        ),
+    ]
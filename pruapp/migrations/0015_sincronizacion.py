@@ -0,0 +1,41 @@
+# Generated by Django 5.2.8 on 2026-10-18 09:22
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('pruapp', '0014_versioncatalogo_actualizada'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='empleado',
+            name='actualizado',
+            field=models.DateTimeField(auto_now=True, db_index=True),
+        ),
+        migrations.AddField(
+            model_name='insumo',
+            name='actualizado',
+            field=models.DateTimeField(auto_now=True, db_index=True),
+        ),
+        migrations.AddField(
+            model_name='producto',
+            name='actualizado',
+            field=models.DateTimeField(auto_now=True, db_index=True),
+        ),
+        migrations.CreateModel(
+            name='FilaEliminada',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('modelo', models.CharField(max_length=50)),
+                ('objeto_id', models.BigIntegerField()),
+                ('eliminada', models.DateTimeField(default=django.utils.timezone.now)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['modelo', 'eliminada'], name='fila_eliminada_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,60 @@
+# Generated by Django 5.2.8 on 2026-10-18 09:31
+#
+# Historial de movimientos de inventario (ver pruapp/inventario.py).
+# Los insumos que ya existen arrancan con un AJUSTE por su cantidad
+# actual, así el saldo del historial coincide desde el principio.
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+def apertura(apps, schema_editor):
+    Insumo = apps.get_model('pruapp', 'Insumo')
+    InsumoMovimiento = apps.get_model('pruapp', 'InsumoMovimiento')
+    ahora = django.utils.timezone.now()
+    lote = []
+    for insumo_id, cantidad, unidad in Insumo.objects.exclude(cantidad=0).values_list('id', 'cantidad', 'unidad').iterator():
+        lote.append(InsumoMovimiento(insumo_id=insumo_id, tipo='A', cantidad=cantidad, unidad=unidad, fecha=ahora))
+        if len(lote) >= 1000:
+            InsumoMovimiento.objects.bulk_create(lote)
+            lote = []
+    InsumoMovimiento.objects.bulk_create(lote)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('pruapp', '0015_sincronizacion'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='InsumoMovimiento',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('insumo_id', models.BigIntegerField()),
+                ('tipo', models.CharField(choices=[('E', 'Entrada'), ('C', 'Consumo'), ('A', 'Ajuste')], max_length=1)),
+                ('cantidad', models.DecimalField(decimal_places=3, max_digits=12)),
+                ('unidad', models.CharField(choices=[('KG', 'Kilogramos'), ('G', 'Gramos'), ('L', 'Litros'), ('ML', 'Mililitros'), ('UN', 'Unidades')], max_length=2)),
+                ('fecha', models.DateTimeField(default=django.utils.timezone.now)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['insumo_id', 'id'], name='movimiento_insumo_idx'), models.Index(fields=['fecha', 'tipo'], name='movimiento_fecha_idx')],
+            },
+        ),
+        migrations.CreateModel(
+            name='InsumoSaldo',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('insumo_id', models.BigIntegerField()),
+                ('movimiento_id', models.BigIntegerField()),
+                ('saldo', models.DecimalField(decimal_places=3, max_digits=14)),
+                ('fecha', models.DateTimeField()),
+            ],
+            options={
+                'indexes': [models.Index(fields=['insumo_id', 'fecha'], name='saldo_insumo_fecha_idx')],
+                'constraints': [models.UniqueConstraint(fields=('insumo_id', 'movimiento_id'), name='saldo_insumo_movimiento_uniq')],
+            },
+        ),
+        migrations.RunPython(apertura, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,96 @@
+# Saldos de inventario por unidad (ver pruapp/inventario.py).
+#
+# InsumoSaldo deja de ser una foto cada N movimientos y pasa a ser el
+# saldo actual de cada insumo en cada unidad; cada movimiento guarda el
+# saldo que dejó (InsumoMovimiento.saldo). Se recalculan con el
+# historial que ya existe y, como antes un cambio de unidad se anotaba
+# como una sola diferencia, se agrega un AJUSTE donde el saldo no
+# coincide con la cantidad actual del insumo.
+
+import django.utils.timezone
+from django.db import migrations, models
+
+LOTE = 1000
+
+
+def recalcular(apps, schema_editor):
+    Insumo = apps.get_model('pruapp', 'Insumo')
+    InsumoMovimiento = apps.get_model('pruapp', 'InsumoMovimiento')
+    InsumoSaldo = apps.get_model('pruapp', 'InsumoSaldo')
+
+    saldos = {}  # (insumo_id, unidad) -> [saldo, último movimiento]
+    cambiados = []
+    movimientos = InsumoMovimiento.objects.order_by('id').only('id', 'insumo_id', 'unidad', 'cantidad', 'saldo')
+    for movimiento in movimientos.iterator(chunk_size=LOTE):
+        actual = saldos.setdefault((movimiento.insumo_id, movimiento.unidad), [0, 0])
+        actual[0] += movimiento.cantidad
+        actual[1] = movimiento.id
+        movimiento.saldo = actual[0]
+        cambiados.append(movimiento)
+        if len(cambiados) >= LOTE:
+            InsumoMovimiento.objects.bulk_update(cambiados, ['saldo'])
+            cambiados = []
+    InsumoMovimiento.objects.bulk_update(cambiados, ['saldo'])
+
+    # Cuadrar con la cantidad actual: todo en la unidad del insumo
+    ahora = django.utils.timezone.now()
+    ajustes = []
+    for insumo_id, cantidad, unidad in Insumo.objects.values_list('id', 'cantidad', 'unidad').iterator():
+        esperado = {unidad: cantidad}
+        unidades = {u for (i, u) in saldos if i == insumo_id} | {unidad}
+        for u in sorted(unidades):
+            actual = saldos.get((insumo_id, u), [0, 0])
+            diferencia = esperado.get(u, 0) - actual[0]
+            if diferencia:
+                actual[0] += diferencia
+                saldos[(insumo_id, u)] = actual
+                ajustes.append(InsumoMovimiento(
+                    insumo_id=insumo_id, tipo='A', cantidad=diferencia, unidad=u, saldo=actual[0], fecha=ahora,
+                ))
+    for movimiento in InsumoMovimiento.objects.bulk_create(ajustes, batch_size=LOTE):
+        saldos[(movimiento.insumo_id, movimiento.unidad)][1] = movimiento.id
+
+    InsumoSaldo.objects.bulk_create([
+        InsumoSaldo(insumo_id=insumo_id, unidad=unidad, saldo=saldo, movimiento_id=ultimo)
+        for (insumo_id, unidad), (saldo, ultimo) in saldos.items()
+    ], batch_size=LOTE)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('pruapp', '0016_inventario_movimientos'),
+    ]
+
+    operations = [
+        migrations.DeleteModel(
+            name='InsumoSaldo',
+        ),
+        migrations.CreateModel(
+            name='InsumoSaldo',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('insumo_id', models.BigIntegerField()),
+                ('unidad', models.CharField(choices=[('KG', 'Kilogramos'), ('G', 'Gramos'), ('L', 'Litros'), ('ML', 'Mililitros'), ('UN', 'Unidades')], max_length=2)),
+                ('saldo', models.DecimalField(decimal_places=3, default=0, max_digits=14)),
+                ('movimiento_id', models.BigIntegerField(default=0)),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('insumo_id', 'unidad'), name='saldo_insumo_unidad_uniq')],
+            },
+        ),
+        migrations.RemoveIndex(
+            model_name='insumomovimiento',
+            name='movimiento_insumo_idx',
+        ),
+        migrations.AddField(
+            model_name='insumomovimiento',
+            name='saldo',
+            field=models.DecimalField(decimal_places=3, default=0, max_digits=14),
+        ),
+        migrations.AddIndex(
+            model_name='insumomovimiento',
+            index=models.Index(fields=['insumo_id', 'unidad', 'id'], name='movimiento_insumo_unidad_idx'),
+        ),
+        migrations.RunPython(recalcular, migrations.RunPython.noop),
+    ]
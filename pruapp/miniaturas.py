@@ -0,0 +1,365 @@
+# =====================================================================
+# MINIATURAS.PY - Fotos de productos y empleados en tamaño pequeño
+# =====================================================================
+# Antes las listas ponían imagen_url / foto_url directo en el <img> y
+# las achicaban con CSS a 60px / 40px: el navegador descargaba la foto
+# completa (de cualquier servidor) por cada fila.
+#
+# Ahora:
+#   1. Al guardar un Producto o Empleado con URL, se programa (al
+#      confirmar la transacción) la descarga en un pool LIMITADO de
+#      hilos en segundo plano. También se puede subir un archivo desde
+#      el formulario.
+#   2. La imagen se recorta en cuadrado y se guarda en WebP en los
+#      tamaños de TAMANOS (1x y 2x para pantallas de alta densidad).
+#      El nombre del archivo es el hash del contenido:
+#          <MINIATURAS_DIR>/3f9a0c1b2d4e5f60-60.webp
+#      La misma foto usada en 200 filas se descarga y convierte UNA vez.
+#   3. Se guarda el hash en la fila (imagen_hash / foto_hash) y las
+#      plantillas usan la miniatura; mientras tanto, la URL original.
+#   4. MiniaturasMiddleware (WhiteNoise) sirve los archivos con cache
+#      "para siempre": si la foto cambia, cambia el nombre.
+#
+# ImagenRemota recuerda qué URL ya se procesó (y los errores, para no
+# insistir con un servidor caído en cada guardado).
+#
+# La URL la escribe el usuario y la descarga la hace el servidor: sin
+# cuidado serviría para pedir cosas de la red interna (127.0.0.1, la
+# base de datos, 169.254.169.254 en la nube...). Por eso descargar()
+# resuelve el nombre, rechaza las direcciones que no son públicas y se
+# conecta a la IP ya revisada (no vuelve a resolver); cada redirección
+# pasa por la misma revisión. No se usan proxies del entorno.
+#
+# Requiere Pillow (requirements-imagenes.txt). Sin Pillow no se genera
+# nada y las listas siguen mostrando la URL original.
+# Para procesar las filas que ya existen: python manage.py generar_miniaturas
+# =====================================================================
+
+import hashlib
+import http.client
+import io
+import ipaddress
+import logging
+import os
+import re
+import socket
+import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlparse
+from urllib.request import (
+    HTTPHandler, HTTPRedirectHandler, HTTPSHandler, ProxyHandler, Request, build_opener,
+)
+
+from django.conf import settings
+from django.db import close_old_connections, transaction
+from whitenoise.middleware import WhiteNoiseMiddleware
+
+try:
+    from PIL import Image, ImageOps
+except ImportError:  # Pillow es opcional
+    Image = ImageOps = None
+
+from . import cache
+from .models import Producto, Empleado, ImagenRemota
+
+logger = logging.getLogger("pruapp.miniaturas")
+
+# Lado en píxeles de cada miniatura (cuadradas): tamaño en pantalla y el doble
+TAMANOS = {
+    Producto: (60, 120),
+    Empleado: (40, 80),
+}
+TODOS_LOS_TAMANOS = sorted({t for tamanos in TAMANOS.values() for t in tamanos})
+
+# Campo con la URL original y campo con el hash de la miniatura
+CAMPOS = {
+    Producto: ("imagen_url", "imagen_hash"),
+    Empleado: ("foto_url", "foto_hash"),
+}
+
+LARGO_HASH = 16
+PATRON_ARCHIVO = re.compile(rf"[0-9a-f]{{{LARGO_HASH}}}-\d+\.webp")
+
+# Límites para no descargar/abrir cualquier cosa
+MAXIMO_BYTES = 5 * 1024 * 1024
+TIEMPO_DESCARGA = 10  # segundos
+MAXIMO_INTENTOS = 3
+CALIDAD_WEBP = 80
+
+_pool = None
+_lock = threading.Lock()
+_en_curso = set()  # URLs que ya están en el pool (no se programan dos veces)
+
+
+def disponible():
+    return Image is not None and getattr(settings, "MINIATURAS", True)
+
+
+def nombre_archivo(hash_imagen, tamano):
+    return f"{hash_imagen}-{tamano}.webp"
+
+
+def url(hash_imagen, tamano):
+    return f"{settings.MINIATURAS_URL}{nombre_archivo(hash_imagen, tamano)}"
+
+
+# =====================================================================
+# GENERACIÓN
+# =====================================================================
+def _guardar(imagen, ruta):
+    # Se escribe en un temporal y se renombra: nunca se sirve un archivo a medias
+    descriptor, temporal = tempfile.mkstemp(dir=os.path.dirname(ruta), suffix=".tmp")
+    try:
+        with os.fdopen(descriptor, "wb") as archivo:
+            imagen.save(archivo, "WEBP", quality=CALIDAD_WEBP, method=6)
+        os.replace(temporal, ruta)
+    except BaseException:
+        os.unlink(temporal)
+        raise
+
+
+def generar(contenido, tamanos=TODOS_LOS_TAMANOS):
+    """
+    Crea las miniaturas WebP de la imagen (bytes) y devuelve su hash.
+    Si ya existen (misma imagen) no se vuelven a crear.
+    Lanza ValueError si el contenido no es una imagen válida.
+    """
+    if Image is None:
+        raise RuntimeError("Pillow no está instalado (requirements-imagenes.txt)")
+    hash_imagen = hashlib.sha256(contenido).hexdigest()[:LARGO_HASH]
+    carpeta = settings.MINIATURAS_DIR
+    faltan = [t for t in tamanos if not os.path.exists(os.path.join(carpeta, nombre_archivo(hash_imagen, t)))]
+    if not faltan:
+        return hash_imagen
+
+    try:
+        imagen = Image.open(io.BytesIO(contenido))
+        # JPEG: decodificar directo a un tamaño menor es mucho más rápido
+        imagen.draft("RGB", (max(faltan) * 2, max(faltan) * 2))
+        imagen = ImageOps.exif_transpose(imagen)
+        imagen = imagen.convert("RGBA" if imagen.mode in ("RGBA", "LA", "P") else "RGB")
+    except (OSError, Image.DecompressionBombError) as error:
+        raise ValueError(f"No es una imagen válida: {error}") from error
+
+    os.makedirs(carpeta, exist_ok=True)
+    for tamano in faltan:
+        # Recorte centrado al cuadrado (como object-fit: cover)
+        miniatura = ImageOps.fit(imagen, (tamano, tamano), Image.Resampling.LANCZOS)
+        _guardar(miniatura, os.path.join(carpeta, nombre_archivo(hash_imagen, tamano)))
+    return hash_imagen
+
+
+# =====================================================================
+# DESCARGA (solo de direcciones públicas)
+# =====================================================================
+ESQUEMAS = ("http", "https")
+
+
+def ip_publica(host, puerto):
+    """
+    Resuelve 'host' y devuelve una de sus IPs. Lanza ValueError si
+    alguna no es pública (privada, loopback, link-local, reservada,
+    multicast...): un nombre que también apunta adentro no se usa.
+    """
+    try:
+        resueltas = socket.getaddrinfo(host, puerto, type=socket.SOCK_STREAM)
+    except (OSError, UnicodeError) as error:
+        raise ValueError(f"No se pudo resolver {host}: {error}") from error
+    ips = []
+    for *_, direccion in resueltas:
+        ip = ipaddress.ip_address(direccion[0].split("%")[0])
+        if ip.version == 6 and ip.ipv4_mapped:  # ::ffff:127.0.0.1
+            ip = ip.ipv4_mapped
+        if not ip.is_global or ip.is_multicast:
+            raise ValueError(f"{host} apunta a una dirección no permitida ({ip})")
+        ips.append(str(ip))
+    if not ips:
+        raise ValueError(f"No se pudo resolver {host}")
+    return ips[0]
+
+
+class _ConexionHTTP(http.client.HTTPConnection):
+    def connect(self):
+        self.sock = socket.create_connection((ip_publica(self.host, self.port), self.port), self.timeout)
+
+
+class _ConexionHTTPS(http.client.HTTPSConnection):
+    def connect(self):
+        sock = socket.create_connection((ip_publica(self.host, self.port), self.port), self.timeout)
+        # El certificado se valida contra el nombre, no contra la IP
+        self.sock = self._context.wrap_socket(sock, server_hostname=self.host)
+
+
+class _ManejadorHTTP(HTTPHandler):
+    def http_open(self, req):
+        return self.do_open(_ConexionHTTP, req)
+
+
+class _ManejadorHTTPS(HTTPSHandler):
+    def https_open(self, req):
+        return self.do_open(_ConexionHTTPS, req, context=self._context)
+
+
+class _Redirecciones(HTTPRedirectHandler):
+    def redirect_request(self, req, fp, code, msg, headers, newurl):
+        # urllib también seguiría a ftp://
+        if urlparse(newurl).scheme not in ESQUEMAS:
+            raise ValueError("Redirección a una URL que no es http/https")
+        return super().redirect_request(req, fp, code, msg, headers, newurl)
+
+
+_abridor = build_opener(ProxyHandler({}), _ManejadorHTTP, _ManejadorHTTPS, _Redirecciones)
+
+
+def descargar(direccion):
+    """
+    Descarga la imagen (máximo MAXIMO_BYTES) desde una dirección pública.
+    Lanza ValueError si no se puede.
+    """
+    if urlparse(direccion).scheme not in ESQUEMAS:
+        raise ValueError("Solo se descargan URLs http/https")
+    peticion = Request(direccion, headers={"User-Agent": "pruapp-miniaturas"})
+    try:
+        with _abridor.open(peticion, timeout=TIEMPO_DESCARGA) as respuesta:
+            contenido = respuesta.read(MAXIMO_BYTES + 1)
+    except OSError as error:
+        raise ValueError(f"No se pudo descargar: {error}") from error
+    if len(contenido) > MAXIMO_BYTES:
+        raise ValueError("La imagen pesa más del máximo permitido")
+    return contenido
+
+
+# =====================================================================
+# ASIGNAR A LAS FILAS
+# =====================================================================
+def _asignar(filtro_por_modelo, hash_imagen):
+    # .update() no envía señales: se invalida el cache a mano
+    for modelo, filtro in filtro_por_modelo.items():
+        campo_hash = CAMPOS[modelo][1]
+        if modelo.objects.filter(**filtro).exclude(**{campo_hash: hash_imagen}).update(**{campo_hash: hash_imagen}):
+            cache.subir_version(modelo)
+
+
+def procesar_url(direccion, reintentar=False):
+    """Descarga y convierte una URL (una sola vez) y la asigna a todas las filas que la usan."""
+    registro, _ = ImagenRemota.objects.get_or_create(url=direccion)
+    if not registro.hash and (reintentar or registro.intentos < MAXIMO_INTENTOS):
+        try:
+            registro.hash = generar(descargar(direccion))
+            registro.error = ""
+        except ValueError as error:
+            registro.error = str(error)[:200]
+            logger.warning("Miniatura de %s: %s", direccion, registro.error)
+        registro.intentos += 1
+        registro.save()
+
+    # Sin miniatura: las filas vuelven a mostrar la URL original
+    _asignar({modelo: {campo_url: direccion} for modelo, (campo_url, _) in CAMPOS.items()}, registro.hash)
+    return registro
+
+
+def procesar_subida(modelo, pk, contenido):
+    """Miniatura de un archivo subido desde el formulario."""
+    try:
+        hash_imagen = generar(contenido)
+    except ValueError as error:
+        logger.warning("Miniatura subida para %s %s: %s", modelo._meta.model_name, pk, error)
+        return None
+    _asignar({modelo: {"pk": pk}}, hash_imagen)
+    return hash_imagen
+
+
+# =====================================================================
+# SEGUNDO PLANO
+# =====================================================================
+def pool():
+    global _pool
+    if _pool is None:
+        with _lock:
+            if _pool is None:
+                trabajadores = getattr(settings, "MINIATURAS_TRABAJADORES", 2)
+                _pool = ThreadPoolExecutor(max_workers=trabajadores, thread_name_prefix="miniaturas")
+    return _pool
+
+
+def _tarea(funcion, *args):
+    # Cada hilo del pool maneja su propia conexión, como una petición
+    close_old_connections()
+    try:
+        return funcion(*args)
+    except Exception:
+        logger.exception("Error generando miniaturas")
+    finally:
+        close_old_connections()
+
+
+def _procesar_url_programada(direccion):
+    try:
+        _tarea(procesar_url, direccion)
+    finally:
+        with _lock:
+            _en_curso.discard(direccion)
+
+
+def programar(direcciones):
+    """Procesa las URLs en segundo plano (las que ya están en curso se omiten)."""
+    if not disponible():
+        return
+    with _lock:
+        nuevas = {d for d in direcciones if d} - _en_curso
+        _en_curso.update(nuevas)
+    for direccion in nuevas:
+        pool().submit(_procesar_url_programada, direccion)
+
+
+def programar_subida(modelo, pk, contenido):
+    """Miniatura de un archivo subido, en segundo plano (al confirmar la transacción)."""
+    if disponible():
+        transaction.on_commit(lambda: pool().submit(_tarea, procesar_subida, modelo, pk, contenido))
+
+
+def leer_subida(archivo):
+    """Bytes del archivo subido, o None si no hay o es muy grande."""
+    if archivo is None or archivo.size > MAXIMO_BYTES or not disponible():
+        return None
+    return archivo.read()
+
+
+# =====================================================================
+# SERVIR LOS ARCHIVOS
+# =====================================================================
+class MiniaturasMiddleware(WhiteNoiseMiddleware):
+    """
+    WhiteNoise (archivos estáticos) + las miniaturas. WhiteNoise solo
+    conoce los archivos que existían al arrancar; las miniaturas se
+    crean después, así que se buscan en disco la primera vez que se piden.
+    Todas son inmutables (el nombre es el hash del contenido).
+    """
+
+    def __init__(self, get_response=None, settings=settings):
+        # Antes de super(): WhiteNoise calcula las cabeceras al arrancar
+        self.prefijo_miniaturas = settings.MINIATURAS_URL
+        self.carpeta_miniaturas = settings.MINIATURAS_DIR
+        super().__init__(get_response, settings=settings)
+
+    def __call__(self, request):
+        ruta = request.path_info
+        if ruta.startswith(self.prefijo_miniaturas):
+            archivo = self.files.get(ruta) or self.buscar_miniatura(ruta)
+            if archivo is not None:
+                return self.serve(archivo, request)
+        return super().__call__(request)
+
+    def buscar_miniatura(self, ruta):
+        nombre = ruta[len(self.prefijo_miniaturas):]
+        if not PATRON_ARCHIVO.fullmatch(nombre):
+            return None
+        camino = os.path.join(self.carpeta_miniaturas, nombre)
+        if not os.path.isfile(camino):
+            return None
+        self.files[ruta] = self.get_static_file(camino, ruta)
+        return self.files[ruta]
+
+    def immutable_file_test(self, path, url):
+        return url.startswith(self.prefijo_miniaturas) or super().immutable_file_test(path, url)
@@ -5,7 +5,10 @@
 # Cada campo del modelo es una columna de la tabla
 # =====================================================================
 
-from django.db import models
+from django.db import models, router, transaction
+from django.utils import timezone
+
+from .cantidades import formatear_cantidad
 
 # La clase Practica representa una tabla en la base de datos
 # Cada usuario que se registra es una fila en esta tabla
@@ -29,14 +32,77 @@ class Practica(models.Model):
     def __str__(self):
         return self.username
 
+# =====================================================================
+# GUARDAR EN UNA TRANSACCIÓN
+# =====================================================================
+# Django manda pre_save y post_save fuera de la transacción del UPDATE.
+# Los indicadores del dashboard leen la fila en pre_save (bloqueada con
+# SELECT ... FOR UPDATE) y aplican la diferencia en post_save: todo eso
+# tiene que ir junto para que dos ediciones a la vez de la misma fila no
+# partan de lo mismo (ver kpis.py). Sin savepoint: si ya hay una
+# transacción abierta se usa esa.
+class GuardaEnTransaccion:
+    def save(self, *args, **kwargs):
+        using = kwargs.get("using") or router.db_for_write(type(self), instance=self)
+        with transaction.atomic(using=using, savepoint=False):
+            super().save(*args, **kwargs)
+
+
+# =====================================================================
+# VALORES LEÍDOS DE LA BASE
+# =====================================================================
+# Guarda cómo estaban algunos campos al leer la fila, para saber al
+# guardarla si cambiaron sin hacer otra consulta (lo usan los eventos en
+# vivo y el historial de inventario, ver eventos.py e inventario.py).
+# Los campos se eligen con "campos_recordados".
+class RecuerdaValores:
+    campos_recordados = ()
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instancia = super().from_db(db, field_names, values)
+        instancia.valores_leidos = {
+            campo: getattr(instancia, campo) for campo in cls.campos_recordados if campo in field_names
+        }
+        return instancia
+
+    def valores_cambiados(self):
+        """{campo: valor leído} de los campos recordados que ya no tienen ese valor."""
+        leidos = getattr(self, "valores_leidos", None) or {}
+        return {campo: valor for campo, valor in leidos.items() if getattr(self, campo) != valor}
+
+    def save(self, *args, **kwargs):
+        super().save(*args, **kwargs)
+        # Después de las señales post_save: lo guardado pasa a ser lo leído
+        guardados = kwargs.get("update_fields")
+        diferidos = self.get_deferred_fields()
+        self.valores_leidos = {**(getattr(self, "valores_leidos", None) or {}), **{
+            campo: getattr(self, campo) for campo in self.campos_recordados
+            if campo not in diferidos and (guardados is None or campo in guardados)
+        }}
+
+
 # =====================================================================
 # MODELO PRODUCTO (MENU)
 # =====================================================================
-class Producto(models.Model):
+class Producto(RecuerdaValores, GuardaEnTransaccion, models.Model):
+    campos_recordados = ("stock",)
+
     nombre = models.CharField(max_length=100)
     imagen_url = models.URLField(max_length=500, blank=True, null=True)
+    # Hash de la miniatura ya generada (vacío = todavía no hay; ver miniaturas.py)
+    imagen_hash = models.CharField(max_length=16, blank=True, default="")
     precio = models.IntegerField()  # Usamos Entero para precios como $20.000
     stock = models.BooleanField(default=True)  # True = En stock, False = Agotado
+    # Último cambio de la fila: /sync/ devuelve solo lo que cambió (ver sincronizacion.py)
+    actualizado = models.DateTimeField(auto_now=True, db_index=True)
+
+    class Meta:
+        indexes = [
+            # Índice parcial: solo las filas en stock, ya ordenadas por nombre
+            # (la carta que se muestra al cliente). Los agotados no ocupan espacio.
+            models.Index(fields=["nombre"], condition=models.Q(stock=True), name="producto_en_stock_nombre_idx"),
+        ]
 
     def __str__(self):
         return self.nombre
@@ -44,25 +110,226 @@ class Producto(models.Model):
 # =====================================================================
 # MODELO INSUMO (INVENTARIO)
 # =====================================================================
-class Insumo(models.Model):
+class Insumo(RecuerdaValores, GuardaEnTransaccion, models.Model):
+    campos_recordados = ("cantidad", "unidad")
+
+    # Unidades de medida permitidas (se guarda el código, ej: "KG")
+    class Unidad(models.TextChoices):
+        KG = "KG", "Kilogramos"
+        G = "G", "Gramos"
+        L = "L", "Litros"
+        ML = "ML", "Mililitros"
+        UN = "UN", "Unidades"
+
     nombre = models.CharField(max_length=100) # Ingredientes
-    cantidad = models.CharField(max_length=50) # "15 KG", "5 Unidades"
+    # Cantidad numérica + unidad (antes era texto "15 KG")
+    # Así la base de datos puede filtrar y ordenar: cantidad__lt=5, unidad="KG"
+    cantidad = models.DecimalField(max_digits=12, decimal_places=3, default=0)
+    unidad = models.CharField(max_length=2, choices=Unidad.choices, default=Unidad.KG)
     ultima_info = models.CharField(max_length=100, blank=True, null=True) # "20 KG Hoy"
     fecha = models.DateField(blank=True, null=True) # "27/08/25" (Unidad col in image)
+    # Si la cantidad baja de este número (en la misma unidad) se crea una alerta
+    umbral = models.DecimalField(max_digits=12, decimal_places=3, blank=True, null=True)
+    actualizado = models.DateTimeField(auto_now=True, db_index=True)  # Ver sincronizacion.py
+
+    class Meta:
+        indexes = [
+            # Consultas de nivel de stock ("todo lo que tenga menos de 5 KG")
+            models.Index(fields=["unidad", "cantidad"], name="insumo_unidad_cantidad_idx"),
+            # Insumos por fecha de actualización (el id desempata con el cursor)
+            models.Index(fields=["fecha", "id"], name="insumo_fecha_idx"),
+        ]
 
     def __str__(self):
         return self.nombre
 
+    # Texto para mostrar en las plantillas: "15 KG"
+    @property
+    def cantidad_texto(self):
+        return formatear_cantidad(self.cantidad, self.unidad)
+
+    @property
+    def umbral_texto(self):
+        return formatear_cantidad(self.umbral, self.unidad)
+
+    # True si la cantidad está por debajo del umbral
+    @property
+    def stock_bajo(self):
+        return self.umbral is not None and self.cantidad < self.umbral
+
+# =====================================================================
+# ALERTAS DE STOCK BAJO
+# =====================================================================
+# InsumoPendiente: lista de insumos que cambiaron desde la última
+# evaluación (se llena con señales al guardar/eliminar un Insumo).
+# Así la evaluación solo revisa esas filas y no toda la tabla.
+class InsumoPendiente(models.Model):
+    # No es ForeignKey para poder registrar también los insumos eliminados
+    insumo_id = models.BigIntegerField(unique=True)
+    marcado = models.DateTimeField()  # Última vez que cambió
+
+# AlertaStock: alertas vigentes (insumos con cantidad < umbral).
+# El dashboard lee esta tabla ya calculada.
+class AlertaStock(models.Model):
+    insumo = models.OneToOneField(Insumo, on_delete=models.CASCADE, related_name="alerta")
+    cantidad = models.DecimalField(max_digits=12, decimal_places=3)
+    umbral = models.DecimalField(max_digits=12, decimal_places=3)
+    creada = models.DateTimeField(auto_now_add=True)
+    actualizada = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [
+            # El dashboard muestra las más recientes primero
+            models.Index(fields=["-actualizada"], name="alerta_actualizada_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.insumo_id}: {self.cantidad} < {self.umbral}"
+
 # =====================================================================
 # MODELO EMPLEADO (RRHH)
 # =====================================================================
-class Empleado(models.Model):
+class Empleado(GuardaEnTransaccion, models.Model):
     nombre = models.CharField(max_length=100)
     foto_url = models.URLField(max_length=500, blank=True, null=True)
+    foto_hash = models.CharField(max_length=16, blank=True, default="")  # Ver miniaturas.py
     rol = models.CharField(max_length=50) # Cajero, Mesero, Chef
     edad = models.IntegerField()
     telefono = models.CharField(max_length=20)
     estado = models.BooleanField(default=True) # True = Activo
+    actualizado = models.DateTimeField(auto_now=True, db_index=True)  # Ver sincronizacion.py
+
+    class Meta:
+        indexes = [
+            # Índice parcial: empleados activos agrupados por rol y nombre
+            models.Index(fields=["rol", "nombre"], condition=models.Q(estado=True), name="empleado_activo_rol_idx"),
+        ]
 
     def __str__(self):
         return self.nombre
+
+
+# =====================================================================
+# MODELO VERSION CATALOGO (CACHE)
+# =====================================================================
+# Un contador por tabla (producto, insumo, empleado) que sube cada vez
+# que se guarda o elimina una fila. Las llaves del cache incluyen este
+# número, así que al cambiar un dato las páginas viejas ya no se usan.
+# Se guarda en la base de datos para que todos los procesos (workers)
+# vean el mismo número.
+class VersionCatalogo(models.Model):
+    nombre = models.CharField(max_length=50, unique=True)  # "producto", "insumo", ...
+    version = models.BigIntegerField(default=1)
+    # Cuándo subió la versión por última vez (Last-Modified de la API, ver api.py)
+    actualizada = models.DateTimeField(default=timezone.now)
+
+    def __str__(self):
+        return f"{self.nombre} v{self.version}"
+
+
+# =====================================================================
+# RESUMEN DEL DASHBOARD (KPIs PRECALCULADOS)
+# =====================================================================
+# En vez de contar filas cada vez que se abre el dashboard, los totales
+# se guardan aquí y se actualizan con +1 / -1 cada vez que se guarda o
+# elimina un Producto, Empleado o Insumo (ver kpis.py).
+# Solo hay UNA fila (id=1).
+class ResumenDashboard(models.Model):
+    productos_en_stock = models.BigIntegerField(default=0)
+    productos_agotados = models.BigIntegerField(default=0)
+    empleados_activos = models.BigIntegerField(default=0)
+    empleados_inactivos = models.BigIntegerField(default=0)
+    insumos_total = models.BigIntegerField(default=0)
+
+# Cuántos insumos tienen cada fecha de actualización.
+# "Insumos actualizados hoy" = la fila de la fecha de hoy.
+class InsumosPorFecha(models.Model):
+    fecha = models.DateField(unique=True)
+    total = models.BigIntegerField(default=0)
+
+
+# =====================================================================
+# IMÁGENES REMOTAS (MINIATURAS)
+# =====================================================================
+# Cada URL de imagen que ya se descargó y convirtió (ver miniaturas.py).
+# hash vacío = no se pudo (el motivo queda en "error").
+class ImagenRemota(models.Model):
+    url = models.URLField(max_length=500, unique=True)
+    hash = models.CharField(max_length=16, blank=True)
+    error = models.CharField(max_length=200, blank=True)
+    intentos = models.PositiveSmallIntegerField(default=0)
+    actualizada = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return self.url
+
+
+# =====================================================================
+# FILAS ELIMINADAS (SINCRONIZACIÓN)
+# =====================================================================
+# Una fila borrada ya no tiene "actualizado": se anota aquí (con
+# señales) para que /sync/ pueda avisar a los clientes que la quiten.
+# Las anotaciones viejas se borran con "manage.py purgar_eliminadas".
+class FilaEliminada(models.Model):
+    modelo = models.CharField(max_length=50)  # "producto", "insumo", "empleado"
+    # No es ForeignKey: la fila ya no existe
+    objeto_id = models.BigIntegerField()
+    eliminada = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["modelo", "eliminada"], name="fila_eliminada_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.modelo} {self.objeto_id}"
+
+
+# =====================================================================
+# MOVIMIENTOS DE INVENTARIO
+# =====================================================================
+# Cada cambio de cantidad de un insumo queda anotado aquí (entrada,
+# consumo o ajuste) en vez de perderse al sobrescribir Insumo.cantidad.
+# Las filas no se modifican ni se borran (ver inventario.py).
+class InsumoMovimiento(models.Model):
+    class Tipo(models.TextChoices):
+        ENTRADA = "E", "Entrada"
+        CONSUMO = "C", "Consumo"
+        AJUSTE = "A", "Ajuste"
+
+    # No es ForeignKey: el historial se conserva aunque se elimine el insumo
+    insumo_id = models.BigIntegerField()
+    tipo = models.CharField(max_length=1, choices=Tipo.choices)
+    cantidad = models.DecimalField(max_digits=12, decimal_places=3)  # Con signo: consumo < 0
+    unidad = models.CharField(max_length=2, choices=Insumo.Unidad.choices)
+    # Saldo del insumo EN ESTA UNIDAD después de este movimiento
+    saldo = models.DecimalField(max_digits=14, decimal_places=3, default=0)
+    fecha = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        indexes = [
+            # Último movimiento de un insumo en una unidad (saldo en una fecha)
+            models.Index(fields=["insumo_id", "unidad", "id"], name="movimiento_insumo_unidad_idx"),
+            # Consumo de todos los insumos en un rango de fechas
+            models.Index(fields=["fecha", "tipo"], name="movimiento_fecha_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.insumo_id}: {self.cantidad:+} {self.unidad}"
+
+# InsumoSaldo: saldo actual de un insumo en cada unidad. Se actualiza con
+# cada movimiento (sumando, nunca recorriendo el historial); el saldo en
+# una fecha pasada está en InsumoMovimiento.saldo.
+class InsumoSaldo(models.Model):
+    insumo_id = models.BigIntegerField()
+    unidad = models.CharField(max_length=2, choices=Insumo.Unidad.choices)
+    saldo = models.DecimalField(max_digits=14, decimal_places=3, default=0)
+    movimiento_id = models.BigIntegerField(default=0)  # Último movimiento sumado
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["insumo_id", "unidad"], name="saldo_insumo_unidad_uniq"),
+        ]
+
+    def __str__(self):
+        return f"{self.insumo_id}: {self.saldo} {self.unidad}"
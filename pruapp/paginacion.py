@@ -0,0 +1,170 @@
+# =====================================================================
+# PAGINACION.PY - Paginación por cursor (keyset) para las listas
+# =====================================================================
+# En vez de usar OFFSET (que obliga a la base de datos a recorrer y
+# descartar todas las filas anteriores), usamos el ID de la última fila
+# mostrada como "cursor":
+#   - Página siguiente: WHERE id > cursor ORDER BY id LIMIT n
+#   - Página anterior:  WHERE id < cursor ORDER BY id DESC LIMIT n
+# Como "id" es la llave primaria (tiene índice), cada página cuesta lo
+# mismo sin importar si la tabla tiene 100 filas o 1 millón.
+#
+# Los resultados de una búsqueda van por relevancia, no por ID: ahí el
+# cursor es el par "relevancia_id" de la última fila y la página es
+# (relevancia, id) > cursor (ver paginar_por_clave y busqueda.py).
+# =====================================================================
+
+import math
+
+from django.conf import settings
+
+# Valores por defecto si no están definidos en settings.py
+TAMANO_POR_DEFECTO = 25
+TAMANO_MAXIMO_POR_DEFECTO = 100
+
+
+class PaginaCursor:
+    """Una página de resultados con los cursores para moverse."""
+
+    def __init__(self, objetos, tamano, request, siguiente=None, anterior=None):
+        self.objetos = objetos      # Lista con las filas de esta página
+        self.tamano = tamano        # Cuántas filas por página
+        self.siguiente = siguiente  # ID para pedir la página siguiente (o None)
+        self.anterior = anterior    # ID para pedir la página anterior (o None)
+        self._request = request
+
+    def __iter__(self):
+        return iter(self.objetos)
+
+    def __len__(self):
+        return len(self.objetos)
+
+    def _url(self, parametro, valor):
+        # Conservamos los demás parámetros de la URL (por ejemplo ?q=)
+        params = self._request.GET.copy()
+        params.pop("despues", None)
+        params.pop("antes", None)
+        params[parametro] = valor
+        return "?" + params.urlencode()
+
+    @property
+    def url_siguiente(self):
+        return self._url("despues", self.siguiente) if self.siguiente else None
+
+    @property
+    def url_anterior(self):
+        return self._url("antes", self.anterior) if self.anterior else None
+
+
+def _leer_entero(valor):
+    # Convierte el parámetro de la URL a entero; si no es válido devuelve None
+    try:
+        numero = int(valor)
+    except (TypeError, ValueError):
+        return None
+    return numero if numero > 0 else None
+
+
+def tamano_pagina(request):
+    # El tamaño se puede cambiar con ?tamano=50, pero nunca más del máximo
+    por_defecto = getattr(settings, "PAGINACION_TAMANO", TAMANO_POR_DEFECTO)
+    maximo = getattr(settings, "PAGINACION_TAMANO_MAXIMO", TAMANO_MAXIMO_POR_DEFECTO)
+    tamano = _leer_entero(request.GET.get("tamano")) or por_defecto
+    return min(tamano, maximo)
+
+
+def _preparar(queryset, request):
+    # Arma la consulta de la página (todavía no se ejecuta)
+    tamano = tamano_pagina(request)
+    despues = _leer_entero(request.GET.get("despues"))
+    antes = _leer_entero(request.GET.get("antes"))
+
+    if antes is not None:
+        # Retroceder: pedimos en orden descendente y luego damos la vuelta
+        # Se pide una fila extra para saber si hay más páginas hacia atrás
+        consulta = queryset.filter(id__lt=antes).order_by("-id")[:tamano + 1]
+    else:
+        if despues is not None:
+            queryset = queryset.filter(id__gt=despues)
+        consulta = queryset.order_by("id")[:tamano + 1]
+    return consulta, tamano, despues, antes
+
+
+def _id(fila):
+    # Objetos del modelo o diccionarios de .values() (ver api.py)
+    return fila["id"] if isinstance(fila, dict) else fila.id
+
+
+def _armar(filas, request, tamano, despues, antes, cursor=_id):
+    # Con las filas ya leídas, calcula los cursores y crea la página
+    hay_mas = len(filas) > tamano
+    filas = filas[:tamano]
+    if antes is not None:
+        filas.reverse()
+        anterior = cursor(filas[0]) if (filas and hay_mas) else None
+        siguiente = cursor(filas[-1]) if filas else None
+    else:
+        siguiente = cursor(filas[-1]) if (filas and hay_mas) else None
+        anterior = cursor(filas[0]) if (filas and despues is not None) else None
+
+    return PaginaCursor(filas, tamano, request, siguiente=siguiente, anterior=anterior)
+
+
+def paginar(queryset, request):
+    """
+    Devuelve una PaginaCursor con las filas del queryset.
+
+    Lee de la URL:
+      ?despues=<id>  -> filas con id mayor (avanzar)
+      ?antes=<id>    -> filas con id menor (retroceder)
+      ?tamano=<n>    -> filas por página
+    """
+    consulta, tamano, despues, antes = _preparar(queryset, request)
+    return _armar(list(consulta), request, tamano, despues, antes)
+
+
+async def apaginar(queryset, request):
+    """Igual que paginar(), pero para vistas async (usa el ORM async)."""
+    consulta, tamano, despues, antes = _preparar(queryset, request)
+    return _armar([fila async for fila in consulta], request, tamano, despues, antes)
+
+
+# =====================================================================
+# ORDEN POR OTRA CLAVE (relevancia de una búsqueda)
+# =====================================================================
+def _leer_clave(valor):
+    # "-1.5e-06_42" -> (-1.5e-06, 42); si no es válido devuelve None
+    try:
+        clave, pk = valor.rsplit("_", 1)
+        clave, pk = float(clave), int(pk)
+    except (AttributeError, ValueError):
+        return None
+    return (clave, pk) if math.isfinite(clave) and pk > 0 else None
+
+
+def _cursor_clave(fila):
+    # repr() de un float se vuelve a leer exacto: la fila del cursor no se repite
+    return f"{fila.clave_orden!r}_{fila.id}"
+
+
+def paginar_por_clave(leer, queryset, request):
+    """
+    Como paginar(), pero en el orden (clave, id) que da 'leer':
+        leer(limite, despues=None, antes=None) -> [(clave, id), ...]
+    ordenados de menor a mayor después de 'despues' (o de mayor a menor
+    antes de 'antes'), ambos pares (clave, id). Las filas se leen luego
+    con una consulta por llave primaria.
+    """
+    tamano = tamano_pagina(request)
+    despues = _leer_clave(request.GET.get("despues"))
+    antes = _leer_clave(request.GET.get("antes"))
+    if antes is not None:
+        despues = None
+    claves = leer(tamano + 1, despues=despues, antes=antes)
+    objetos = queryset.in_bulk([pk for _, pk in claves])
+    filas = []
+    for clave, pk in claves:
+        if pk in objetos:  # Si se eliminó entre las dos consultas, se omite
+            objetos[pk].clave_orden = clave
+            filas.append(objetos[pk])
+    return _armar(filas, request, tamano, despues, antes, cursor=_cursor_clave)
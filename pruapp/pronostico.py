@@ -0,0 +1,180 @@
+# =====================================================================
+# PRONOSTICO.PY - ¿En cuántos días se acaba cada insumo?
+# =====================================================================
+# Con el historial de movimientos (ver inventario.py) se estima cuánto
+# se consume por día de cada insumo y cuántos días alcanza lo que hay:
+#
+#   1. Una consulta suma el CONSUMO por insumo, unidad y día de los
+#      últimos DIAS días y se arma una matriz (insumos x días) de NumPy,
+#      todo en la unidad actual de cada insumo: si la unidad cambió, lo
+#      consumido en gramos cuenta /1000 para un insumo en kilos, y lo de
+#      otra magnitud (litros para un insumo que ahora va en kilos) no
+#      cuenta.
+#   2. Con operaciones sobre la matriz completa (no un ciclo por insumo):
+#        - media móvil de los últimos VENTANA días
+#        - suavizado exponencial (ALFA): el resultado del suavizado es
+#          una suma ponderada de la fila, así que para todos los insumos
+#          es UN producto matriz x vector de pesos
+#   3. Días restantes = cantidad actual / consumo diario. Se usa el mayor
+#      de los dos estimados: mejor avisar un día antes que uno tarde.
+#
+# El paso 2 con 10.000 insumos x 365 días tarda menos de un segundo
+# (ver "manage.py forecast_insumos --sintetico"). Igual el resultado
+# completo se guarda en cache con una llave que incluye el último
+# movimiento y la fecha: se recalcula solo cuando llega un dato nuevo
+# (o cambia el día).
+#
+# Requiere NumPy (requirements-pronostico.txt). Sin NumPy el panel del
+# dashboard no aparece y "manage.py forecast_insumos" avisa.
+# =====================================================================
+
+from datetime import datetime, time, timedelta
+
+from django.conf import settings
+from django.db.models import Max, Sum
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+try:
+    import numpy as np
+except ImportError:  # NumPy es opcional
+    np = None
+
+from .cache import cache_vistas
+from .cantidades import factor_conversion
+from .models import Insumo, InsumoMovimiento
+
+DIAS = getattr(settings, "PRONOSTICO_DIAS", 365)  # Días de historial
+VENTANA = 7     # Días de la media móvil
+ALFA = 0.3      # Peso del último día en el suavizado exponencial
+MOSTRAR = 5     # Insumos en el panel del dashboard
+
+
+def disponible():
+    return np is not None
+
+
+def _inicio_del_dia(dia):
+    return timezone.make_aware(datetime.combine(dia, time.min))
+
+
+# =====================================================================
+# DATOS
+# =====================================================================
+def _factores():
+    # Matriz unidades x unidades: por cuánto se multiplica una cantidad
+    # en la unidad de la fila para tenerla en la de la columna (nan si
+    # no son de la misma magnitud)
+    unidades = list(Insumo.Unidad.values)
+    factores = np.full((len(unidades), len(unidades)), np.nan)
+    for i, de in enumerate(unidades):
+        for j, a in enumerate(unidades):
+            factor = factor_conversion(de, a)
+            if factor is not None:
+                factores[i, j] = float(factor)
+    return {unidad: posicion for posicion, unidad in enumerate(unidades)}, factores
+
+
+def matriz_consumo(hoy=None, dias=DIAS):
+    """
+    (ids, cantidades, consumo): ids de los insumos (ordenados), su
+    cantidad actual y la matriz insumos x días con lo consumido cada día
+    completo hasta ayer (la última columna), en la unidad actual de cada
+    insumo. Dos consultas.
+    """
+    hoy = hoy or timezone.localdate()
+    inicio = hoy - timedelta(days=dias)
+    codigos, factores = _factores()
+    filas = list(Insumo.objects.order_by("id").values_list("id", "cantidad", "unidad"))
+    ids = np.array([fila[0] for fila in filas], dtype=np.int64)
+    cantidades = np.array([fila[1] for fila in filas], dtype=np.float64)
+    unidades = np.array([codigos[fila[2]] for fila in filas], dtype=np.int64)
+    consumo = np.zeros((len(ids), dias))
+
+    por_dia = list(
+        InsumoMovimiento.objects
+        .filter(tipo=InsumoMovimiento.Tipo.CONSUMO, fecha__gte=_inicio_del_dia(inicio), fecha__lt=_inicio_del_dia(hoy))
+        .annotate(dia=TruncDate("fecha")).order_by()
+        .values("insumo_id", "unidad", "dia").annotate(total=Sum("cantidad"))
+        .values_list("insumo_id", "unidad", "dia", "total")
+    )
+    if por_dia and len(ids):
+        insumo_ids, unidades_movimiento, fechas, totales = zip(*por_dia)
+        insumo_ids = np.array(insumo_ids, dtype=np.int64)
+        # Fila = posición del insumo en ids; los eliminados no tienen fila
+        fila = np.minimum(np.searchsorted(ids, insumo_ids), len(ids) - 1)
+        columna = (np.array(fechas, dtype="datetime64[D]") - np.datetime64(inicio, "D")).astype(np.int64)
+        # A la unidad actual del insumo; nan = otra magnitud, no cuenta
+        factor = factores[np.array([codigos[u] for u in unidades_movimiento], dtype=np.int64), unidades[fila]]
+        existe = (ids[fila] == insumo_ids) & ~np.isnan(factor)
+        # El consumo se guarda con signo negativo
+        totales = -np.array(totales, dtype=np.float64) * factor
+        np.add.at(consumo, (fila[existe], columna[existe]), totales[existe])
+    return ids, cantidades, consumo
+
+
+# =====================================================================
+# CÁLCULO (todo con la matriz completa)
+# =====================================================================
+def pronosticar(consumo, cantidades, ventana=VENTANA, alfa=ALFA):
+    """
+    Para cada fila de 'consumo' (insumos x días): (media móvil,
+    suavizado exponencial, días hasta agotarse). inf = no se consume.
+    """
+    dias = consumo.shape[1]
+    media = consumo[:, -ventana:].mean(axis=1) if dias else np.zeros(len(consumo))
+    # s0 = x0; s = alfa * x + (1 - alfa) * s  <=>  suma de x con estos pesos
+    pesos = alfa * (1 - alfa) ** np.arange(dias - 1, -1, -1, dtype=np.float64)
+    if dias:
+        pesos[0] = (1 - alfa) ** (dias - 1)
+    suavizado = consumo @ pesos
+    tasa = np.maximum(media, suavizado)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        restantes = np.where(tasa > 0, np.maximum(cantidades, 0) / tasa, np.inf)
+    return media, suavizado, restantes
+
+
+def calcular(hoy=None, dias=DIAS):
+    """Pronóstico de todos los insumos: diccionario de arreglos alineados con "ids"."""
+    ids, cantidades, consumo = matriz_consumo(hoy, dias)
+    media, suavizado, restantes = pronosticar(consumo, cantidades)
+    return {"ids": ids, "cantidades": cantidades, "media": media, "suavizado": suavizado, "dias": restantes}
+
+
+def resultados(hoy=None):
+    """calcular() guardado en cache hasta que haya un movimiento nuevo o cambie el día."""
+    hoy = hoy or timezone.localdate()
+    ultimo = InsumoMovimiento.objects.aggregate(ultimo=Max("id"))["ultimo"] or 0
+    llave = f"pronostico:{hoy.isoformat()}:{DIAS}:{ultimo}"
+    cache = cache_vistas()
+    datos = cache.get(llave)
+    if datos is None:
+        datos = calcular(hoy)
+        cache.set(llave, datos, 24 * 60 * 60)
+    return datos
+
+
+def proximos_a_agotarse(limite=MOSTRAR, hoy=None):
+    """
+    Los 'limite' insumos que se acaban antes: lista de diccionarios con
+    el insumo, los días que le quedan y el consumo diario estimado.
+    """
+    hoy = hoy or timezone.localdate()
+    datos = resultados(hoy)
+    orden = np.argsort(datos["dias"], kind="stable")[:limite]
+    orden = orden[np.isfinite(datos["dias"][orden])]
+    insumos = Insumo.objects.in_bulk(datos["ids"][orden].tolist())
+    proximos = []
+    for posicion in orden:
+        insumo = insumos.get(int(datos["ids"][posicion]))
+        if insumo is None:  # Se eliminó después de calcular
+            continue
+        dias = float(datos["dias"][posicion])
+        proximos.append({
+            "insumo": insumo,
+            "dias": dias,
+            # Más de un año: la fecha no dice mucho (y timedelta tiene límite)
+            "fecha": hoy + timedelta(days=int(dias)) if dias < 366 else None,
+            "consumo_diario": float(max(datos["media"][posicion], datos["suavizado"][posicion])),
+        })
+    return proximos
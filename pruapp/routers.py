@@ -0,0 +1,82 @@
+# =====================================================================
+# ROUTERS.PY - Enviar las lecturas de las listas a la réplica
+# =====================================================================
+# Si settings.DATABASES tiene una base "replica" (DATABASE_REPLICA_URL),
+# las vistas marcadas con @usar_replica leen el catálogo de ahí y la
+# base principal queda libre para las escrituras.
+#
+# Solo se envían a la réplica las tablas del catálogo. La sesión y las
+# versiones del cache (VersionCatalogo) se leen siempre de la principal.
+# Por eso las vistas cacheadas (cachear_vista, ver cache.py) NO pueden
+# usar la réplica: leerían las filas atrasadas y las guardarían con la
+# versión nueva, y esa página vieja se serviría hasta el próximo cambio.
+# cachear_vista lo revisa y falla al arrancar si se combinan.
+# Las escrituras y las migraciones van siempre a "default".
+# =====================================================================
+
+from contextvars import ContextVar
+from functools import wraps
+
+from asgiref.sync import iscoroutinefunction
+from django.db import connections
+
+REPLICA = "replica"
+
+# Tablas que se pueden leer de la réplica (nombre del modelo)
+MODELOS_REPLICA = {"producto", "insumo", "empleado"}
+
+_en_replica = ContextVar("en_replica", default=False)
+
+
+def _destino(alias):
+    datos = connections[alias].settings_dict
+    return (datos["ENGINE"], str(datos["NAME"]), datos.get("HOST"), datos.get("PORT"))
+
+
+def hay_replica():
+    # En las pruebas la réplica es un espejo (TEST MIRROR) de "default": es
+    # la misma base, pero otra conexión no vería los datos de la transacción
+    # de la prueba. Si apunta a la misma base se usa directamente "default".
+    return REPLICA in connections.settings and _destino(REPLICA) != _destino("default")
+
+
+class RouterReplica:
+    def db_for_read(self, model, **hints):
+        if _en_replica.get() and model._meta.model_name in MODELOS_REPLICA and hay_replica():
+            return REPLICA
+        return None  # La base por defecto
+
+    def db_for_write(self, model, **hints):
+        return "default"
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Réplica y principal tienen los mismos datos
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # La réplica recibe los cambios de la principal, no se migra aparte
+        return db != REPLICA
+
+
+def usar_replica(vista):
+    """Decorador: las lecturas del catálogo dentro de la vista van a la réplica."""
+    if iscoroutinefunction(vista):
+        @wraps(vista)
+        async def envoltura_async(request, *args, **kwargs):
+            token = _en_replica.set(True)
+            try:
+                return await vista(request, *args, **kwargs)
+            finally:
+                _en_replica.reset(token)
+        envoltura_async.usa_replica = True
+        return envoltura_async
+
+    @wraps(vista)
+    def envoltura(request, *args, **kwargs):
+        token = _en_replica.set(True)
+        try:
+            return vista(request, *args, **kwargs)
+        finally:
+            _en_replica.reset(token)
+    envoltura.usa_replica = True
+    return envoltura
@@ -0,0 +1,136 @@
+# =====================================================================
+# SESION.PY - Usuario logueado: @login_requerido y request.usuario
+# =====================================================================
+# Antes cada vista repetía:
+#     if 'usuario_id' not in request.session:
+#         return redirect("login")
+# y "usuarios" leía además el nombre guardado en la sesión al hacer
+# login (que quedaba viejo si se cambiaba el username).
+#
+# Ahora las vistas llevan @login_requerido, que:
+#   1. Redirige al login si no hay sesión.
+#   2. Pone en request.usuario un UsuarioSesion (id, username,
+#      imagen_url) para la vista y las plantillas ({{ request.usuario }}).
+#
+# Los datos del usuario se guardan en el cache de las sesiones
+# (settings.SESSION_CACHE_ALIAS, compartido entre procesos), así que en
+# una petición normal no se consulta la tabla Practica. Cuando un
+# usuario se actualiza o se elimina (signals.py) se borra su copia.
+# Si el usuario ya no existe se cierra la sesión.
+#
+# La API JSON (api.py) usa @login_requerido_api: igual, pero sin sesión
+# responde 401 en vez de redirigir a la página de login.
+# =====================================================================
+
+from functools import wraps
+
+from asgiref.sync import iscoroutinefunction
+from django.conf import settings
+from django.core.cache import caches
+from django.http import JsonResponse
+from django.shortcuts import redirect
+
+from .models import Practica
+
+# Las copias se borran al cambiar el usuario; el tiempo es por si se
+# cambia la tabla sin pasar por el ORM (.update(), otra aplicación)
+TIEMPO_CACHE = 600
+CAMPOS = ("id", "username", "imagen_url")
+
+
+class UsuarioSesion:
+    """Lo que las vistas y plantillas necesitan del usuario logueado."""
+
+    __slots__ = CAMPOS
+
+    def __init__(self, id, username, imagen_url):
+        self.id = id
+        self.username = username
+        self.imagen_url = imagen_url
+
+    def __str__(self):
+        return self.username
+
+
+def _cache():
+    return caches[settings.SESSION_CACHE_ALIAS]
+
+
+def _llave(usuario_id):
+    return f"sesion:usuario:{usuario_id}"
+
+
+def recordar_usuario(usuario_id):
+    """Lee el usuario de la base y guarda su copia. None si no existe."""
+    datos = Practica.objects.filter(id=usuario_id).values(*CAMPOS).first()
+    if datos is not None:
+        _cache().set(_llave(usuario_id), datos, TIEMPO_CACHE)
+    return datos
+
+
+def olvidar_usuario(usuario_id):
+    """Borra la copia (la próxima petición la vuelve a leer de la base)."""
+    _cache().delete(_llave(usuario_id))
+
+
+def olvidar_usuarios(usuario_ids):
+    """Igual que olvidar_usuario() para varios (eliminación en lote)."""
+    _cache().delete_many([_llave(i) for i in usuario_ids])
+
+
+def usuario_de_sesion(request):
+    """UsuarioSesion del usuario logueado, o None."""
+    usuario_id = request.session.get("usuario_id")
+    if usuario_id is None:
+        return None
+    datos = _cache().get(_llave(usuario_id)) or recordar_usuario(usuario_id)
+    if datos is None:
+        # Eliminaron al usuario: la sesión ya no vale
+        request.session.flush()
+        return None
+    return UsuarioSesion(**datos)
+
+
+async def ausuario_de_sesion(request):
+    """Igual que usuario_de_sesion(), para vistas async."""
+    usuario_id = await request.session.aget("usuario_id")
+    if usuario_id is None:
+        return None
+    datos = await _cache().aget(_llave(usuario_id))
+    if datos is None:
+        datos = await Practica.objects.filter(id=usuario_id).values(*CAMPOS).afirst()
+        if datos is None:
+            await request.session.aflush()
+            return None
+        await _cache().aset(_llave(usuario_id), datos, TIEMPO_CACHE)
+    return UsuarioSesion(**datos)
+
+
+def _exigir_sesion(vista, sin_sesion):
+    # sin_sesion(request): la respuesta cuando no hay usuario logueado
+    if iscoroutinefunction(vista):
+        @wraps(vista)
+        async def envoltura_async(request, *args, **kwargs):
+            request.usuario = await ausuario_de_sesion(request)
+            if request.usuario is None:
+                return sin_sesion(request)
+            return await vista(request, *args, **kwargs)
+        return envoltura_async
+
+    @wraps(vista)
+    def envoltura(request, *args, **kwargs):
+        request.usuario = usuario_de_sesion(request)
+        if request.usuario is None:
+            return sin_sesion(request)
+        return vista(request, *args, **kwargs)
+    return envoltura
+
+
+def login_requerido(vista):
+    """Decorador: redirige al login sin sesión; si hay, pone request.usuario."""
+    return _exigir_sesion(vista, lambda request: redirect("login"))
+
+
+def login_requerido_api(vista):
+    """Igual que login_requerido, pero sin sesión responde 401 (JSON)."""
+    return _exigir_sesion(vista, lambda request: JsonResponse({"error": "Sesión requerida"}, status=401))
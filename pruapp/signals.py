@@ -0,0 +1,372 @@
+# =====================================================================
+# SIGNALS.PY - Acciones automáticas cuando se guardan/borran modelos
+# =====================================================================
+# Django envía "señales" cada vez que un objeto se guarda (post_save)
+# o se elimina (post_delete). Aquí las escuchamos para mantener al día
+# los datos derivados (por ejemplo el índice de búsqueda).
+# Estas funciones se conectan en apps.py (PruappConfig.ready).
+# =====================================================================
+
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.db import transaction
+from django.db.models.signals import pre_save, post_save, pre_delete, post_delete
+from django.dispatch import receiver, Signal
+
+from .models import Practica, Producto, Insumo, Empleado
+from . import busqueda
+from . import cache
+from . import alertas
+from . import eventos
+from . import inventario
+from . import kpis
+from . import miniaturas
+from . import sesion
+from . import sincronizacion
+
+MODELOS_CATALOGO = (Producto, Insumo, Empleado)
+
+# Señal propia: bulk_create/bulk_update no envían post_save, así que las
+# cargas masivas (intercambio.py) envían esta con la lista de objetos.
+# Argumentos: sender=modelo, objetos=[...]
+lote_guardado = Signal()
+
+# Se envía justo ANTES del bulk_update, con los objetos que ya existían,
+# para que los receptores puedan leer cómo estaban las filas.
+# Argumentos: sender=modelo, objetos=[...]
+lote_por_guardar = Signal()
+
+# Los dos anteriores aceptan también campos=[...]: solo cambiaron esos
+# campos (como update_fields en post_save); los receptores a los que no
+# les importan esos campos no hacen nada.
+
+# QuerySet.delete() envía post_delete por cada fila borrada. Dentro de
+# eliminacion_en_lote() esas señales solo se anotan y al final se envía
+# esta, una vez por modelo. Argumentos: sender=modelo, ids=[...],
+# objetos=[...] (los objetos ya no tienen pk, por eso van los ids aparte)
+lote_eliminado = Signal()
+
+_eliminados = ContextVar("eliminados", default=None)
+
+
+@contextmanager
+def eliminacion_en_lote():
+    """
+    with eliminacion_en_lote():
+        Producto.objects.filter(id__in=ids).delete()
+
+    Los receptores de post_delete no hacen una consulta por fila: se
+    hace una por lote al salir del bloque (lote_eliminado). Usarlo
+    dentro de transaction.atomic() para que todo se confirme junto.
+    """
+    eliminados = {}
+    token = _eliminados.set(eliminados)
+    try:
+        yield
+    finally:
+        _eliminados.reset(token)
+    for modelo, (ids, objetos) in eliminados.items():
+        lote_eliminado.send(sender=modelo, ids=ids, objetos=objetos)
+
+
+def en_lote():
+    return _eliminados.get() is not None
+
+
+def _cambio(campos, importantes):
+    # False si el lote solo cambió campos que a este receptor no le importan
+    return campos is None or bool(set(campos) & set(importantes))
+
+
+@receiver(post_delete, dispatch_uid="lote_anotar_eliminado")
+def anotar_eliminado(sender, instance, **kwargs):
+    eliminados = _eliminados.get()
+    if eliminados is not None:
+        ids, objetos = eliminados.setdefault(sender, ([], []))
+        ids.append(instance.pk)
+        objetos.append(instance)
+
+
+# =====================================================================
+# ÍNDICE DE BÚSQUEDA
+# =====================================================================
+@receiver(post_save, dispatch_uid="busqueda_indexar")
+def indexar_busqueda(sender, instance, **kwargs):
+    if sender in busqueda.CAMPOS_INDEXADOS:
+        busqueda.motor().indexar(instance)
+
+
+@receiver(post_delete, dispatch_uid="busqueda_eliminar")
+def eliminar_busqueda(sender, instance, **kwargs):
+    if sender in busqueda.CAMPOS_INDEXADOS and not en_lote():
+        busqueda.motor().eliminar(sender, instance.pk)
+
+
+@receiver(lote_guardado, dispatch_uid="busqueda_indexar_lote")
+def indexar_busqueda_lote(sender, objetos, campos=None, **kwargs):
+    if sender in busqueda.CAMPOS_INDEXADOS and objetos and _cambio(campos, busqueda.CAMPOS_INDEXADOS[sender]):
+        busqueda.motor().indexar_lote(sender, objetos)
+
+
+@receiver(lote_eliminado, dispatch_uid="busqueda_eliminar_lote")
+def eliminar_busqueda_lote(sender, ids, **kwargs):
+    if sender in busqueda.CAMPOS_INDEXADOS:
+        busqueda.motor().eliminar_lote(sender, ids)
+
+
+# =====================================================================
+# VERSIONES DEL CACHE
+# =====================================================================
+# Cualquier cambio en el catálogo sube la versión de su tabla y así
+# las páginas cacheadas que dependen de ella dejan de usarse.
+@receiver(post_save, dispatch_uid="cache_guardar")
+@receiver(post_delete, dispatch_uid="cache_eliminar")
+def invalidar_cache(sender, signal, **kwargs):
+    if sender in MODELOS_CATALOGO and not (signal is post_delete and en_lote()):
+        cache.subir_version(sender)
+
+
+@receiver(lote_guardado, dispatch_uid="cache_lote")
+@receiver(lote_eliminado, dispatch_uid="cache_eliminar_lote")
+def invalidar_cache_lote(sender, objetos, **kwargs):
+    if sender in MODELOS_CATALOGO and objetos:
+        cache.subir_version(sender)
+
+
+# =====================================================================
+# ALERTAS DE STOCK
+# =====================================================================
+# Se anota el insumo que cambió y, al confirmar la transacción, se
+# evalúa solo ese (ver alertas.py). Si la evaluación falla, la marca
+# queda para "manage.py evaluar_alertas".
+@receiver(post_save, sender=Insumo, dispatch_uid="alertas_marcar")
+def marcar_insumo(sender, instance, **kwargs):
+    ids = [instance.pk]
+    alertas.marcar(ids)
+    transaction.on_commit(lambda: alertas.evaluar(ids))
+
+
+@receiver(lote_guardado, sender=Insumo, dispatch_uid="alertas_marcar_lote")
+def marcar_insumos_lote(sender, objetos, **kwargs):
+    # En cargas masivas solo se anotan; se evalúan con "manage.py evaluar_alertas"
+    if objetos:
+        alertas.marcar([o.pk for o in objetos])
+
+
+# =====================================================================
+# INDICADORES DEL DASHBOARD
+# =====================================================================
+# Antes de guardar o eliminar se lee (bloqueada) cómo estaba la fila;
+# después se ajustan los totales con la diferencia, en la misma
+# transacción (ver kpis.py).
+@receiver(pre_save, dispatch_uid="kpis_leer_previo")
+def leer_kpis_previos(sender, instance, raw=False, update_fields=None, **kwargs):
+    if sender not in kpis.CAMPOS_KPI or raw or instance.pk is None:
+        return
+    if update_fields is not None and not set(update_fields) & set(kpis.CAMPOS_KPI[sender]):
+        return
+    instance._kpis_previo = kpis.valores_previos(sender, [instance.pk]).get(instance.pk)
+
+
+@receiver(post_save, dispatch_uid="kpis_guardar")
+def actualizar_kpis(sender, instance, raw=False, update_fields=None, **kwargs):
+    if sender not in kpis.CAMPOS_KPI or raw:
+        return
+    if update_fields is not None and not set(update_fields) & set(kpis.CAMPOS_KPI[sender]):
+        return
+    previo = instance.__dict__.pop("_kpis_previo", None)
+    kpis.aplicar(sender, [previo] if previo else [], [kpis.valores_kpi(instance)])
+
+
+@receiver(pre_delete, dispatch_uid="kpis_leer_previo_eliminar")
+def leer_kpis_al_eliminar(sender, instance, **kwargs):
+    # El objeto en memoria puede estar viejo: se resta lo que hay guardado
+    if sender in kpis.CAMPOS_KPI and not en_lote():
+        instance._kpis_previo = kpis.valores_previos(sender, [instance.pk]).get(instance.pk)
+
+
+@receiver(post_delete, dispatch_uid="kpis_eliminar")
+def descontar_kpis(sender, instance, **kwargs):
+    if sender in kpis.CAMPOS_KPI and not en_lote():
+        previo = instance.__dict__.pop("_kpis_previo", None)
+        kpis.aplicar(sender, [previo] if previo else [], [])
+
+
+@receiver(lote_por_guardar, dispatch_uid="kpis_leer_previo_lote")
+def leer_kpis_previos_lote(sender, objetos, campos=None, **kwargs):
+    if sender in kpis.CAMPOS_KPI and objetos and _cambio(campos, kpis.CAMPOS_KPI[sender]):
+        previos = kpis.valores_previos(sender, [o.pk for o in objetos])
+        for objeto in objetos:
+            objeto._kpis_previo = previos.get(objeto.pk)
+
+
+@receiver(lote_guardado, dispatch_uid="kpis_lote")
+def actualizar_kpis_lote(sender, objetos, campos=None, **kwargs):
+    if sender not in kpis.CAMPOS_KPI or not objetos or not _cambio(campos, kpis.CAMPOS_KPI[sender]):
+        return
+    previos = [o.__dict__.pop("_kpis_previo", None) for o in objetos]
+    kpis.aplicar(sender, [p for p in previos if p], [kpis.valores_kpi(o) for o in objetos])
+
+
+@receiver(lote_eliminado, dispatch_uid="kpis_eliminar_lote")
+def descontar_kpis_lote(sender, objetos, **kwargs):
+    if sender in kpis.CAMPOS_KPI:
+        kpis.aplicar(sender, [kpis.valores_kpi(o) for o in objetos], [])
+
+
+# =====================================================================
+# MOVIMIENTOS DE INVENTARIO
+# =====================================================================
+# Cada cambio de cantidad de un insumo se anota en el historial (ver
+# inventario.py). Lo anterior sale de valores_leidos (la fila ya se leyó
+# para editarla); si el objeto no se leyó de la base, de una consulta.
+CAMPOS_INVENTARIO = ("cantidad", "unidad")
+
+
+@receiver(pre_save, sender=Insumo, dispatch_uid="inventario_leer_previo")
+def leer_inventario_previo(sender, instance, raw=False, **kwargs):
+    if not raw and instance.pk is not None and getattr(instance, "valores_leidos", None) is None:
+        instance._inventario_previo = inventario.valores_previos([instance.pk]).get(instance.pk)
+
+
+@receiver(post_save, sender=Insumo, dispatch_uid="inventario_guardar")
+def anotar_movimiento(sender, instance, created=False, raw=False, update_fields=None, **kwargs):
+    if raw or not _cambio(update_fields, CAMPOS_INVENTARIO):
+        return
+    previo = instance.__dict__.pop("_inventario_previo", None) or getattr(instance, "valores_leidos", None)
+    previos = {} if created or previo is None else {instance.pk: previo}
+    inventario.escribir(inventario.diferencias([instance], previos))
+
+
+@receiver(post_delete, sender=Insumo, dispatch_uid="inventario_eliminar")
+def anotar_baja(sender, instance, **kwargs):
+    if not en_lote():
+        inventario.escribir(inventario.bajas([instance.pk], [instance]))
+
+
+@receiver(lote_por_guardar, sender=Insumo, dispatch_uid="inventario_leer_previo_lote")
+def leer_inventario_previo_lote(sender, objetos, campos=None, **kwargs):
+    if not objetos or not _cambio(campos, CAMPOS_INVENTARIO):
+        return
+    sin_leer = [o for o in objetos if getattr(o, "valores_leidos", None) is None]
+    previos = inventario.valores_previos([o.pk for o in sin_leer]) if sin_leer else {}
+    for objeto in objetos:
+        leidos = getattr(objeto, "valores_leidos", None)
+        objeto._inventario_previo = leidos if leidos is not None else previos.get(objeto.pk)
+
+
+@receiver(lote_guardado, sender=Insumo, dispatch_uid="inventario_lote")
+def anotar_movimientos_lote(sender, objetos, campos=None, **kwargs):
+    if not objetos or not _cambio(campos, CAMPOS_INVENTARIO):
+        return
+    # Sin lectura previa = fila nueva del lote (bulk_create)
+    previos = {o.pk: o.__dict__.pop("_inventario_previo") for o in objetos if "_inventario_previo" in o.__dict__}
+    previos = {pk: previo for pk, previo in previos.items() if previo is not None}
+    inventario.escribir(inventario.diferencias(objetos, previos, inventario.Tipo.AJUSTE))
+
+
+@receiver(lote_eliminado, sender=Insumo, dispatch_uid="inventario_eliminar_lote")
+def anotar_bajas_lote(sender, ids, objetos, **kwargs):
+    inventario.escribir(inventario.bajas(ids, objetos))
+
+
+# =====================================================================
+# MINIATURAS
+# =====================================================================
+# Las fotos sin miniatura se descargan y convierten en segundo plano
+# cuando la transacción se confirma (ver miniaturas.py).
+@receiver(post_save, dispatch_uid="miniaturas_guardar")
+def programar_miniatura(sender, instance, raw=False, **kwargs):
+    if sender not in miniaturas.CAMPOS or raw:
+        return
+    campo_url, campo_hash = miniaturas.CAMPOS[sender]
+    direccion = getattr(instance, campo_url)
+    if direccion and not getattr(instance, campo_hash):
+        transaction.on_commit(lambda: miniaturas.programar([direccion]))
+
+
+@receiver(lote_guardado, dispatch_uid="miniaturas_lote")
+def programar_miniaturas_lote(sender, objetos, campos=None, **kwargs):
+    # En un lote la URL pudo cambiar sin borrar el hash: se revisan todas
+    if sender in miniaturas.CAMPOS and objetos and _cambio(campos, miniaturas.CAMPOS[sender][:1]):
+        campo_url = miniaturas.CAMPOS[sender][0]
+        direcciones = {getattr(o, campo_url) for o in objetos}
+        transaction.on_commit(lambda: miniaturas.programar(direcciones))
+
+
+# =====================================================================
+# EVENTOS EN VIVO (SSE)
+# =====================================================================
+# Si al guardar cambió el stock de un producto o la cantidad de un
+# insumo (comparando con valores_leidos, ver models.RecuerdaValores) se
+# avisa a las conexiones de /eventos/ al confirmar la transacción.
+def _datos_evento(objeto):
+    if isinstance(objeto, Producto):
+        return {"modelo": "producto", "id": objeto.pk, "stock": objeto.stock}
+    return {
+        "modelo": "insumo", "id": objeto.pk, "cantidad": str(objeto.cantidad),
+        "unidad": objeto.unidad, "stock_bajo": objeto.stock_bajo,
+    }
+
+
+def _cambiados(objetos):
+    # Los que se leyeron de la base y tienen algún campo recordado distinto
+    return [_datos_evento(objeto) for objeto in objetos if objeto.valores_cambiados()]
+
+
+def _publicar_al_confirmar(cambiados):
+    def enviar():
+        for datos in cambiados:
+            eventos.publicar(datos["modelo"], datos)
+    if cambiados:
+        transaction.on_commit(enviar)
+
+
+@receiver(post_save, sender=Producto, dispatch_uid="eventos_producto")
+@receiver(post_save, sender=Insumo, dispatch_uid="eventos_insumo")
+def publicar_evento(sender, instance, created=False, raw=False, **kwargs):
+    if not created and not raw:
+        _publicar_al_confirmar(_cambiados([instance]))
+
+
+@receiver(lote_guardado, sender=Producto, dispatch_uid="eventos_producto_lote")
+@receiver(lote_guardado, sender=Insumo, dispatch_uid="eventos_insumo_lote")
+def publicar_eventos_lote(sender, objetos, **kwargs):
+    _publicar_al_confirmar(_cambiados(objetos))
+
+
+# =====================================================================
+# FILAS ELIMINADAS (SINCRONIZACIÓN)
+# =====================================================================
+# /sync/ avisa a los clientes qué filas se borraron (ver sincronizacion.py)
+@receiver(post_delete, dispatch_uid="sincronizacion_eliminar")
+def anotar_eliminada(sender, instance, **kwargs):
+    if sender in MODELOS_CATALOGO and not en_lote():
+        sincronizacion.anotar_eliminadas(sender, [instance.pk])
+
+
+@receiver(lote_eliminado, dispatch_uid="sincronizacion_eliminar_lote")
+def anotar_eliminadas_lote(sender, ids, **kwargs):
+    if sender in MODELOS_CATALOGO:
+        sincronizacion.anotar_eliminadas(sender, ids)
+
+
+# =====================================================================
+# USUARIO DE LA SESIÓN
+# =====================================================================
+# La copia en cache del usuario (ver sesion.py) se borra al confirmar
+# la transacción: si se borrara antes, otra petición podría volver a
+# guardar los datos viejos mientras tanto.
+@receiver(post_save, sender=Practica, dispatch_uid="sesion_usuario_guardar")
+@receiver(post_delete, sender=Practica, dispatch_uid="sesion_usuario_eliminar")
+def olvidar_usuario(sender, instance, signal, **kwargs):
+    if signal is post_delete and en_lote():
+        return
+    usuario_id = instance.pk
+    transaction.on_commit(lambda: sesion.olvidar_usuario(usuario_id))
+
+
+@receiver(lote_eliminado, sender=Practica, dispatch_uid="sesion_usuario_eliminar_lote")
+def olvidar_usuarios_lote(sender, ids, **kwargs):
+    transaction.on_commit(lambda: sesion.olvidar_usuarios(ids))
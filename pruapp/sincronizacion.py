@@ -0,0 +1,113 @@
+# =====================================================================
+# SINCRONIZACION.PY - /sync/: solo lo que cambió desde la última vez
+# =====================================================================
+# Las terminales que consultan el catálogo cada pocos segundos volvían
+# a descargarlo completo, aunque el stock cambia pocas veces por turno.
+# Ahora:
+#
+#   1. Al empezar piden GET /sync/ (sin "since"): la respuesta trae
+#      "recargar": true y un "token". Cargan todo con la API (/api/...).
+#   2. Después piden GET /sync/?since=<token> y reciben por cada tabla
+#      las filas creadas o modificadas ("cambios", por la columna
+#      "actualizado") y los ids borrados ("eliminados", de FilaEliminada),
+#      más un token nuevo para la próxima vez.
+#   3. Se aplican primero los eliminados y luego los cambios (un id
+#      borrado y vuelto a crear llega en las dos listas).
+#
+# Así el tráfico depende de cuántas filas cambian, no del tamaño del
+# catálogo. Detalles:
+#   - Se devuelve también lo de los últimos MARGEN segundos antes del
+#     token: una transacción que tardó en confirmarse puede guardar una
+#     hora un poco anterior. Aplicar un cambio dos veces no hace daño.
+#   - Si el token es más viejo que RETENCION (las FilaEliminada ya se
+#     purgaron) o hay más de MAXIMO_CAMBIOS, se pide "recargar" todo.
+#   - QuerySet.update() no llena "actualizado" (auto_now): quien lo use
+#     sobre estas tablas debe ponerlo a mano (ver lotes.py, intercambio.py).
+# =====================================================================
+
+from datetime import datetime, timedelta, timezone as tz
+
+from django.conf import settings
+from django.utils import timezone
+
+from .api import RECURSOS
+from .cache import nombre_version
+from .models import FilaEliminada
+
+MARGEN = timedelta(seconds=getattr(settings, "SYNC_MARGEN_SEGUNDOS", 5))
+RETENCION = timedelta(days=getattr(settings, "SYNC_RETENCION_DIAS", 7))
+MAXIMO_CAMBIOS = getattr(settings, "SYNC_MAXIMO_CAMBIOS", 2000)
+
+
+def crear_token(momento):
+    # Microsegundos desde 1970: el cliente solo tiene que devolverlo tal cual
+    return str(int(momento.timestamp() * 1_000_000))
+
+
+def leer_token(token):
+    """datetime del token. ValueError si no es válido."""
+    microsegundos = int(token)
+    if microsegundos < 0:
+        raise ValueError("Token no válido")
+    try:
+        return datetime.fromtimestamp(microsegundos / 1_000_000, tz=tz.utc)
+    except (OverflowError, OSError) as error:
+        # Más allá del año 9999 (o un número que ni cabe en un float)
+        raise ValueError("Token no válido") from error
+
+
+def cambios_desde(desde, recursos):
+    """
+    {recurso: {"cambios": [...], "eliminados": [...]}} desde esa fecha,
+    o None si hay que recargar todo (muy viejo o demasiados cambios).
+    """
+    if desde < timezone.now() - RETENCION:
+        return None
+    desde -= MARGEN
+    resultado = {}
+    for recurso in recursos:
+        modelo, campos = RECURSOS[recurso]
+        cambios = list(
+            modelo.objects.filter(actualizado__gte=desde)
+            .order_by("actualizado", "id").values(*campos)[:MAXIMO_CAMBIOS + 1]
+        )
+        eliminados = list(
+            FilaEliminada.objects.filter(modelo=nombre_version(modelo), eliminada__gte=desde)
+            .order_by("eliminada").values_list("objeto_id", flat=True)[:MAXIMO_CAMBIOS + 1]
+        )
+        if len(cambios) > MAXIMO_CAMBIOS or len(eliminados) > MAXIMO_CAMBIOS:
+            return None
+        resultado[recurso] = {"cambios": cambios, "eliminados": eliminados}
+    return resultado
+
+
+def sincronizar(token, recursos):
+    """Respuesta de /sync/ (diccionario). ValueError si el token no es válido."""
+    # El token nuevo se toma ANTES de leer: lo que cambie mientras tanto
+    # entra en la próxima respuesta
+    ahora = timezone.now()
+    datos = cambios_desde(leer_token(token), recursos) if token else None
+    if datos is None:
+        return {"token": crear_token(ahora), "recargar": True}
+    return {"token": crear_token(ahora), "recargar": False, **datos}
+
+
+# =====================================================================
+# ANOTAR Y PURGAR FILAS ELIMINADAS
+# =====================================================================
+def anotar_eliminadas(modelo, ids):
+    """Una FilaEliminada por id (una consulta). La llaman las señales."""
+    ahora = timezone.now()
+    nombre = nombre_version(modelo)
+    FilaEliminada.objects.bulk_create([FilaEliminada(modelo=nombre, objeto_id=i, eliminada=ahora) for i in ids])
+
+
+def purgar_eliminadas(lote=1000):
+    """Borra las FilaEliminada más viejas que RETENCION; devuelve cuántas."""
+    limite = timezone.now() - RETENCION
+    borradas = 0
+    while True:
+        ids = list(FilaEliminada.objects.filter(eliminada__lt=limite).values_list("id", flat=True)[:lote])
+        if not ids:
+            return borradas
+        borradas += FilaEliminada.objects.filter(id__in=ids).delete()[0]
@@ -0,0 +1,41 @@
+# =====================================================================
+# SQLITE.PY - Ajustes de rendimiento para cada conexión SQLite
+# =====================================================================
+# SQLite guarda algunos ajustes por conexión (PRAGMA), así que hay que
+# aplicarlos cada vez que Django abre una. La señal connection_created
+# llama a aplicar_pragmas() (se conecta en apps.py) con los valores de
+# settings.SQLITE_PRAGMAS, por ejemplo:
+#     journal_mode=WAL     los lectores siguen leyendo mientras se escribe
+#     synchronous=NORMAL   menos esperas al disco (seguro con WAL)
+#     busy_timeout=5000    esperar el candado en vez de fallar al instante
+#
+# Con CONN_MAX_AGE > 0 la conexión se reusa entre peticiones, así que
+# esto se ejecuta una vez por conexión y no una vez por petición.
+# =====================================================================
+
+from django.conf import settings
+
+
+def pragmas():
+    return getattr(settings, "SQLITE_PRAGMAS", {})
+
+
+def aplicar_pragmas(sender, connection, **kwargs):
+    # Receptor de connection_created
+    if connection.vendor != "sqlite":
+        return
+    # Directo sobre la conexión de sqlite3: no pasa por los wrappers de
+    # métricas ni cuenta como consulta de la petición
+    for nombre, valor in pragmas().items():
+        connection.connection.execute(f"PRAGMA {nombre} = {valor}")
+
+
+def estado(connection):
+    """Valores actuales de los PRAGMA configurados (para verificar)."""
+    with connection.cursor() as cursor:
+        resultado = {}
+        for nombre in pragmas():
+            cursor.execute(f"PRAGMA {nombre}")
+            fila = cursor.fetchone()
+            resultado[nombre] = fila[0] if fila else None
+        return resultado
@@ -0,0 +1,50 @@
+// =====================================================================
+// LOTES.JS - Barra de acciones en lote de las listas (ver pruapp/lotes.py)
+// =====================================================================
+// - Pide confirmación y no envía nada si no hay filas marcadas.
+// - Copia el token CSRF de la cookie al formulario (la página puede
+//   venir del cache, así que no trae un token propio).
+// - La casilla del encabezado (data-marcar="lote-...") marca todas.
+// =====================================================================
+(function () {
+    function leerCookie(nombre) {
+        var partes = document.cookie ? document.cookie.split("; ") : [];
+        for (var i = 0; i < partes.length; i++) {
+            var igual = partes[i].indexOf("=");
+            if (partes[i].slice(0, igual) === nombre) {
+                return decodeURIComponent(partes[i].slice(igual + 1));
+            }
+        }
+        return "";
+    }
+
+    function casillas(formulario) {
+        return document.querySelectorAll('input[name="ids"][form="' + formulario.id + '"]');
+    }
+
+    document.querySelectorAll("form.barra-lote").forEach(function (formulario) {
+        formulario.addEventListener("submit", function (evento) {
+            var marcadas = Array.prototype.filter.call(casillas(formulario), function (c) { return c.checked; }).length;
+            var accion = formulario.elements.accion;
+            var texto = accion.options[accion.selectedIndex].text;
+            if (!marcadas) {
+                evento.preventDefault();
+                alert("Marca al menos una fila.");
+                return;
+            }
+            if (!confirm("¿" + texto + ": " + marcadas + " fila(s)?")) {
+                evento.preventDefault();
+                return;
+            }
+            formulario.elements.csrfmiddlewaretoken.value = leerCookie(formulario.dataset.cookieCsrf);
+        });
+    });
+
+    document.querySelectorAll("input[data-marcar]").forEach(function (todas) {
+        todas.addEventListener("change", function () {
+            casillas(document.getElementById(todas.dataset.marcar)).forEach(function (c) {
+                c.checked = todas.checked;
+            });
+        });
+    });
+})();
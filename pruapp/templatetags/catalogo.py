@@ -0,0 +1,66 @@
+# =====================================================================
+# TEMPLATETAGS/CATALOGO.PY - Etiquetas para las plantillas
+# =====================================================================
+# Uso en una plantilla:
+#   {% load cache catalogo %}
+#   {% version_catalogo "producto" as version %}
+#   {% cache 300 filas_menu version request.get_full_path %} ... {% endcache %}
+# Así el fragmento se vuelve a generar cuando cambia algún Producto.
+#
+#   {% miniatura producto.imagen_hash 60 %}  -> /miniaturas/<hash>-60.webp
+#   {% paquete_css 'pruapp/css/app.css' %}    -> <link> del CSS (ver estaticos.py)
+#   {% acciones_lote 'productos' %}           -> barra de acciones en lote (ver lotes.py)
+# =====================================================================
+
+from django import template
+from django.conf import settings
+from django.contrib.staticfiles.storage import staticfiles_storage
+from django.templatetags.static import static
+from django.utils.html import format_html_join
+
+from pruapp import miniaturas
+from pruapp.lotes import LISTAS
+from pruapp.estaticos import PAQUETES
+from pruapp.cache import versiones
+
+register = template.Library()
+
+
+@register.simple_tag(takes_context=True)
+def version_catalogo(context, *nombres):
+    # Devuelve un texto como "producto=7" para usar en la llave del cache.
+    # Si la vista está cacheada usa las versiones que se leyeron antes
+    # que las filas (ver cache.py); si no, las consulta.
+    leidas = getattr(context.get("request"), "versiones_catalogo", {})
+    if all(nombre in leidas for nombre in nombres):
+        actuales = {nombre: leidas[nombre] for nombre in nombres}
+    else:
+        actuales = versiones(*nombres)
+    return ",".join(f"{nombre}={version}" for nombre, version in sorted(actuales.items()))
+
+
+@register.simple_tag
+def miniatura(hash_imagen, tamano):
+    # URL de la miniatura ya generada (ver miniaturas.py)
+    return miniaturas.url(hash_imagen, tamano)
+
+
+@register.simple_tag
+def paquete_css(nombre):
+    # Después de collectstatic: un solo <link> al paquete minificado con
+    # hash. Si no se armó (desarrollo, pruebas): un <link> por archivo.
+    if nombre in getattr(staticfiles_storage, "hashed_files", {}):
+        archivos = [nombre]
+    else:
+        archivos = PAQUETES[nombre]
+    return format_html_join("\n    ", '<link rel="stylesheet" href="{}">', ((static(archivo),) for archivo in archivos))
+
+
+@register.inclusion_tag("acciones_lote.html")
+def acciones_lote(lista):
+    # Las casillas de cada fila van con form="lote-<lista>"
+    return {
+        "lista": lista,
+        "acciones": [(valor, texto) for valor, (texto, _) in LISTAS[lista][2].items()],
+        "cookie_csrf": settings.CSRF_COOKIE_NAME,
+    }
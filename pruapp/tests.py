@@ -1,3 +1,1455 @@
-from django.test import TestCase
+# =====================================================================
+# TESTS.PY - Presupuesto de consultas SQL por URL
+# =====================================================================
+# Cada prueba pide una URL con 30 filas en cada tabla y verifica que no
+# pase de un número fijo de consultas (ver consultas.py). Si alguien
+# agrega a una plantilla algo que consulta la base de datos por cada
+# fila (N+1), la cuenta sube a 30+ y la prueba falla mostrando las
+# consultas repetidas.
+#
+# test_todas_las_urls_tienen_presupuesto obliga a que cada URL nueva de
+# urls.py tenga aquí su prueba.
+#
+# Correr con:  python manage.py test pruapp
+# =====================================================================
 
-# Create your tests here.
+import asyncio
+from importlib import import_module
+from importlib.util import find_spec, module_from_spec
+from http.server import BaseHTTPRequestHandler, HTTPServer
+import io
+import socket
+import threading
+import time
+from datetime import timedelta
+from decimal import Decimal
+import tempfile
+import unittest
+from pathlib import Path
+from unittest import mock
+
+from asgiref.sync import sync_to_async
+from django.apps import apps as django_apps
+from django.conf import settings
+from django.contrib.auth.hashers import check_password, make_password
+from django.core.exceptions import ImproperlyConfigured
+from django.contrib.sessions.models import Session
+from django.contrib.staticfiles.storage import staticfiles_storage
+from django.db import connection
+from django.db.migrations.executor import MigrationExecutor
+from django.db.models import Sum
+from django.test import AsyncClient, Client, RequestFactory, SimpleTestCase, TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import resolve, reverse
+from django.utils import timezone
+
+from prueba2.basedatos import base_desde_url
+
+from . import (
+    alertas, api, busqueda, contrasenas, eventos, intercambio, inventario, kpis, miniaturas, paginacion, pronostico,
+    sincronizacion, urls, views_async,
+)
+from .cache import cache_vistas, cachear_vista, versiones
+from .cantidades import factor_conversion, parsear_cantidad
+from .estaticos import minificar_css
+from .consultas import PresupuestoConsultasMixin, presupuesto_consultas, ExcedePresupuesto
+from .models import (
+    Practica, Producto, Insumo, Empleado, AlertaStock, InsumoMovimiento, InsumoPendiente, InsumoSaldo, ResumenDashboard,
+    VersionCatalogo,
+)
+from .routers import RouterReplica, usar_replica
+from .sesion import recordar_usuario
+from .management.commands.explicar_consultas import CONSULTAS_INDICES, plan, recorridos_completos
+from .management.commands.purgar_sesiones import purgar
+from .management.commands.canal_eventos import CanalPubSub
+
+FILAS = 30
+
+# Cifrado rápido: aquí se mide SQL, no el costo del hash
+HASH_RAPIDO = ["django.contrib.auth.hashers.MD5PasswordHasher"]
+
+
+@override_settings(PASSWORD_HASHERS=HASH_RAPIDO)
+class PresupuestoBase(PresupuestoConsultasMixin, TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.usuario = Practica.objects.create(username="admin", password=contrasenas.cifrar("clave"))
+        Producto.objects.bulk_create(
+            [Producto(nombre=f"Producto {i}", precio=1000 * i, stock=i % 2 == 0) for i in range(FILAS)]
+        )
+        Insumo.objects.bulk_create(
+            [Insumo(nombre=f"Insumo {i}", cantidad=i, umbral=10) for i in range(FILAS)]
+        )
+        Empleado.objects.bulk_create(
+            [Empleado(nombre=f"Empleado {i}", rol="Mesero", edad=20 + i, telefono="300") for i in range(FILAS)]
+        )
+        # El motor de búsqueda se elige una vez (consulta sqlite_master): que
+        # no caiga dentro del presupuesto de la primera prueba que indexe
+        busqueda.motor()
+        cls.producto = Producto.objects.first()
+        cls.insumo = Insumo.objects.first()
+        cls.empleado = Empleado.objects.first()
+
+    def setUp(self):
+        # Sin cache, para medir el peor caso (la primera visita)
+        cache_vistas().clear()
+        contrasenas.reiniciar_pool()
+        sesion = self.client.session
+        sesion["usuario_id"] = self.usuario.id
+        sesion["usuario_nombre"] = self.usuario.username
+        sesion.save()
+        # Con SESIONES=firmada la llave (la cookie) cambia en cada save()
+        self.client.cookies[settings.SESSION_COOKIE_NAME] = sesion.session_key
+        # Datos del usuario ya en cache, como en una petición normal (y
+        # no los de otra corrida de las pruebas con el mismo id)
+        recordar_usuario(self.usuario.id)
+
+
+# =====================================================================
+# PÁGINAS SIMPLES Y SESIÓN
+# =====================================================================
+class PresupuestoPaginasTests(PresupuestoBase):
+    def test_paginas_estaticas(self):
+        for nombre in ("home1", "bye1", "principal", "plantilla"):
+            with self.subTest(nombre):
+                self.assertPresupuesto(0, reverse(nombre))
+
+    def test_welcome(self):
+        self.assertPresupuesto(0, reverse("welcome"))
+
+    def test_formulario(self):
+        self.assertPresupuesto(0, reverse("formulario"))
+        datos = {"username": "nuevo", "password": "clave"}
+        self.assertPresupuesto(2, reverse("formulario"), "post", data=datos)
+
+    def test_login(self):
+        self.client.logout()
+        self.assertPresupuesto(0, reverse("login"))
+        datos = {"username": "admin", "password": "clave"}
+        self.assertPresupuesto(5, reverse("login"), "post", data=datos)
+
+    def test_logout(self):
+        self.assertPresupuesto(2, reverse("logout"))
+
+    def test_metricas(self):
+        self.assertPresupuesto(0, reverse("metricas"))
+
+
+@override_settings(METRICAS=True, METRICAS_TOKEN="secreto")
+class MetricasTests(PresupuestoBase):
+    def metricas(self, cliente, **cabeceras):
+        return cliente.get(reverse("metricas"), headers=cabeceras)
+
+    def test_apagadas(self):
+        with override_settings(METRICAS=False):
+            self.assertEqual(self.metricas(Client(), Authorization="Bearer secreto").status_code, 404)
+
+    def test_sin_token_no_se_publican(self):
+        # Ni anónimo ni con sesión: solo con el token
+        for cliente in (Client(), self.client):
+            respuesta = self.metricas(cliente)
+            self.assertEqual(respuesta.status_code, 401)
+            self.assertEqual(respuesta["WWW-Authenticate"], 'Bearer realm="metrics"')
+            self.assertNotIn(b"# TYPE", respuesta.content)
+        for cabecera in ("Bearer otro", "Bearer secret", "Basic secreto", "secreto", "Bearer "):
+            with self.subTest(cabecera):
+                self.assertEqual(self.metricas(Client(), Authorization=cabecera).status_code, 401)
+
+    def test_sin_token_configurado_no_responde_a_nadie(self):
+        with override_settings(METRICAS_TOKEN=""):
+            self.assertEqual(self.metricas(Client(), Authorization="Bearer ").status_code, 401)
+
+    def test_con_token(self):
+        respuesta = self.metricas(Client(), Authorization="Bearer secreto")
+        self.assertEqual(respuesta.status_code, 200)
+        self.assertIn(b"# TYPE", respuesta.content)
+
+
+class SesionesTests(PresupuestoBase):
+    # Los presupuestos de arriba valen con cualquier motor (SESIONES=db
+    # suma una consulta); aquí se verifica que con "cache" la tabla de
+    # sesiones no se lee en cada petición
+    @override_settings(SESSION_ENGINE="django.contrib.sessions.backends.cached_db")
+    def test_sesion_en_cache_no_consulta_la_tabla(self):
+        sesion = self.client.session
+        sesion["usuario_id"] = self.usuario.id
+        sesion.save()
+        self.client.cookies[settings.SESSION_COOKIE_NAME] = sesion.session_key
+        with CaptureQueriesContext(connection) as capturadas:
+            self.assertEqual(self.client.get(reverse("menu_list")).status_code, 200)
+        self.assertFalse([c["sql"] for c in capturadas.captured_queries if "django_session" in c["sql"]])
+
+    @override_settings(SESSION_ENGINE="django.contrib.sessions.backends.cached_db")
+    def test_purgar_borra_solo_las_vencidas(self):
+        ahora = timezone.now()
+        Session.objects.bulk_create(
+            [Session(session_key=f"vencida{i}", session_data="", expire_date=ahora - timedelta(days=1)) for i in range(5)]
+            + [Session(session_key="vigente", session_data="", expire_date=ahora + timedelta(days=1))]
+        )
+        self.assertEqual(purgar(lote=2), 5)
+        self.assertTrue(Session.objects.filter(session_key="vigente").exists())
+        self.assertFalse(Session.objects.filter(session_key__startswith="vencida").exists())
+
+    def test_usuario_en_cache_no_consulta_practica(self):
+        with CaptureQueriesContext(connection) as capturadas:
+            self.assertEqual(self.client.get(reverse("menu_list")).status_code, 200)
+        self.assertFalse([c["sql"] for c in capturadas.captured_queries if "pruapp_practica" in c["sql"]])
+
+    def test_actualizar_usuario_renueva_los_datos(self):
+        datos = {"username": "admin2", "password": "", "imagen_url": "https://ejemplo.com/a.png"}
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(reverse("actualizar_usuario", args=[self.usuario.id]), datos)
+        respuesta = self.client.get(reverse("usuarios"))
+        self.assertContains(respuesta, "<strong class=\"text-accent\">admin2</strong>", html=False)
+        self.assertContains(respuesta, 'src="https://ejemplo.com/a.png" alt="Avatar" class="avatar avatar-mini"')
+
+    def test_usuario_eliminado_pierde_la_sesion(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.get(reverse("eliminar_usuario", args=[self.usuario.id]))
+        self.assertRedirects(self.client.get(reverse("menu_list")), reverse("login"))
+        self.assertNotIn("usuario_id", self.client.session)
+
+
+# =====================================================================
+# CONTRASEÑAS
+# =====================================================================
+class ContrasenasTests(PresupuestoBase):
+    def test_verificar(self):
+        valor = contrasenas.cifrar("clave")
+        self.assertTrue(contrasenas.es_hash(valor))
+        self.assertTrue(contrasenas.verificar("clave", valor))
+        self.assertFalse(contrasenas.verificar("otra", valor))
+        # Usuarios antiguos en texto plano
+        self.assertTrue(contrasenas.verificar("clave", "clave"))
+        self.assertFalse(contrasenas.verificar("otra", "clave"))
+        self.assertFalse(contrasenas.verificar(None, "clave"))
+
+    def login(self, username, password):
+        self.client.logout()
+        return self.client.post(reverse("login"), {"username": username, "password": password})
+
+    @override_settings(PASSWORD_HASHERS=HASH_RAPIDO + ["django.contrib.auth.hashers.PBKDF2PasswordHasher"])
+    def test_el_login_vuelve_a_cifrar(self):
+        plano = Practica.objects.create(username="antiguo", password="clave")
+        viejo = Practica.objects.create(
+            username="pbkdf2", password=make_password("clave", hasher="pbkdf2_sha256"),
+        )
+        for usuario in (plano, viejo):
+            with self.subTest(usuario.username):
+                self.assertRedirects(self.login(usuario.username, "clave"), reverse("dashboard"), fetch_redirect_response=False)
+                usuario.refresh_from_db()
+                self.assertFalse(contrasenas.necesita_rehash(usuario.password))
+                self.assertTrue(usuario.password.startswith("md5$"))
+
+    def test_login_incorrecto_no_cambia_nada(self):
+        Practica.objects.create(username="antiguo", password="clave")
+        respuesta = self.login("antiguo", "otra")
+        self.assertEqual(respuesta.context["error"], "Contraseña incorrecta")
+        self.assertEqual(Practica.objects.get(username="antiguo").password, "clave")
+        self.assertNotIn("usuario_id", self.client.session)
+        self.assertEqual(self.login("nadie", "clave").context["error"], "El usuario no existe")
+
+    def test_migracion_0009(self):
+        migracion = import_module("pruapp.migrations.0009_cifrar_contrasenas")
+        plano = Practica.objects.create(username="antiguo", password="clave")
+        cifrada = self.usuario.password
+        migracion.cifrar_texto_plano(django_apps, None)
+        plano.refresh_from_db()
+        self.assertTrue(contrasenas.es_hash(plano.password))
+        self.assertTrue(check_password("clave", plano.password))
+        # Las que ya tenían hash quedan igual
+        self.assertEqual(Practica.objects.get(id=self.usuario.id).password, cifrada)
+
+
+# =====================================================================
+# USUARIOS
+# =====================================================================
+class PresupuestoUsuariosTests(PresupuestoBase):
+    def test_usuarios(self):
+        self.assertPresupuesto(2, reverse("usuarios"))
+
+    def test_actualizar_usuario(self):
+        url = reverse("actualizar_usuario", args=[self.usuario.id])
+        self.assertPresupuesto(2, url)
+        self.assertPresupuesto(3, url, "post", data={"username": "admin2", "password": ""})
+
+    def test_eliminar_usuario(self):
+        otro = Practica.objects.create(username="otro", password="x")
+        self.assertPresupuesto(3, reverse("eliminar_usuario", args=[otro.id]))
+
+
+# =====================================================================
+# DASHBOARD Y LISTAS
+# =====================================================================
+class PresupuestoListasTests(PresupuestoBase):
+    def test_dashboard(self):
+        # Con NumPy, el panel de pronóstico: último movimiento, insumos y
+        # consumo (se calcula y queda en cache) y los nombres a mostrar
+        self.assertPresupuesto(6 + (4 if pronostico.disponible() else 0), reverse("dashboard"))
+
+    def test_menu(self):
+        self.assertPresupuesto(4, reverse("menu_list"))
+        self.assertPresupuesto(4, reverse("menu_list") + "?q=producto")
+
+    def test_inventario(self):
+        self.assertPresupuesto(2, reverse("inventario_list"))
+        self.assertPresupuesto(2, reverse("inventario_list") + "?q=insumo")
+
+    def test_empleados(self):
+        self.assertPresupuesto(2, reverse("empleados_list"))
+        self.assertPresupuesto(2, reverse("empleados_list") + "?q=mesero")
+
+    def test_segunda_visita_en_cache(self):
+        self.client.get(reverse("menu_list"))
+        self.assertPresupuesto(2, reverse("menu_list"))
+
+    def test_costo_no_depende_de_las_filas(self):
+        # Con el doble de filas la página hace las mismas consultas
+        url = reverse("empleados_list") + "?tamano=100"
+        self.assertPresupuesto(2, url)
+        Empleado.objects.bulk_create(
+            [Empleado(nombre=f"Extra {i}", rol="Chef", edad=30, telefono="300") for i in range(FILAS)]
+        )
+        self.assertPresupuesto(2, url)
+
+
+# =====================================================================
+# PAGINACIÓN POR CURSOR
+# =====================================================================
+@override_settings(PAGINACION_TAMANO=5, PAGINACION_TAMANO_MAXIMO=10)
+class PaginacionTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        # Todas iguales salvo el id: el cursor no depende del nombre ni del precio
+        Producto.objects.bulk_create([Producto(nombre="Pan", precio=100, stock=True) for _ in range(12)])
+        cls.ids = list(Producto.objects.order_by("id").values_list("id", flat=True))
+
+    def pagina(self, parametros=""):
+        return paginacion.paginar(Producto.objects.all(), RequestFactory().get("/menu/" + parametros))
+
+    def ids_de(self, pagina):
+        return [producto.id for producto in pagina]
+
+    def test_avanzar_y_retroceder(self):
+        primera = self.pagina("?q=pan")
+        self.assertEqual(self.ids_de(primera), self.ids[:5])
+        self.assertIsNone(primera.url_anterior)
+        self.assertEqual(primera.url_siguiente, f"?q=pan&despues={self.ids[4]}")
+
+        segunda = self.pagina(primera.url_siguiente)
+        self.assertEqual(self.ids_de(segunda), self.ids[5:10])
+        self.assertEqual(segunda.url_anterior, f"?q=pan&antes={self.ids[5]}")
+
+        self.assertEqual(self.ids_de(self.pagina(segunda.url_anterior)), self.ids[:5])
+        self.assertIsNone(self.pagina(segunda.url_anterior).url_anterior)
+
+    def test_ultima_pagina(self):
+        ultima = self.pagina(f"?despues={self.ids[9]}")
+        self.assertEqual(self.ids_de(ultima), self.ids[10:])
+        self.assertIsNone(ultima.url_siguiente)
+        # Desde la última se vuelve a la anterior completa
+        self.assertEqual(self.ids_de(self.pagina(ultima.url_anterior)), self.ids[5:10])
+        # Con el último id no hay más filas (no un error)
+        vacia = self.pagina(f"?despues={self.ids[-1]}")
+        self.assertEqual((len(vacia), vacia.url_siguiente, vacia.url_anterior), (0, None, None))
+
+    def test_recorre_todo_sin_repetir_ni_saltar(self):
+        vistos, parametros = [], ""
+        while parametros is not None:
+            pagina = self.pagina(parametros)
+            vistos.extend(self.ids_de(pagina))
+            parametros = pagina.url_siguiente
+        self.assertEqual(vistos, self.ids)
+
+    def test_cursor_invalido_o_alterado(self):
+        # Lo que no es un entero positivo se ignora: primera página
+        for parametros in ("?despues=abc", "?despues=-3", "?despues=0", "?antes=1.5", "?despues="):
+            with self.subTest(parametros):
+                self.assertEqual(self.ids_de(self.pagina(parametros)), self.ids[:5])
+        # Un id que no existe sigue siendo un límite válido
+        self.assertEqual(self.ids_de(self.pagina(f"?despues={self.ids[-1] + 1000}")), [])
+        self.assertEqual(self.ids_de(self.pagina(f"?antes={self.ids[0]}")), [])
+
+    def test_tamano_limitado(self):
+        self.assertEqual(len(self.pagina("?tamano=3")), 3)
+        self.assertEqual(len(self.pagina("?tamano=1000")), 10)
+        self.assertEqual(len(self.pagina("?tamano=-1")), 5)
+
+    async def test_version_async(self):
+        request = RequestFactory().get(f"/menu/?despues={self.ids[4]}")
+        pagina = await paginacion.apaginar(Producto.objects.all(), request)
+        self.assertEqual(self.ids_de(pagina), self.ids[5:10])
+
+
+# =====================================================================
+# BÚSQUEDA
+# =====================================================================
+class BusquedaTests(PresupuestoBase):
+    def motores(self):
+        # FTS5 (el de estas pruebas) y el respaldo en memoria
+        return [busqueda.MotorFTS5(), busqueda.MotorMemoria()]
+
+    def ids(self, motor, modelo, consulta, limite=10):
+        # IDs de la primera página, del más relevante al menos relevante
+        return [pk for _, pk in motor.pagina(modelo, consulta, limite)]
+
+    def test_relevancia(self):
+        luis = Empleado.objects.create(nombre="Luis", rol="Chef", edad=30, telefono="300")
+        ana = Empleado.objects.create(nombre="Ana Chef", rol="Mesera", edad=30, telefono="300")
+        harinas = Insumo.objects.create(nombre="Harinas especiales", cantidad=1, umbral=0)
+        harina = Insumo.objects.create(nombre="Harina", cantidad=1, umbral=0)
+        # FTS5: el nombre pesa más que el rol; memoria: la palabra exacta
+        # antes que el prefijo
+        self.assertEqual(self.ids(busqueda.MotorFTS5(), Empleado, "chef"), [ana.id, luis.id])
+        self.assertEqual(self.ids(busqueda.MotorMemoria(), Insumo, "harina"), [harina.id, harinas.id])
+
+    def test_prefijos_y_tildes(self):
+        azucar = Insumo.objects.create(nombre="Azúcar morena", cantidad=1, umbral=0)
+        for motor in self.motores():
+            with self.subTest(motor.nombre):
+                self.assertEqual(self.ids(motor, Insumo, "azu mor"), [azucar.id])
+                self.assertEqual(self.ids(motor, Insumo, "AZÚCAR"), [azucar.id])
+                self.assertEqual(self.ids(motor, Insumo, "azucarera"), [])
+                self.assertEqual(self.ids(motor, Insumo, "  ¿? "), [])
+
+    def test_sin_fts5_usa_el_motor_en_memoria(self):
+        self.addCleanup(setattr, busqueda, "_motor", busqueda._motor)
+        busqueda._motor = None
+        self.assertEqual(busqueda.motor().nombre, "fts5")
+        busqueda._motor = None
+        with mock.patch("pruapp.busqueda.fts5_disponible", return_value=False):
+            self.assertEqual(busqueda.motor().nombre, "memoria")
+
+    def test_el_indice_sigue_los_cambios(self):
+        # Con FTS5 por las señales; el motor en memoria es "otro proceso"
+        # (no recibe las señales) y se pone al día por la versión
+        memoria = busqueda.MotorMemoria()
+        self.assertEqual(self.ids(memoria, Insumo, "levadura"), [])
+        insumo = Insumo.objects.create(nombre="Levadura", cantidad=1, umbral=0)
+        for motor in self.motores() + [memoria]:
+            self.assertEqual(self.ids(motor, Insumo, "levadura"), [insumo.id])
+
+        insumo.nombre = "Sal"
+        insumo.save()
+        for motor in self.motores() + [memoria]:
+            with self.subTest(motor.nombre):
+                self.assertEqual(self.ids(motor, Insumo, "levadura"), [])
+                self.assertEqual(self.ids(motor, Insumo, "sal"), [insumo.id])
+
+        insumo.delete()
+        for motor in self.motores() + [memoria]:
+            with self.subTest(motor.nombre):
+                self.assertEqual(self.ids(motor, Insumo, "sal"), [])
+
+    def test_se_pueden_recorrer_todas_las_paginas(self):
+        ids = [Producto.objects.create(nombre=f"Pan {i}", precio=100, stock=True).id for i in range(12)]
+        Producto.objects.create(nombre="Queso", precio=100, stock=True)
+        self.addCleanup(setattr, busqueda, "_motor", busqueda._motor)
+        for motor in self.motores():
+            with self.subTest(motor.nombre):
+                busqueda._motor = motor
+                cache_vistas().clear()
+                vistos = []
+                url = reverse("menu_list") + "?q=pan&tamano=5"
+                while url:
+                    pagina = self.client.get(url).context["pagina"]
+                    vistos.extend(producto.id for producto in pagina)
+                    url = pagina.url_siguiente and reverse("menu_list") + pagina.url_siguiente
+                self.assertEqual(vistos, ids)
+
+    def test_las_paginas_van_por_relevancia(self):
+        # Creados en un orden distinto al de relevancia
+        for nombre in ("Panela", "Pan integral especial", "Queso", "Pan", "Pan de queso"):
+            Producto.objects.create(nombre=nombre, precio=100, stock=True)
+        self.addCleanup(setattr, busqueda, "_motor", busqueda._motor)
+        for motor in self.motores():
+            with self.subTest(motor.nombre):
+                busqueda._motor = motor
+                cache_vistas().clear()
+                ranking = self.ids(motor, Producto, "pan")
+                self.assertEqual(len(ranking), 4)
+                self.assertNotEqual(ranking, sorted(ranking))
+                paginas = []
+                url = reverse("menu_list") + "?q=pan&tamano=3"
+                while url:
+                    pagina = self.client.get(url).context["pagina"]
+                    paginas.append([producto.id for producto in pagina])
+                    url = pagina.url_siguiente and reverse("menu_list") + pagina.url_siguiente
+                self.assertEqual(paginas, [ranking[:3], ranking[3:]])
+                # Y de vuelta desde la última
+                anterior = self.client.get(reverse("menu_list") + pagina.url_anterior).context["pagina"]
+                self.assertEqual([producto.id for producto in anterior], ranking[:3])
+                self.assertIsNone(anterior.url_anterior)
+
+
+# =====================================================================
+# FORMULARIOS DEL CATÁLOGO
+# =====================================================================
+class PresupuestoCatalogoTests(PresupuestoBase):
+    def test_producto(self):
+        self.assertPresupuesto(1, reverse("crear_producto"))
+        self.assertPresupuesto(2, reverse("editar_producto", args=[self.producto.id]))
+        self.assertPresupuesto(10, reverse("crear_producto"), "post",
+                               data={"nombre": "Nuevo", "precio": "100", "stock": "on"})
+        self.assertPresupuesto(8, reverse("editar_producto", args=[self.producto.id]), "post",
+                               data={"nombre": "Editado", "precio": "100"})
+        # Al eliminar se lee la fila bloqueada para los indicadores (ver kpis.py)
+        self.assertPresupuesto(8, reverse("eliminar_producto", args=[self.producto.id]))
+
+    def test_insumo(self):
+        self.assertPresupuesto(1, reverse("crear_insumo"))
+        self.assertPresupuesto(2, reverse("editar_insumo", args=[self.insumo.id]))
+        datos = {"nombre": "Harina", "cantidad": "5", "unidad": "KG", "umbral": "2", "fecha": "2025-08-27"}
+        # Sin saldo en KG (insumo nuevo; el de setUpTestData no pasó por el
+        # historial): se crea antes de bloquearlo, dos consultas más
+        self.assertPresupuesto(20, reverse("crear_insumo"), "post", data=datos)
+        self.assertPresupuesto(15, reverse("editar_insumo", args=[self.insumo.id]), "post", data=datos)
+        self.assertPresupuesto(14, reverse("eliminar_insumo", args=[self.insumo.id]))
+
+    def test_empleado(self):
+        self.assertPresupuesto(1, reverse("crear_empleado"))
+        self.assertPresupuesto(2, reverse("editar_empleado", args=[self.empleado.id]))
+        datos = {"nombre": "Ana", "rol": "Chef", "edad": "30", "telefono": "300", "estado": "on"}
+        self.assertPresupuesto(11, reverse("crear_empleado"), "post", data=datos)
+        self.assertPresupuesto(7, reverse("editar_empleado", args=[self.empleado.id]), "post", data=datos)
+        self.assertPresupuesto(8, reverse("eliminar_empleado", args=[self.empleado.id]))
+
+
+# =====================================================================
+# ACCIONES EN LOTE
+# =====================================================================
+class PresupuestoLotesTests(PresupuestoBase):
+    def setUp(self):
+        super().setUp()
+        # Los bulk_create de setUpTestData no pasan por los indicadores
+        kpis.reconstruir()
+
+    def lote(self, lista, accion, ids):
+        return reverse("acciones_en_lote", args=[lista]), {"accion": accion, "ids": ids}
+
+    def test_eliminar_productos(self):
+        # Mismo costo con 5 filas que con 20: las señales van por lote
+        # (más el SELECT ... FOR UPDATE que bloquea las filas, ver lotes.py)
+        ids = list(Producto.objects.values_list("id", flat=True))
+        url, datos = self.lote("productos", "eliminar", ids[:5])
+        self.assertPresupuesto(14, url, "post", data=datos)
+        url, datos = self.lote("productos", "eliminar", ids[5:25])
+        self.assertPresupuesto(14, url, "post", data=datos)
+        self.assertEqual(Producto.objects.count(), FILAS - 25)
+
+    def test_marcar_productos_agotados(self):
+        ids = list(Producto.objects.filter(stock=True).values_list("id", flat=True))
+        url, datos = self.lote("productos", "agotar", ids)
+        self.assertPresupuesto(12, url, "post", data=datos)
+        self.assertFalse(Producto.objects.filter(stock=True).exists())
+        self.assertEqual(kpis.indicadores()["resumen"].productos_en_stock, 0)
+
+    def test_insumos(self):
+        url, datos = self.lote("insumos", "eliminar", list(Insumo.objects.values_list("id", flat=True)))
+        # Los insumos de setUpTestData todavía no tienen saldo: se crean
+        self.assertPresupuesto(20, url, "post", data=datos)
+        self.assertFalse(Insumo.objects.exists())
+
+    def test_empleados(self):
+        ids = list(Empleado.objects.values_list("id", flat=True))
+        url, datos = self.lote("empleados", "desactivar", ids)
+        respuesta = self.assertPresupuesto(12, url, "post", data=datos, HTTP_ACCEPT="application/json")
+        self.assertEqual(respuesta.json(), {"accion": "desactivar", "filas": FILAS})
+        self.assertEqual(kpis.indicadores()["resumen"].empleados_inactivos, FILAS)
+
+    def test_usuarios(self):
+        otros = Practica.objects.bulk_create([Practica(username=f"u{i}", password="x") for i in range(5)])
+        url, datos = self.lote("usuarios", "eliminar", [u.id for u in otros])
+        self.assertPresupuesto(6, url, "post", data=datos)
+        self.assertEqual(Practica.objects.count(), 1)
+
+    def test_token_csrf_de_la_cookie(self):
+        # El menú sale del cache sin token propio: lotes.js envía el de la cookie
+        cliente = Client(enforce_csrf_checks=True)
+        cliente.cookies = self.client.cookies
+        cliente.get(reverse("menu_list"))
+        del cliente.cookies[settings.CSRF_COOKIE_NAME]
+        cliente.get(reverse("menu_list"))  # Desde el cache: igual manda la cookie
+        url, datos = self.lote("productos", "eliminar", [self.producto.id])
+        self.assertEqual(cliente.post(url, datos).status_code, 403)
+        datos["csrfmiddlewaretoken"] = cliente.cookies[settings.CSRF_COOKIE_NAME].value
+        self.assertRedirects(cliente.post(url, datos), reverse("menu_list"), fetch_redirect_response=False)
+
+    def test_solo_post_y_acciones_conocidas(self):
+        url, datos = self.lote("insumos", "agotar", [self.insumo.id])
+        self.assertEqual(self.client.get(url).status_code, 405)
+        self.assertEqual(self.client.post(url, datos).status_code, 400)
+        self.assertEqual(self.client.post(url, {"accion": "eliminar", "ids": "x"}).status_code, 400)
+
+
+# =====================================================================
+# INDICADORES DEL DASHBOARD
+# =====================================================================
+class KpisTests(PresupuestoBase):
+    def setUp(self):
+        super().setUp()
+        kpis.reconstruir()
+
+    def assertCuadra(self):
+        # Lo ajustado con +n / -n es igual a contar todo de nuevo
+        resumen = ResumenDashboard.objects.values().get(id=kpis.ID_RESUMEN)
+        kpis.reconstruir()
+        self.assertEqual(ResumenDashboard.objects.values().get(id=kpis.ID_RESUMEN), resumen)
+
+    def test_dos_ediciones_con_el_mismo_objeto_viejo(self):
+        # Dos peticiones leen el producto en stock y las dos lo agotan: la
+        # segunda parte de lo guardado, no de lo que tenía en memoria
+        primera = Producto.objects.filter(stock=True).first()
+        segunda = Producto.objects.get(id=primera.id)
+        antes = kpis.indicadores()["resumen"]
+        for producto in (primera, segunda):
+            producto.stock = False
+            producto.save()
+        despues = kpis.indicadores()["resumen"]
+        self.assertEqual(despues.productos_agotados, antes.productos_agotados + 1)
+        self.assertEqual(despues.productos_en_stock, antes.productos_en_stock - 1)
+        self.assertCuadra()
+
+    def test_eliminar_un_objeto_viejo(self):
+        viejo = Empleado.objects.filter(estado=True).first()
+        otro = Empleado.objects.get(id=viejo.id)
+        otro.estado = False
+        otro.save()
+        viejo.delete()  # En memoria sigue activo: se resta un inactivo
+        self.assertCuadra()
+
+
+class KpisTransaccionTests(TransactionTestCase):
+    # Sin la transacción de TestCase: save() abre la suya
+    def test_el_guardado_y_los_indicadores_van_juntos(self):
+        producto = Producto.objects.create(nombre="Pan", precio=100, stock=True)
+        producto.stock = False
+        with mock.patch.object(kpis, "aplicar", side_effect=RuntimeError):
+            with self.assertRaises(RuntimeError):
+                producto.save()
+        # Si no se pudieron ajustar los totales, el UPDATE tampoco queda
+        self.assertTrue(Producto.objects.get(id=producto.id).stock)
+
+
+# =====================================================================
+# API JSON
+# =====================================================================
+class PresupuestoApiTests(PresupuestoBase):
+    def test_lista_con_campos_y_cursor(self):
+        url = reverse("api_catalogo", args=["productos"])
+        datos = self.assertPresupuesto(3, url + "?fields=nombre,stock&tamano=10").json()
+        self.assertEqual(len(datos["resultados"]), 10)
+        self.assertEqual(set(datos["resultados"][0]), {"id", "nombre", "stock"})
+        siguiente = self.assertPresupuesto(3, datos["siguiente"]).json()
+        self.assertEqual(siguiente["resultados"][0]["id"], datos["resultados"][-1]["id"] + 1)
+        for recurso in ("insumos", "empleados"):
+            with self.subTest(recurso):
+                self.assertPresupuesto(3, reverse("api_catalogo", args=[recurso]))
+
+    def test_304_sin_leer_filas(self):
+        url = reverse("api_catalogo", args=["insumos"])
+        etag = self.client.get(url)["ETag"]
+        with CaptureQueriesContext(connection) as capturadas:
+            respuesta = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(respuesta.status_code, 304)
+        self.assertFalse([c for c in capturadas.captured_queries if "pruapp_insumo" in c["sql"]])
+        # Al cambiar la tabla el ETag ya no sirve
+        Insumo.objects.create(nombre="Sal", cantidad=1)
+        respuesta = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(respuesta.status_code, 200)
+        self.assertNotEqual(respuesta["ETag"], etag)
+
+    def test_errores(self):
+        url = reverse("api_catalogo", args=["empleados"])
+        self.assertEqual(self.client.get(url + "?fields=salario").status_code, 400)
+        self.assertEqual(self.client.post(url).status_code, 405)
+        self.assertEqual(self.client.get(reverse("api_catalogo", args=["usuarios"])).status_code, 404)
+        self.client.logout()
+        self.assertEqual(self.client.get(url).status_code, 401)
+
+
+class PresupuestoSincronizacionTests(PresupuestoBase):
+    def test_solo_lo_que_cambio(self):
+        url = reverse("sincronizar")
+        inicio = self.assertPresupuesto(1, url).json()
+        self.assertTrue(inicio["recargar"])
+
+        # Sin cambios: no llega ninguna fila, sin importar el tamaño del catálogo
+        with mock.patch.object(sincronizacion, "MARGEN", timedelta(0)):
+            vacio = self.assertPresupuesto(7, url + "?since=" + inicio["token"]).json()
+            self.assertFalse(vacio["recargar"])
+            self.assertEqual(vacio["productos"], {"cambios": [], "eliminados": []})
+
+            url_lote = reverse("acciones_en_lote", args=["productos"])
+            self.client.post(url_lote, {"accion": "agotar", "ids": [self.producto.id]})
+            eliminado = Empleado.objects.last().id
+            self.client.post(reverse("acciones_en_lote", args=["empleados"]), {"accion": "eliminar", "ids": [eliminado]})
+            datos = self.assertPresupuesto(7, url + "?since=" + vacio["token"]).json()
+        self.assertEqual([(p["id"], p["stock"]) for p in datos["productos"]["cambios"]], [(self.producto.id, False)])
+        self.assertEqual(datos["empleados"], {"cambios": [], "eliminados": [eliminado]})
+        self.assertEqual(datos["insumos"], {"cambios": [], "eliminados": []})
+
+    def test_token_viejo_o_no_valido(self):
+        url = reverse("sincronizar")
+        self.assertTrue(self.client.get(url + "?since=1").json()["recargar"])
+        self.assertEqual(self.client.get(url + "?since=ayer").status_code, 400)
+        # Números enormes: fuera de lo que acepta datetime (o un float)
+        for token in ("1" + "0" * 30, "9" * 400):
+            with self.subTest(token=token[:10]):
+                self.assertEqual(self.client.get(url + "?since=" + token).status_code, 400)
+        self.assertEqual(self.client.get(url + "?recursos=usuarios").status_code, 400)
+
+
+# =====================================================================
+# MOVIMIENTOS DE INVENTARIO
+# =====================================================================
+class InventarioTests(PresupuestoBase):
+    def setUp(self):
+        super().setUp()
+        # Los bulk_create de setUpTestData no pasan por el historial
+        inventario.cuadrar()
+
+    def editar(self, cantidad, unidad="KG"):
+        datos = {"nombre": "Harina", "cantidad": cantidad, "unidad": unidad, "umbral": "2"}
+        self.client.post(reverse("editar_insumo", args=[self.insumo.id]), datos)
+
+    def test_saldo_en_cada_fecha(self):
+        for cantidad in ("10", "4", "7", "1", "6", "2", "9"):
+            self.editar(cantidad)
+        movimientos = InsumoMovimiento.objects.filter(insumo_id=self.insumo.id).order_by("id")
+        self.assertEqual(
+            [(m.tipo, m.cantidad, m.saldo) for m in movimientos],
+            [("E", 10, 10), ("C", -6, 4), ("E", 3, 7), ("C", -6, 1), ("E", 5, 6), ("C", -4, 2), ("E", 7, 9)],
+        )
+        with self.assertNumQueries(1):
+            self.assertEqual(inventario.saldo(self.insumo.id), {"KG": 9})
+        self.assertEqual(inventario.saldo(self.insumo.id, hasta=movimientos[3].fecha), {"KG": 1})
+        self.assertEqual(
+            inventario.consumo(movimientos[0].fecha, timezone.now() + timedelta(1)), {self.insumo.id: {"KG": 16}},
+        )
+
+    def test_cambio_de_unidad(self):
+        # Dos ajustes: se cierra la unidad vieja y se abre la nueva, aunque
+        # el número sea el mismo; los saldos nunca mezclan unidades
+        self.editar("10")
+        self.editar("10000", "G")
+        self.editar("10", "KG")
+        movimientos = InsumoMovimiento.objects.filter(insumo_id=self.insumo.id).order_by("id")
+        self.assertEqual(
+            [(m.tipo, m.cantidad, m.unidad) for m in movimientos][-4:],
+            [("A", -10, "KG"), ("A", 10000, "G"), ("A", -10000, "G"), ("A", 10, "KG")],
+        )
+        self.assertEqual(inventario.saldo(self.insumo.id), {"KG": 10})
+        self.assertEqual(inventario.cuadrar(), 0)
+
+        self.client.get(reverse("eliminar_insumo", args=[self.insumo.id]))
+        self.assertEqual(inventario.saldo(self.insumo.id), {})
+
+    def test_el_saldo_se_suma_sin_leer_el_historial(self):
+        def escribir():
+            with CaptureQueriesContext(connection) as capturadas:
+                inventario.escribir([inventario._movimiento(self.insumo.id, "KG", Decimal(1), None)])
+            return [c["sql"] for c in capturadas.captured_queries]
+
+        escribir()  # Crea el saldo en KG
+        antes = escribir()
+        inventario.escribir([inventario._movimiento(self.insumo.id, "KG", Decimal(1), None) for _ in range(50)])
+        despues = escribir()
+        self.assertEqual(len(antes), len(despues))
+        self.assertFalse([sql for sql in despues if "SUM(" in sql or "COUNT(" in sql])
+        self.assertEqual(
+            InsumoSaldo.objects.get(insumo_id=self.insumo.id, unidad="KG").movimiento_id,
+            InsumoMovimiento.objects.latest("id").id,
+        )
+        self.assertEqual(inventario.saldo(self.insumo.id), {"KG": self.insumo.cantidad + 53})
+
+    def test_migracion_0017(self):
+        # Antes un cambio de unidad (10 KG -> 10 G) no dejaba movimiento
+        Insumo.objects.filter(id=self.insumo.id).update(cantidad=10, unidad="G")
+        InsumoMovimiento.objects.all().delete()
+        InsumoSaldo.objects.all().delete()
+        InsumoMovimiento.objects.create(insumo_id=self.insumo.id, tipo="E", cantidad=10, unidad="KG")
+        import_module("pruapp.migrations.0017_saldos_por_unidad").recalcular(django_apps, None)
+        self.assertEqual(
+            list(
+                InsumoMovimiento.objects.filter(insumo_id=self.insumo.id).order_by("id")
+                .values_list("cantidad", "unidad", "saldo")
+            ),
+            [(10, "KG", 10), (10, "G", 10), (-10, "KG", 0)],
+        )
+        self.assertEqual(inventario.saldo(self.insumo.id), {"G": 10})
+        self.assertEqual(inventario.cuadrar(), 0)
+
+    def test_importar_un_insert_por_lote(self):
+        archivo = io.BytesIO(
+            "id,nombre,cantidad,unidad\n".encode()
+            + "".join(f"{i.id},{i.nombre},{i.cantidad + 5},KG\n" for i in Insumo.objects.all()).encode()
+        )
+        archivo.name = "insumos.csv"
+        with CaptureQueriesContext(connection) as capturadas:
+            self.client.post(reverse("importar_datos", args=["insumos"]), {"formato": "csv", "archivo": archivo})
+        inserts = [c for c in capturadas.captured_queries if c["sql"].startswith('INSERT INTO "pruapp_insumomovimiento"')]
+        self.assertEqual(len(inserts), 1)
+        self.assertEqual(
+            inventario.saldos(),
+            {i.id: {i.unidad: i.cantidad} for i in Insumo.objects.all() if i.cantidad},
+        )
+        self.assertEqual(inventario.cuadrar(), 0)
+
+
+# =====================================================================
+# ALERTAS DE STOCK BAJO
+# =====================================================================
+class AlertasTests(TestCase):
+    def guardar(self, insumo, cantidad):
+        # La evaluación corre al confirmar la transacción
+        insumo.cantidad = cantidad
+        with self.captureOnCommitCallbacks(execute=True):
+            insumo.save()
+
+    def vigentes(self):
+        return list(AlertaStock.objects.values_list("insumo_id", "cantidad", "umbral"))
+
+    def test_crear_actualizar_y_borrar(self):
+        insumo = Insumo.objects.create(nombre="Harina", cantidad=10, unidad="KG", umbral=5)
+        self.guardar(insumo, 8)
+        self.assertEqual(self.vigentes(), [])
+
+        version = versiones("alerta")["alerta"]
+        self.guardar(insumo, 3)  # Cruza el umbral
+        self.assertEqual(self.vigentes(), [(insumo.id, 3, 5)])
+        self.assertGreater(versiones("alerta")["alerta"], version)
+
+        self.guardar(insumo, 2)  # Sigue bajo: la misma alerta, actualizada
+        self.assertEqual(self.vigentes(), [(insumo.id, 2, 5)])
+        self.guardar(insumo, 2)  # Sin cambios: nada nuevo
+        self.assertEqual(self.vigentes(), [(insumo.id, 2, 5)])
+
+        self.guardar(insumo, 5)  # Se recuperó (no está POR DEBAJO del umbral)
+        self.assertEqual(self.vigentes(), [])
+        self.assertFalse(InsumoPendiente.objects.exists())
+
+    def test_cargas_masivas_se_evaluan_despues(self):
+        insumos = Insumo.objects.bulk_create(
+            [Insumo(nombre=f"Insumo {i}", cantidad=i, unidad="UN", umbral=3) for i in range(6)]
+        )
+        alertas.marcar([i.id for i in insumos])
+        alertas.marcar([insumos[0].id])  # Marcar dos veces no duplica
+        self.assertEqual(alertas.evaluar_pendientes(tamano_lote=4), 6)
+        self.assertEqual(sorted(a[0] for a in self.vigentes()), [i.id for i in insumos[:3]])
+
+        # Sin marcas nuevas no se revisa nada y la versión del cache no cambia
+        version = versiones("alerta")["alerta"]
+        self.assertEqual(alertas.evaluar_pendientes(), 0)
+        alertas.marcar([i.id for i in insumos])
+        self.assertEqual(alertas.evaluar_pendientes(), 6)
+        self.assertEqual(versiones("alerta")["alerta"], version)
+        self.assertEqual(AlertaStock.objects.count(), 3)
+
+    def test_al_guardar_solo_se_evalua_ese_insumo(self):
+        # Lo que dejó marcado una importación espera a "evaluar_alertas"
+        pendientes = Insumo.objects.bulk_create(
+            [Insumo(nombre=f"Importado {i}", cantidad=0, unidad="UN", umbral=3) for i in range(5)]
+        )
+        alertas.marcar([i.id for i in pendientes])
+        insumo = Insumo.objects.create(nombre="Harina", cantidad=10, unidad="KG", umbral=5)
+        self.guardar(insumo, 1)
+        self.assertEqual(self.vigentes(), [(insumo.id, 1, 5)])
+        self.assertEqual(
+            sorted(InsumoPendiente.objects.values_list("insumo_id", flat=True)), [i.id for i in pendientes],
+        )
+
+    def test_dos_evaluaciones_a_la_vez(self):
+        # Otra evaluación creó la alerta entre la lectura y el INSERT
+        insumo = Insumo.objects.create(nombre="Sal", cantidad=1, unidad="KG", umbral=5)
+        AlertaStock.objects.create(insumo=insumo, cantidad=1, umbral=5)
+        with mock.patch.object(AlertaStock.objects, "filter", return_value=AlertaStock.objects.none()):
+            alertas.evaluar([insumo.id])
+        self.assertEqual(self.vigentes(), [(insumo.id, 1, 5)])
+
+    def test_eliminar_el_insumo_borra_la_alerta(self):
+        insumo = Insumo.objects.create(nombre="Sal", cantidad=10, unidad="KG", umbral=5)
+        self.guardar(insumo, 1)
+        insumo.delete()
+        self.assertEqual(self.vigentes(), [])
+
+
+# =====================================================================
+# CANTIDADES
+# =====================================================================
+class CantidadesTests(SimpleTestCase):
+    def test_parsear_cantidad(self):
+        casos = {
+            "15 KG": (Decimal("15"), "KG", ""),
+            "1,5": (Decimal("1.5"), "KG", ""),
+            "2.25 litros": (Decimal("2.25"), "L", ""),
+            "  300gr ": (Decimal("300"), "G", ""),
+            "10 Kg. de harina": (Decimal("10"), "KG", "de harina"),
+            "20 KG Hoy": (Decimal("20"), "KG", "Hoy"),
+            "5 Unidades": (Decimal("5"), "UN", ""),
+            "4 bolsas": (Decimal("4"), "KG", "bolsas"),  # No es una unidad: queda en el resto
+            "-3 ml": (Decimal("-3"), "ML", ""),
+        }
+        for texto, esperado in casos.items():
+            with self.subTest(texto):
+                self.assertEqual(parsear_cantidad(texto), esperado)
+        self.assertEqual(parsear_cantidad("7", unidad_por_defecto="UN"), (Decimal("7"), "UN", ""))
+
+    def test_textos_no_validos(self):
+        for texto in ("", "   ", None, "KG 15", "quince kilos", ",5"):
+            with self.subTest(texto=texto), self.assertRaises(ValueError):
+                parsear_cantidad(texto)
+
+    def test_factor_conversion(self):
+        self.assertEqual(factor_conversion("G", "KG"), Decimal("0.001"))
+        self.assertEqual(factor_conversion("L", "ML"), Decimal("1000"))
+        self.assertEqual(factor_conversion("UN", "UN"), Decimal("1"))
+        self.assertIsNone(factor_conversion("KG", "L"))
+
+
+class MigracionCantidadesTests(TransactionTestCase):
+    # Se vuelve a 0006 (cantidad en texto) y se aplica 0007 de verdad
+    antes = [("pruapp", "0006_busqueda_fts5")]
+    despues = [("pruapp", "0007_insumo_cantidad_numerica")]
+
+    def tearDown(self):
+        ejecutor = MigrationExecutor(connection)
+        ejecutor.migrate(ejecutor.loader.graph.leaf_nodes())
+
+    def test_texto_a_numero_y_unidad(self):
+        ejecutor = MigrationExecutor(connection)
+        ejecutor.migrate(self.antes)
+        Insumo = ejecutor.loader.project_state(self.antes).apps.get_model("pruapp", "Insumo")
+        textos = {"Harina": "15 KG", "Leche": "2,5 litros", "Sal": "300 gr Hoy", "Agua": "mucha"}
+        for nombre, cantidad in textos.items():
+            Insumo.objects.create(nombre=nombre, cantidad=cantidad, ultima_info="Nota" if nombre == "Agua" else "")
+
+        ejecutor = MigrationExecutor(connection)
+        ejecutor.loader.build_graph()
+        ejecutor.migrate(self.despues)
+        Insumo = ejecutor.loader.project_state(self.despues).apps.get_model("pruapp", "Insumo")
+        self.assertEqual(
+            {i.nombre: (i.cantidad, i.unidad, i.ultima_info) for i in Insumo.objects.all()},
+            {
+                "Harina": (Decimal("15"), "KG", ""),
+                "Leche": (Decimal("2.5"), "L", ""),
+                "Sal": (Decimal("300"), "G", "Hoy"),
+                # Lo que no se puede leer queda en 0 sin perder el texto
+                "Agua": (Decimal("0"), "KG", "Nota | Cantidad original: mucha"),
+            },
+        )
+
+
+@unittest.skipIf(not pronostico.disponible(), "NumPy no está instalado")
+class PronosticoTests(TestCase):
+    def test_suavizado_igual_que_dia_por_dia(self):
+        np = pronostico.np
+        consumo = np.random.default_rng(1).random((4, 30))
+        media, suavizado, restantes = pronostico.pronosticar(consumo, np.array([10.0, 0.0, 5.0, 1.0]))
+        for fila in range(4):
+            valor = consumo[fila, 0]
+            for x in consumo[fila, 1:]:
+                valor = pronostico.ALFA * x + (1 - pronostico.ALFA) * valor
+            self.assertAlmostEqual(suavizado[fila], valor)
+            self.assertAlmostEqual(media[fila], consumo[fila, -pronostico.VENTANA:].mean())
+        self.assertEqual(restantes[1], 0)
+
+    def test_diez_mil_insumos_en_menos_de_un_segundo(self):
+        np = pronostico.np
+        consumo = np.random.default_rng(0).random((10_000, 365))
+        inicio = time.perf_counter()
+        pronostico.pronosticar(consumo, np.full(10_000, 50.0))
+        self.assertLess(time.perf_counter() - inicio, 1.0)
+
+    def test_panel_en_cache_hasta_un_movimiento_nuevo(self):
+        cache_vistas().clear()
+        harina = Insumo.objects.create(nombre="Harina", cantidad=20)
+        Insumo.objects.create(nombre="Sal", cantidad=5)  # Sin consumo: no aparece
+        hoy = timezone.localdate()
+        # 2 por día durante la última semana
+        InsumoMovimiento.objects.bulk_create([
+            InsumoMovimiento(insumo_id=harina.id, tipo="C", cantidad=-2, unidad="KG",
+                             fecha=timezone.now() - timedelta(days=dia))
+            for dia in range(1, 8)
+        ])
+        proximos = pronostico.proximos_a_agotarse(hoy=hoy)
+        self.assertEqual([fila["insumo"].nombre for fila in proximos], ["Harina"])
+        self.assertAlmostEqual(proximos[0]["dias"], 10)
+
+        with self.assertNumQueries(2):  # Último movimiento + nombres: el cálculo está en cache
+            pronostico.proximos_a_agotarse(hoy=hoy)
+        harina.cantidad = 4
+        harina.save()  # Consumo de 16 hoy: no cuenta hasta mañana, pero cambia la cantidad
+        self.assertAlmostEqual(pronostico.proximos_a_agotarse(hoy=hoy)[0]["dias"], 2)
+
+    def test_consumo_en_la_unidad_actual(self):
+        # Pasó de KG a G: lo consumido en KG cuenta x1000; lo de otra
+        # magnitud (litros) no cuenta
+        azucar = Insumo.objects.create(nombre="Azúcar", cantidad=7000, unidad="G")
+        ayer = timezone.now() - timedelta(days=1)
+        InsumoMovimiento.objects.bulk_create([
+            InsumoMovimiento(insumo_id=azucar.id, tipo="C", cantidad=-1, unidad="KG", fecha=ayer),
+            InsumoMovimiento(insumo_id=azucar.id, tipo="C", cantidad=-500, unidad="G", fecha=ayer),
+            InsumoMovimiento(insumo_id=azucar.id, tipo="C", cantidad=-3, unidad="L", fecha=ayer),
+        ])
+        ids, cantidades, consumo = pronostico.matriz_consumo(dias=7)
+        self.assertEqual(consumo[list(ids).index(azucar.id), -1], 1500)
+
+
+# =====================================================================
+# VISTAS ASYNC (views_async.py)
+# =====================================================================
+def urls_async():
+    # urls.py elige las vistas al importarse: otra copia del módulo
+    # cargada con VISTAS_ASYNC usa las de views_async.py
+    spec = find_spec("pruapp.urls")
+    modulo = module_from_spec(spec)
+    with override_settings(VISTAS_ASYNC=True):
+        spec.loader.exec_module(modulo)
+    return modulo
+
+
+class VistasAsyncTests(PresupuestoBase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.enterClassContext(override_settings(ROOT_URLCONF=urls_async()))
+
+    def setUp(self):
+        super().setUp()
+        self.async_client.cookies = self.client.cookies
+
+    def test_usa_las_vistas_async(self):
+        self.assertIs(resolve(reverse("login")).func, views_async.login)
+        self.assertIs(resolve(reverse("menu_list")).func, views_async.menu_list)
+        self.assertIs(resolve(reverse("eliminar_producto", args=[1])).func, views_async.eliminar_producto)
+
+    async def test_login_redirige_al_dashboard(self):
+        cliente = AsyncClient()
+        respuesta = await cliente.post(reverse("login"), {"username": "admin", "password": "clave"})
+        self.assertRedirects(respuesta, reverse("dashboard"), fetch_redirect_response=False)
+        sesion = await cliente.asession()
+        self.assertEqual(await sesion.aget("usuario_id"), self.usuario.id)
+
+    async def test_login_incorrecto(self):
+        cliente = AsyncClient()
+        respuesta = await cliente.post(reverse("login"), {"username": "admin", "password": "otra"})
+        self.assertEqual(respuesta.status_code, 200)
+        self.assertEqual(respuesta.context["error"], "Contraseña incorrecta")
+        respuesta = await cliente.post(reverse("login"), {"username": "nadie", "password": "clave"})
+        self.assertEqual(respuesta.context["error"], "El usuario no existe")
+        self.assertNotIn(settings.SESSION_COOKIE_NAME, cliente.cookies)
+
+    async def test_eliminar_redirige_y_borra_la_fila(self):
+        casos = [
+            ("eliminar_producto", "menu_list", self.producto),
+            ("eliminar_insumo", "inventario_list", self.insumo),
+            ("eliminar_empleado", "empleados_list", self.empleado),
+        ]
+        for nombre, lista, fila in casos:
+            with self.subTest(nombre):
+                respuesta = await self.async_client.post(reverse(nombre, args=[fila.id]))
+                self.assertRedirects(respuesta, reverse(lista), fetch_redirect_response=False)
+                self.assertFalse(await type(fila).objects.filter(id=fila.id).aexists())
+                # Otra vez: ya no existe
+                respuesta = await self.async_client.post(reverse(nombre, args=[fila.id]))
+                self.assertEqual(respuesta.status_code, 404)
+
+    async def test_eliminar_sin_sesion_no_borra(self):
+        respuesta = await AsyncClient().post(reverse("eliminar_producto", args=[self.producto.id]))
+        self.assertRedirects(respuesta, reverse("login"), fetch_redirect_response=False)
+        self.assertTrue(await Producto.objects.filter(id=self.producto.id).aexists())
+
+    async def test_paginas_con_cursor(self):
+        ids = [pk async for pk in Producto.objects.order_by("id").values_list("id", flat=True)]
+        vistos, parametros = [], "?tamano=7"
+        while parametros is not None:
+            respuesta = await self.async_client.get(reverse("menu_list") + parametros)
+            self.assertEqual(respuesta.status_code, 200)
+            pagina = respuesta.context["pagina"]
+            vistos.extend(producto.id for producto in pagina)
+            parametros = pagina.url_siguiente
+        self.assertEqual(vistos, ids)
+        # Desde la última página (incompleta) se vuelve a la anterior completa
+        resto = FILAS % 7
+        respuesta = await self.async_client.get(reverse("menu_list") + pagina.url_anterior)
+        self.assertEqual([producto.id for producto in respuesta.context["pagina"]], ids[-resto - 7:-resto])
+
+    async def test_busqueda_con_cursor(self):
+        # Las de setUpTestData se crearon con bulk_create (sin indexar)
+        for nombre in ("Harina", "Harina de trigo", "Harina de maíz", "Sal", "Harina integral"):
+            await Insumo.objects.acreate(nombre=nombre, cantidad=1, umbral=0)
+        motor = busqueda.motor()
+        ranking = [pk for _, pk in await sync_to_async(motor.pagina)(Insumo, "harina", 10)]
+        paginas, url = [], reverse("inventario_list") + "?q=harina&tamano=3"
+        while url:
+            pagina = (await self.async_client.get(url)).context["pagina"]
+            paginas.append([insumo.id for insumo in pagina])
+            url = pagina.url_siguiente and reverse("inventario_list") + pagina.url_siguiente
+        self.assertEqual(paginas, [ranking[:3], ranking[3:]])
+
+
+# =====================================================================
+# EVENTOS EN VIVO (SSE)
+# =====================================================================
+class EventosTests(PresupuestoBase):
+    CLIENTES = 50
+
+    def setUp(self):
+        super().setUp()
+        self.async_client.cookies = self.client.cookies
+
+    def test_con_wsgi_no_se_abre(self):
+        # Con WSGI el flujo sin fin colgaría el worker
+        respuesta = self.assertPresupuesto(1, reverse("eventos"))
+        self.assertEqual(respuesta.status_code, 501)
+        self.assertEqual(respuesta["Content-Type"], "application/json")
+        self.assertIn("ASGI", respuesta.json()["error"])
+
+    async def test_abrir_la_conexion(self):
+        respuesta = await self.async_client.get(reverse("eventos"))
+        self.assertEqual(respuesta["Content-Type"], "text/event-stream")
+        flujo = aiter(respuesta.streaming_content)
+        self.assertTrue((await anext(flujo)).startswith(b"retry:"))
+        await flujo.aclose()
+
+    def agotar(self, producto_id):
+        with self.captureOnCommitCallbacks(execute=True):
+            producto = Producto.objects.get(id=producto_id)
+            producto.stock = not producto.stock
+            producto.save()
+            # Guardar sin cambiar el stock no genera otro evento
+            producto.save()
+
+    async def conectar(self, n):
+        flujos = []
+        for _ in range(n):
+            respuesta = await self.async_client.get(reverse("eventos"))
+            flujo = aiter(respuesta.streaming_content)
+            await anext(flujo)  # "retry:": la conexión ya está suscrita
+            flujos.append(flujo)
+        return flujos
+
+    async def test_n_clientes_reciben_el_evento(self):
+        antes = eventos.difusor.suscriptores()
+        flujos = await self.conectar(self.CLIENTES)
+        self.assertEqual(eventos.difusor.suscriptores() - antes, self.CLIENTES)
+
+        inicio = time.perf_counter()
+        await sync_to_async(self.agotar)(self.producto.id)
+
+        async def recibir(flujo):
+            texto = (await asyncio.wait_for(anext(flujo), 5)).decode()
+            return time.perf_counter() - inicio, texto
+
+        recibidos = await asyncio.gather(*(recibir(f) for f in flujos))
+        latencias = sorted(latencia for latencia, _ in recibidos)
+        self.assertTrue(all("event: producto" in texto for _, texto in recibidos))
+        self.assertIn(f'"id": {self.producto.id}', recibidos[0][1])
+        # Entrega a todos en el mismo recorrido del event loop (sin sondeos)
+        self.assertLess(latencias[int(len(latencias) * 0.95)], 1.0)
+        for flujo in flujos:
+            await flujo.aclose()
+
+    async def test_desconectar_quita_la_suscripcion(self):
+        flujo = eventos.flujo()
+        await anext(flujo)
+        self.assertEqual(eventos.difusor.suscriptores(), 1)
+        await flujo.aclose()
+        self.assertEqual(eventos.difusor.suscriptores(), 0)
+
+    async def test_canal_compatible_con_redis(self):
+        # Dos "workers" simulados: el evento pasa por el canal de canal_eventos
+        servidor = await asyncio.start_server(CanalPubSub().atender, "127.0.0.1", 0)
+        puerto = servidor.sockets[0].getsockname()[1]
+        try:
+            with override_settings(EVENTOS_REDIS_URL=f"redis://127.0.0.1:{puerto}/"):
+                flujos = await self.conectar(2)
+                await asyncio.sleep(0.2)  # Que la escucha alcance a suscribirse
+                await sync_to_async(eventos.publicar, thread_sensitive=False)("insumo", {"id": 1})
+                for flujo in flujos:
+                    texto = (await asyncio.wait_for(anext(flujo), 5)).decode()
+                    self.assertIn("event: insumo", texto)
+                    await flujo.aclose()
+        finally:
+            # Cerrar las dos conexiones al canal para que el servidor termine limpio
+            tareas = list(eventos._escuchas.values())
+            for tarea in tareas:
+                tarea.cancel()
+            await asyncio.gather(*tareas, return_exceptions=True)
+            eventos._escuchas.clear()
+            for publicador in eventos._publicadores.values():
+                if publicador._socket is not None:
+                    publicador._socket.close()
+            eventos._publicadores.clear()
+            await asyncio.sleep(0.1)  # Que el servidor vea que se cerraron
+            servidor.close()
+            await servidor.wait_closed()
+
+
+# =====================================================================
+# IMPORTAR / EXPORTAR
+# =====================================================================
+class PresupuestoIntercambioTests(PresupuestoBase):
+    def test_exportar(self):
+        # El archivo se arma al leer la respuesta: se cuenta también eso
+        url = reverse("exportar_datos", args=["empleados"])
+        respuesta = self.assertPresupuesto(1, url)
+        with self.assertNumQueries(1):
+            b"".join(respuesta.streaming_content)
+
+    async def test_exportar_con_asgi_se_envia_por_partes(self):
+        # Con un generador normal Django lo leería completo antes de enviar
+        self.async_client.cookies = self.client.cookies
+        url = reverse("exportar_datos", args=["empleados"])
+        respuesta = await self.async_client.get(url)
+        self.assertTrue(respuesta.is_async)
+        partes = respuesta.streaming_content
+        encabezado = await anext(partes)  # Llega sin haber leído el resto
+        self.assertEqual(encabezado, ",".join(intercambio.CAMPOS[Empleado]).encode() + b"\r\n")
+        resto = [parte async for parte in partes]
+        self.assertEqual(len(resto), FILAS)  # Una parte por fila
+        esperado = await sync_to_async(lambda: "".join(intercambio.exportar(Empleado, "csv")))()
+        self.assertEqual(b"".join([encabezado, *resto]).decode(), esperado)
+
+    def test_importar(self):
+        url = reverse("importar_datos", args=["productos"])
+        self.assertPresupuesto(1, url)
+        archivo = io.BytesIO(
+            "nombre,precio,stock\n".encode() + "".join(f"P{i},{i},true\n" for i in range(FILAS)).encode()
+        )
+        archivo.name = "productos.csv"
+        # Un lote: el costo no crece con la cantidad de filas
+        self.assertPresupuesto(12, url, "post", data={"formato": "csv", "archivo": archivo})
+
+    def test_importar_columnas_parciales(self):
+        # Solo se actualizan las columnas que trae el archivo
+        producto = Producto.objects.create(nombre="Pan", precio=500, stock=True, imagen_url="http://x/pan.png")
+        insumo = Insumo.objects.create(nombre="Harina", cantidad=10, unidad="KG", umbral=3)
+        resultado = intercambio.importar(Producto, io.StringIO(f"id,stock\n{producto.id},false\n"), "csv")
+        self.assertEqual((resultado.actualizados, resultado.rechazados), (1, 0))
+        lineas = "\n".join([
+            f'{{"id": {insumo.id}, "cantidad": "4"}}',
+            f'{{"id": {self.insumo.id}, "umbral": 7}}',
+            '{"id": 999999, "cantidad": "1"}',  # Nuevo sin nombre
+        ])
+        resultado = intercambio.importar(Insumo, io.StringIO(lineas), "jsonl")
+        self.assertEqual((resultado.actualizados, resultado.creados, resultado.rechazados), (2, 0, 1))
+        self.assertIn("nombre", resultado.errores[0][1])
+
+        producto.refresh_from_db()
+        self.assertEqual(
+            (producto.nombre, producto.precio, producto.stock, producto.imagen_url),
+            ("Pan", 500, False, "http://x/pan.png"),
+        )
+        insumo.refresh_from_db()
+        self.assertEqual((insumo.nombre, insumo.cantidad, insumo.unidad, insumo.umbral), ("Harina", 4, "KG", 3))
+        self.assertEqual(Insumo.objects.get(id=self.insumo.id).umbral, 7)
+        self.assertEqual(inventario.saldo(insumo.id), {"KG": 4})
+
+
+# =====================================================================
+# LAS HERRAMIENTAS
+# =====================================================================
+class PresupuestoHerramientasTests(PresupuestoBase):
+    def test_decorador_falla_si_se_pasa(self):
+        @presupuesto_consultas(1)
+        def una_por_fila():
+            for producto in Producto.objects.all()[:3]:
+                Producto.objects.filter(id=producto.id).exists()
+
+        with self.assertRaisesRegex(ExcedePresupuesto, "Repetidas"):
+            una_por_fila()
+
+    def test_todas_las_urls_tienen_presupuesto(self):
+        probadas = {
+            "home1", "principal", "bye1", "plantilla", "formulario", "login", "usuarios",
+            "eliminar_usuario", "actualizar_usuario", "logout", "welcome", "dashboard",
+            "menu_list", "crear_producto", "editar_producto", "eliminar_producto",
+            "inventario_list", "crear_insumo", "editar_insumo", "eliminar_insumo",
+            "empleados_list", "crear_empleado", "editar_empleado", "eliminar_empleado",
+            "acciones_en_lote", "api_catalogo", "sincronizar", "eventos", "exportar_datos", "importar_datos", "metricas",
+        }
+        nombres = {patron.name for patron in urls.urlpatterns}
+        self.assertEqual(nombres - probadas, set(), "Falta la prueba de presupuesto de estas URLs")
+
+    def test_consultas_del_catalogo_usan_indice(self):
+        for nombre, consulta in CONSULTAS_INDICES.items():
+            sql, params = consulta().query.sql_with_params()
+            with self.subTest(nombre):
+                self.assertEqual(recorridos_completos(plan(sql, params), sql), [])
+
+
+# =====================================================================
+# CONFIGURACIÓN DE LA BASE DE DATOS
+# =====================================================================
+class BaseDesdeUrlTests(SimpleTestCase):
+    def test_sqlite_relativa_y_absoluta(self):
+        base = Path("/app")
+        self.assertEqual(base_desde_url("sqlite:///db.sqlite3", base)["NAME"], base / "db.sqlite3")
+        self.assertEqual(base_desde_url("sqlite:////tmp/x.sqlite3", base)["NAME"], "/tmp/x.sqlite3")
+
+    def test_postgres_con_pool(self):
+        config = base_desde_url("postgres://app:cl%40ve@db:5433/tienda?sslmode=require&pool_max=8", Path("/"))
+        self.assertEqual(config["ENGINE"], "django.db.backends.postgresql")
+        self.assertEqual((config["USER"], config["PASSWORD"], config["HOST"], config["PORT"], config["NAME"]),
+                         ("app", "cl@ve", "db", "5433", "tienda"))
+        self.assertEqual(config["OPTIONS"], {"sslmode": "require", "pool": {"max_size": 8}})
+        self.assertEqual(config["CONN_MAX_AGE"], 0)
+
+    def test_postgres_sin_pool(self):
+        config = base_desde_url("postgresql://app@db/tienda?pool=0", Path("/"))
+        self.assertNotIn("pool", config["OPTIONS"])
+        self.assertEqual(config["CONN_MAX_AGE"], 60)
+
+    def test_esquema_desconocido(self):
+        with self.assertRaises(ValueError):
+            base_desde_url("mysql://db/tienda", Path("/"))
+
+
+class RouterReplicaTests(SimpleTestCase):
+    @mock.patch("pruapp.routers.hay_replica", return_value=True)
+    def test_solo_las_listas_leen_el_catalogo_de_la_replica(self, _):
+        router = RouterReplica()
+
+        @usar_replica
+        def vista(request):
+            return router.db_for_read(Producto), router.db_for_read(Practica)
+
+        self.assertEqual(vista(None), ("replica", None))
+        self.assertIsNone(router.db_for_read(Producto))
+        self.assertEqual(router.db_for_write(Producto), "default")
+        self.assertFalse(router.allow_migrate("replica", "pruapp"))
+
+    @mock.patch("pruapp.routers.hay_replica", return_value=True)
+    def test_la_api_lee_la_version_de_la_misma_base_que_las_filas(self, _):
+        @usar_replica
+        def vista(recurso):
+            return api.version(recurso)
+
+        with mock.patch.object(VersionCatalogo.objects, "using") as using:
+            using.return_value.filter.return_value.values_list.return_value.first.return_value = (3, None)
+            self.assertEqual(vista("productos"), (3, None))
+        using.assert_called_once_with("replica")
+
+    def test_una_vista_cacheada_no_usa_la_replica(self):
+        # Guardaría filas atrasadas de la réplica con la versión nueva
+        with self.assertRaises(ImproperlyConfigured):
+            @cachear_vista(Producto)
+            @usar_replica
+            def vista(request):
+                return None
+
+
+# =====================================================================
+# MINIATURAS
+# =====================================================================
+@unittest.skipIf(miniaturas.Image is None, "Pillow no está instalado")
+class MiniaturasTests(SimpleTestCase):
+    def setUp(self):
+        carpeta = tempfile.TemporaryDirectory()
+        self.addCleanup(carpeta.cleanup)
+        ajustes = override_settings(MINIATURAS_DIR=carpeta.name)
+        ajustes.enable()
+        self.addCleanup(ajustes.disable)
+
+    def test_genera_y_sirve_con_cache_permanente(self):
+        contenido = io.BytesIO()
+        miniaturas.Image.new("RGB", (300, 200), "red").save(contenido, "PNG")
+        hash_imagen = miniaturas.generar(contenido.getvalue())
+        self.assertEqual(hash_imagen, miniaturas.generar(contenido.getvalue()))
+
+        respuesta = self.client.get(miniaturas.url(hash_imagen, 60))
+        self.assertEqual(respuesta["Content-Type"], "image/webp")
+        self.assertIn("immutable", respuesta["Cache-Control"])
+        imagen = miniaturas.Image.open(io.BytesIO(b"".join(respuesta.streaming_content)))
+        self.assertEqual(imagen.size, (60, 60))
+
+    def test_contenido_invalido(self):
+        with self.assertRaises(ValueError):
+            miniaturas.generar(b"no es una imagen")
+
+    def resolver(self, nombres):
+        # getaddrinfo falso: nombre -> IP
+        def getaddrinfo(host, puerto, *args, **kwargs):
+            ip = nombres.get(host, host)
+            familia = socket.AF_INET6 if ":" in ip else socket.AF_INET
+            return [(familia, socket.SOCK_STREAM, 6, "", (ip, puerto))]
+        return mock.patch.object(miniaturas.socket, "getaddrinfo", getaddrinfo)
+
+    def test_no_descarga_de_la_red_interna(self):
+        internas = [
+            "127.0.0.1", "10.1.2.3", "192.168.0.10", "169.254.169.254", "0.0.0.0",
+            "[::1]", "[::ffff:127.0.0.1]", "interno.test", "localhost",
+        ]
+        with self.resolver({"interno.test": "172.16.0.1", "localhost": "127.0.0.1"}), \
+                mock.patch.object(miniaturas.socket, "create_connection") as conectar:
+            for host in internas:
+                with self.subTest(host=host), self.assertRaises(ValueError):
+                    miniaturas.descargar(f"https://{host}/foto.png")
+            with self.assertRaises(ValueError):
+                miniaturas.descargar("file:///etc/passwd")
+        conectar.assert_not_called()
+
+    def test_revisa_cada_redireccion(self):
+        class Redirige(BaseHTTPRequestHandler):
+            def do_GET(self):
+                self.send_response(302)
+                self.send_header("Location", f"http://interno.test:{self.server.server_port}/foto.png")
+                self.end_headers()
+
+            def log_message(self, *args):
+                pass
+
+        servidor = HTTPServer(("127.0.0.1", 0), Redirige)
+        hilo = threading.Thread(target=servidor.serve_forever, daemon=True)
+        hilo.start()
+        self.addCleanup(servidor.server_close)
+        self.addCleanup(servidor.shutdown)
+        puerto = servidor.server_port
+
+        conexiones = []
+        conectar = socket.create_connection
+
+        def conectar_al_servidor(direccion, *args, **kwargs):
+            # Cualquier IP pública "llega" al servidor de la prueba
+            conexiones.append(direccion)
+            return conectar(("127.0.0.1", puerto), *args, **kwargs)
+
+        with self.resolver({"imagenes.test": "93.184.216.34", "interno.test": "10.0.0.5"}), \
+                mock.patch.object(miniaturas.socket, "create_connection", conectar_al_servidor):
+            with self.assertRaisesMessage(ValueError, "10.0.0.5"):
+                miniaturas.descargar(f"http://imagenes.test:{puerto}/foto.png")
+        self.assertEqual(conexiones, [("93.184.216.34", puerto)])
+
+
+# =====================================================================
+# ESTÁTICOS
+# =====================================================================
+class EstaticosTests(SimpleTestCase):
+    def test_minificar_css(self):
+        css = "/* comentario */\n.a > .b,\n.c {\n    color: red;\n    margin: 0 auto;\n}\na :hover { color: blue; }\n"
+        self.assertEqual(minificar_css(css), ".a>.b,.c{color:red;margin:0 auto}a :hover{color:blue}")
+
+    def test_minificar_css_no_toca_los_textos(self):
+        css = (
+            '.a::before { content: "Total: 5 ;} /* no */"; }\n'
+            ".b { background: url('img/a b.png') ; font-family: \"Open  Sans\" , serif; }\n"
+        )
+        self.assertEqual(
+            minificar_css(css),
+            '.a::before{content:"Total: 5 ;} /* no */"}'
+            ".b{background:url('img/a b.png');font-family:\"Open  Sans\",serif}",
+        )
+
+    def test_sin_manifest_en_produccion_es_un_error(self):
+        # Un collectstatic que falta no se disimula con enlaces rotos
+        with override_settings(ESTATICOS_SIN_MANIFEST=False):
+            with self.assertRaises(ValueError):
+                staticfiles_storage.stored_name("pruapp/css/styles.css")
+        self.assertEqual(staticfiles_storage.stored_name("pruapp/css/styles.css"), "pruapp/css/styles.css")
+
+    def test_sin_collectstatic_enlaza_los_css_originales(self):
+        html = self.client.get(reverse("login")).content.decode()
+        self.assertIn('href="/static/pruapp/css/styles.css"', html)
+        self.assertIn('href="/static/pruapp/css/panel.css"', html)
@@ -8,8 +8,13 @@
 #   - name="nombre" = Nombre para usar en los templates con {% url 'nombre' %}
 # =====================================================================
 
+from django.conf import settings
 from django.urls import path
-from . import views
+from . import views, views_async
+
+# Con VISTAS_ASYNC=1 (lo activa prueba2/asgi.py) el login, las listas y
+# los botones de eliminar usan las vistas async de views_async.py
+listas = views_async if settings.VISTAS_ASYNC else views
 
 urlpatterns = [
     # RUTAS ORIGINALES (ya existían)
@@ -18,7 +23,7 @@ urlpatterns = [
     path ("bye/", views.despedida,name="bye1",),
     path("plantilla/",views.mundo,name="plantilla"),
     path("formulario/",views.formulario,name="formulario"),
-    path("login/", views.login, name="login"),
+    path("login/", listas.login, name="login"),
     
     # =====================================================================
     # NUEVAS RUTAS AGREGADAS
@@ -26,12 +31,12 @@ urlpatterns = [
     
     # LISTA DE USUARIOS: Muestra todos los usuarios en una tabla
     # URL: localhost/usuarios/
-    path("usuarios/", views.usuarios, name="usuarios"),
+    path("usuarios/", listas.usuarios, name="usuarios"),
     
     # ELIMINAR USUARIO: Elimina un usuario por su ID
     # URL: localhost/eliminar/5/ (eliminará el usuario con id=5)
     # <int:id> = Captura un número de la URL y lo pasa como parámetro 'id'
-    path("eliminar/<int:id>/", views.eliminar_usuario, name="eliminar_usuario"),
+    path("eliminar/<int:id>/", listas.eliminar_usuario, name="eliminar_usuario"),
     
     # ACTUALIZAR USUARIO: Formulario para editar los datos de un usuario
     # URL: localhost/actualizar/5/ (editará el usuario con id=5)
@@ -48,21 +53,44 @@ urlpatterns = [
     path("dashboard/", views.dashboard, name="dashboard"),
 
     # MENÚ CRUD
-    path("menu/", views.menu_list, name="menu_list"),
+    path("menu/", listas.menu_list, name="menu_list"),
     path("menu/nuevo/", views.crear_producto, name="crear_producto"),
     path("menu/editar/<int:id>/", views.editar_producto, name="editar_producto"),
-    path("menu/eliminar/<int:id>/", views.eliminar_producto, name="eliminar_producto"),
+    path("menu/eliminar/<int:id>/", listas.eliminar_producto, name="eliminar_producto"),
 
     # INVENTARIO CRUD
-    path("inventario/", views.inventario_list, name="inventario_list"),
+    path("inventario/", listas.inventario_list, name="inventario_list"),
     path("inventario/nuevo/", views.crear_insumo, name="crear_insumo"),
     path("inventario/editar/<int:id>/", views.editar_insumo, name="editar_insumo"),
-    path("inventario/eliminar/<int:id>/", views.eliminar_insumo, name="eliminar_insumo"),
+    path("inventario/eliminar/<int:id>/", listas.eliminar_insumo, name="eliminar_insumo"),
 
     # EMPLEADOS CRUD
-    path("empleados/", views.empleados_list, name="empleados_list"),
+    path("empleados/", listas.empleados_list, name="empleados_list"),
     path("empleados/nuevo/", views.crear_empleado, name="crear_empleado"),
     path("empleados/editar/<int:id>/", views.editar_empleado, name="editar_empleado"),
-    path("empleados/eliminar/<int:id>/", views.eliminar_empleado, name="eliminar_empleado"),
+    path("empleados/eliminar/<int:id>/", listas.eliminar_empleado, name="eliminar_empleado"),
+
+    # ACCIONES EN LOTE (lista = productos, insumos, empleados o usuarios)
+    # POST con las casillas marcadas; un solo DELETE/UPDATE (ver lotes.py)
+    path("lote/<str:lista>/", views.acciones_en_lote, name="acciones_en_lote"),
+
+    # API JSON de solo lectura (recurso = productos, insumos o empleados)
+    # URL: localhost/api/productos/?fields=nombre,stock (ver api.py)
+    path("api/<str:recurso>/", views.api_catalogo, name="api_catalogo"),
+
+    # SINCRONIZACIÓN: solo las filas que cambiaron desde el token
+    # URL: localhost/sync/?since=<token> (ver sincronizacion.py)
+    path("sync/", views.sincronizar, name="sincronizar"),
+
+    # EVENTOS EN VIVO (SSE): avisos de stock e inventario (siempre async)
+    path("eventos/", views_async.eventos, name="eventos"),
+
+    # IMPORTAR / EXPORTAR (modelo = productos, insumos o empleados)
+    # URL: localhost/exportar/productos/?formato=csv
+    path("exportar/<str:modelo>/", views.exportar_datos, name="exportar_datos"),
+    path("importar/<str:modelo>/", views.importar_datos, name="importar_datos"),
+
+    # MÉTRICAS para Prometheus (sin barra final, como espera Prometheus)
+    path("metrics", views.metricas_prometheus, name="metricas"),
 ]
 # Force Reload
\ No newline at end of file
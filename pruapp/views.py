@@ -6,10 +6,72 @@
 from django.shortcuts import render, redirect, get_object_or_404
 
 # Practica: es el modelo (tabla) donde guardamos los usuarios en la base de datos
-from .models import Practica, Producto, Insumo, Empleado
+from .models import Practica, Producto, Insumo, Empleado, AlertaStock
+
+# paginar: divide las listas en páginas usando el ID como cursor (ver paginacion.py)
+from .paginacion import paginar
+
+# paginar_busqueda: búsqueda por texto con índice, por relevancia (ver busqueda.py)
+from .busqueda import paginar_busqueda
+
+# Cifrado y verificación de contraseñas (ver contrasenas.py)
+from . import contrasenas
+
+# alertas_vigentes: alertas de stock bajo ya calculadas (ver alertas.py)
+from .alertas import alertas_vigentes
+
+# indicadores: totales del dashboard ya calculados (ver kpis.py)
+from .kpis import indicadores
+
+# pronostico: días que le quedan a cada insumo según su consumo (ver pronostico.py)
+from . import pronostico
+
+# cachear_vista: guarda el HTML de la vista hasta que cambien los datos (ver cache.py)
+from .cache import cachear_vista
+
+# usar_replica: las listas leen de la base réplica si existe (ver routers.py)
+from .routers import usar_replica
+
+# login_requerido: redirige al login si no hay sesión y pone request.usuario (ver sesion.py)
+# login_requerido_api: igual, pero responde 401 (para la API JSON)
+from .sesion import login_requerido, login_requerido_api
 
 # HttpResponse: sirve para enviar texto simple al navegador
-from django.http import HttpResponse
+# StreamingHttpResponse: envía la respuesta por partes (sin armarla completa en memoria)
+# JsonResponse: respuesta en JSON (la usan las acciones en lote si el cliente la pide)
+from django.http import HttpResponse, StreamingHttpResponse, Http404, JsonResponse
+# ASGIRequest: para saber si la petición llegó por ASGI (ver exportar_datos)
+from django.core.handlers.asgi import ASGIRequest
+
+# require_POST: la vista solo acepta POST (405 si llega un GET)
+# require_safe: solo GET y HEAD (la API es de solo lectura)
+# ensure_csrf_cookie: manda la cookie del token CSRF aunque la página salga del cache
+from django.views.decorators.http import require_POST, require_safe
+from django.views.decorators.csrf import ensure_csrf_cookie
+
+# Respuestas condicionales (304 Not Modified) y cabeceras de cache HTTP
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import http_date
+
+# Importar/exportar datos en CSV o JSONL (ver intercambio.py)
+from . import intercambio
+
+# Métricas de las peticiones en formato Prometheus (ver metricas.py)
+from . import metricas
+
+# Miniaturas de las fotos, generadas en segundo plano (ver miniaturas.py)
+from . import miniaturas
+
+# Eliminar / actualizar varias filas marcadas a la vez (ver lotes.py)
+from . import lotes
+
+# API JSON de solo lectura del catálogo (ver api.py)
+from . import api
+
+# /sync/: filas cambiadas y eliminadas desde un token (ver sincronizacion.py)
+from . import sincronizacion
+
+from django.utils import timezone
 
 def saludo(request):
     return HttpResponse("Hola mundo")
@@ -49,8 +111,9 @@ def login(request):
             # Si encuentra más de uno o ninguno, da error
             usuario = Practica.objects.get(username=usern)
             
-            # Comparar la contraseña que escribió con la que está guardada
-            if usuario.password == passw:
+            # Comparar la contraseña que escribió con el hash guardado
+            # (si el hash es viejo o está en texto plano, se actualiza aquí mismo)
+            if contrasenas.verificar_usuario(usuario, passw):
                 # ¡Contraseña correcta! Guardar datos en la SESIÓN
                 # La sesión es como una "memoria" que recuerda quién está logueado
                 # request.session es un diccionario donde guardamos datos
@@ -81,24 +144,19 @@ def login(request):
 #   2. Obtiene todos los usuarios de la base de datos
 #   3. Envía la lista al template para mostrarla en una tabla
 # =====================================================================
+@ensure_csrf_cookie
+@login_requerido
 def usuarios(request):
-    # VERIFICAR SESIÓN: comprobar si el usuario está logueado
-    # 'usuario_id' se guardó cuando hizo login, si no existe, no está logueado
-    if 'usuario_id' not in request.session:
-        return redirect("login")  # No está logueado, enviarlo al login
-    
     # .all() obtiene TODOS los registros de la tabla Practica (todos los usuarios)
     lista_usuarios = Practica.objects.all()
     
-    # Obtener el nombre del usuario logueado desde la sesión
-    usuario_actual = request.session.get('usuario_nombre')
-    
     # render() muestra el archivo HTML y le pasa datos
     # Los datos van en un diccionario: {"nombre_variable": valor}
     # En el HTML puedes usar {{ nombre_variable }} para mostrar el valor
+    # El usuario logueado ya está en request.usuario (ver sesion.py)
     return render(request, "usuarios.html", {
         "usuarios": lista_usuarios,       # Lista de todos los usuarios
-        "usuario_actual": usuario_actual  # Nombre del usuario logueado
+        "usuario_actual": request.usuario  # Usuario logueado (nombre y foto)
     })
 
 
@@ -112,14 +170,11 @@ def usuarios(request):
 #   3. Lo elimina de la base de datos
 #   4. Regresa a la lista de usuarios
 # =====================================================================
+@login_requerido
 def eliminar_usuario(request, id):
     # 'id' viene de la URL: path("eliminar/<int:id>/", ...)
     # Si la URL es /eliminar/5/, entonces id = 5
     
-    # Verificar que esté logueado
-    if 'usuario_id' not in request.session:
-        return redirect("login")
-    
     # get_object_or_404: busca el usuario con ese ID
     # Si no lo encuentra, muestra una página de error 404
     usuario = get_object_or_404(Practica, id=id)
@@ -185,7 +240,7 @@ def formulario(request):
             # .create() crea un nuevo registro en la base de datos
             Practica.objects.create(
                 username=usern,
-                password=passw2,
+                password=contrasenas.cifrar(passw2),  # Nunca se guarda en texto plano
                 # NUEVO: guardar la URL de imagen (si no escribió nada, guarda None)
                 imagen_url=imagen if imagen else None
             )
@@ -204,11 +259,8 @@ def formulario(request):
 #   3. El usuario modifica los datos que quiera
 #   4. Se guardan los cambios en la base de datos
 # =====================================================================
+@login_requerido
 def actualizar_usuario(request, id):
-    # Verificar que esté logueado
-    if 'usuario_id' not in request.session:
-        return redirect("login")
-    
     # Buscar el usuario por ID
     usuario = get_object_or_404(Practica, id=id)
     
@@ -220,7 +272,9 @@ def actualizar_usuario(request, id):
         
         # Cambiar los valores del usuario
         usuario.username = usern
-        usuario.password = passw
+        # Solo se cambia la contraseña si escribió una nueva
+        if passw:
+            usuario.password = contrasenas.cifrar(passw)
         usuario.imagen_url = imagen if imagen else None
         
         # .save() guarda los cambios en la base de datos
@@ -236,37 +290,58 @@ def actualizar_usuario(request, id):
 # VISTA DE BIENVENIDA / LANDING PAGE (NUEVA)
 # =====================================================================
 # PROPÓSITO: Página principal para usuarios no logueados
+# Es una página fija, se guarda en cache
+@cachear_vista(requiere_sesion=False)
 def welcome(request):
     return render(request, "welcome.html")
 
 # =====================================================================
 # VISTA DASHBOARD (NUEVA)
 # =====================================================================
+def dia_actual(request):
+    # "Insumos actualizados hoy" cambia a medianoche aunque no cambie ningún dato
+    return timezone.localdate().isoformat()
+
+
+@cachear_vista(Producto, Insumo, Empleado, "alerta", "kpi", variar_por=dia_actual)
+@login_requerido
 def dashboard(request):
-    # VERIFICAR SESIÓN
-    if 'usuario_id' not in request.session:
-        return redirect("login")
-        
     # En un caso real, aquí calcularíamos los ingresos, pedidos, etc.
-    return render(request, "dashboard.html")
+    # Alertas de stock bajo: se leen de la tabla ya calculada (ver alertas.py)
+    # Indicadores: también precalculados, no se cuentan las tablas (ver kpis.py)
+    contexto = {
+        "alertas": alertas_vigentes(),
+        "total_alertas": AlertaStock.objects.count(),
+    }
+    contexto.update(indicadores())
+    # Pronóstico de consumo: solo con NumPy; en cache hasta que haya movimientos nuevos
+    if pronostico.disponible():
+        contexto["pronostico"] = pronostico.proximos_a_agotarse()
+    return render(request, "dashboard.html", contexto)
 
 # =====================================================================
 # GESTIÓN DE MENÚ (CRUD)
 # =====================================================================
 
 # 1. LISTAR PRODUCTOS
+# El HTML se cachea y se invalida cuando cambia cualquier Producto.
+# Lee de la base principal, no de la réplica (ver routers.py)
+@ensure_csrf_cookie
+@cachear_vista(Producto)
+@login_requerido
 def menu_list(request):
-    if 'usuario_id' not in request.session:
-        return redirect("login")
-    
-    productos = Producto.objects.all()
-    return render(request, "menu.html", {"productos": productos})
+    query = request.GET.get("q")
+    if query:
+        # Las coincidencias del índice de búsqueda, las más relevantes primero
+        productos = paginar_busqueda(Producto, query, request)
+    else:
+        # Solo se traen las filas de la página actual, no toda la tabla
+        productos = paginar(Producto.objects.all(), request)
+    return render(request, "menu.html", {"productos": productos, "pagina": productos})
 
 # 2. CREAR PRODUCTO
+@login_requerido
 def crear_producto(request):
-    if 'usuario_id' not in request.session:
-        return redirect("login")
-    
     if request.method == "POST":
         nombre = request.POST.get("nombre")
         
@@ -283,22 +358,28 @@ def crear_producto(request):
             
         imagen = request.POST.get("imagen_url")
         stock = request.POST.get("stock") == "on" # Checkbox sends "on" if checked
+        # Foto subida como archivo (reemplaza a la URL)
+        subida = miniaturas.leer_subida(request.FILES.get("imagen"))
+        if subida:
+            imagen = None
+        elif not imagen:
+            imagen = "https://via.placeholder.com/150"
         
-        Producto.objects.create(
+        producto = Producto.objects.create(
             nombre=nombre,
             precio=precio,
-            imagen_url=imagen if imagen else "https://via.placeholder.com/150",
+            imagen_url=imagen,
             stock=stock
         )
+        if subida:
+            miniaturas.programar_subida(Producto, producto.pk, subida)
         return redirect("menu_list")
         
     return render(request, "producto_form.html", {"titulo": "Nuevo Producto"})
 
 # 3. EDITAR PRODUCTO
+@login_requerido
 def editar_producto(request, id):
-    if 'usuario_id' not in request.session:
-        return redirect("login")
-        
     producto = get_object_or_404(Producto, id=id)
     
     if request.method == "POST":
@@ -315,19 +396,25 @@ def editar_producto(request, id):
         if producto.precio > 1000000:
             producto.precio = 1000000
             
-        producto.imagen_url = request.POST.get("imagen_url")
+        subida = miniaturas.leer_subida(request.FILES.get("imagen"))
+        imagen = request.POST.get("imagen_url") or None
+        if subida:
+            producto.imagen_url = None
+        elif imagen != (producto.imagen_url or None):
+            # Otra foto: la miniatura vieja ya no sirve
+            producto.imagen_url, producto.imagen_hash = imagen, ""
         producto.stock = request.POST.get("stock") == "on"
         
         producto.save()
+        if subida:
+            miniaturas.programar_subida(Producto, producto.pk, subida)
         return redirect("menu_list")
         
     return render(request, "producto_form.html", {"titulo": "Editar Producto", "producto": producto})
 
 # 4. ELIMINAR PRODUCTO
+@login_requerido
 def eliminar_producto(request, id):
-    if 'usuario_id' not in request.session:
-        return redirect("login")
-        
     producto = get_object_or_404(Producto, id=id)
     producto.delete()
     return redirect("menu_list")
@@ -338,31 +425,48 @@ def eliminar_producto(request, id):
 # =====================================================================
 
 # 1. LISTAR INSUMOS
+@ensure_csrf_cookie
+@usar_replica
+@login_requerido
 def inventario_list(request):
-    if 'usuario_id' not in request.session:
-        return redirect("login")
-    
     # Optional Search
     query = request.GET.get("q")
     if query:
-        insumos = Insumo.objects.filter(nombre__icontains=query)
+        # Las coincidencias del índice de búsqueda, las más relevantes primero
+        insumos = paginar_busqueda(Insumo, query, request)
     else:
-        insumos = Insumo.objects.all()
-        
-    return render(request, "inventario.html", {"insumos": insumos})
+        insumos = paginar(Insumo.objects.all(), request)
+
+    return render(request, "inventario.html", {"insumos": insumos, "pagina": insumos})
 
+from decimal import Decimal
 from django.core.exceptions import ValidationError
 
+# parsear_cantidad: separa "15 KG" en número y unidad (ver cantidades.py)
+from .cantidades import parsear_cantidad
+
+def leer_cantidad(post):
+    # El formulario envía el número y la unidad por separado,
+    # pero también se acepta texto como "15 KG" en el campo cantidad
+    valor, unidad, _ = parsear_cantidad(post.get("cantidad"), post.get("unidad") or Insumo.Unidad.KG)
+    return valor, unidad
+
+def leer_umbral(post):
+    # El umbral de alerta es opcional; vacío = sin alerta
+    umbral = (post.get("umbral") or "").strip()
+    return Decimal(umbral.replace(",", ".")) if umbral else None
+
 # 2. CREAR INSUMO
+@login_requerido
 def crear_insumo(request):
-    if 'usuario_id' not in request.session:
-        return redirect("login")
-    
     if request.method == "POST":
         try:
+            cantidad, unidad = leer_cantidad(request.POST)
             Insumo.objects.create(
                 nombre=request.POST.get("nombre"),
-                cantidad=request.POST.get("cantidad"),
+                cantidad=cantidad,
+                unidad=unidad,
+                umbral=leer_umbral(request.POST),
                 ultima_info=request.POST.get("ultima_info"),
                 fecha=request.POST.get("fecha") if request.POST.get("fecha") else None
             )
@@ -371,28 +475,29 @@ def crear_insumo(request):
             return render(request, "insumo_form.html", {
                 "titulo": "Nuevo Insumo",
                 "error": f"Error de validación: {e}",
-                "insumo": request.POST  # Keep user input
+                "insumo": request.POST,  # Keep user input
+                "unidades": Insumo.Unidad.choices
             })
         except Exception as e:
              return render(request, "insumo_form.html", {
                 "titulo": "Nuevo Insumo",
                 "error": f"Error: {e}",
-                "insumo": request.POST
+                "insumo": request.POST,
+                "unidades": Insumo.Unidad.choices
             })
         
-    return render(request, "insumo_form.html", {"titulo": "Nuevo Insumo"})
+    return render(request, "insumo_form.html", {"titulo": "Nuevo Insumo", "unidades": Insumo.Unidad.choices})
 
 # 3. EDITAR INSUMO
+@login_requerido
 def editar_insumo(request, id):
-    if 'usuario_id' not in request.session:
-        return redirect("login")
-        
     insumo = get_object_or_404(Insumo, id=id)
     
     if request.method == "POST":
         try:
             insumo.nombre = request.POST.get("nombre")
-            insumo.cantidad = request.POST.get("cantidad")
+            insumo.cantidad, insumo.unidad = leer_cantidad(request.POST)
+            insumo.umbral = leer_umbral(request.POST)
             insumo.ultima_info = request.POST.get("ultima_info")
             fecha = request.POST.get("fecha")
             insumo.fecha = fecha if fecha else None
@@ -404,22 +509,22 @@ def editar_insumo(request, id):
             return render(request, "insumo_form.html", {
                 "titulo": "Editar Insumo",
                 "error": f"Error de validación: {e}",
-                "insumo": request.POST 
+                "insumo": request.POST,
+                "unidades": Insumo.Unidad.choices
             })
         except Exception as e:
             return render(request, "insumo_form.html", {
                 "titulo": "Editar Insumo",
                 "error": f"Error: {e}",
-                "insumo": request.POST
+                "insumo": request.POST,
+                "unidades": Insumo.Unidad.choices
             })
         
-    return render(request, "insumo_form.html", {"titulo": "Editar Insumo", "insumo": insumo})
+    return render(request, "insumo_form.html", {"titulo": "Editar Insumo", "insumo": insumo, "unidades": Insumo.Unidad.choices})
 
 # 4. ELIMINAR INSUMO
+@login_requerido
 def eliminar_insumo(request, id):
-    if 'usuario_id' not in request.session:
-        return redirect("login")
-        
     insumo = get_object_or_404(Insumo, id=id)
     insumo.delete()
     return redirect("inventario_list")
@@ -430,61 +535,229 @@ def eliminar_insumo(request, id):
 # =====================================================================
 
 # 1. LISTAR EMPLEADOS
+@ensure_csrf_cookie
+@usar_replica
+@login_requerido
 def empleados_list(request):
-    if 'usuario_id' not in request.session:
-        return redirect("login")
-    
     query = request.GET.get("q")
     if query:
-        empleados = Empleado.objects.filter(nombre__icontains=query)
+        # Busca por nombre y por rol (ej: "chef")
+        empleados = paginar_busqueda(Empleado, query, request)
     else:
-        empleados = Empleado.objects.all()
-        
-    return render(request, "empleados.html", {"empleados": empleados})
+        empleados = paginar(Empleado.objects.all(), request)
+
+    return render(request, "empleados.html", {"empleados": empleados, "pagina": empleados})
 
 # 2. CREAR EMPLEADO
+@login_requerido
 def crear_empleado(request):
-    if 'usuario_id' not in request.session:
-        return redirect("login")
-    
     if request.method == "POST":
-        Empleado.objects.create(
+        subida = miniaturas.leer_subida(request.FILES.get("foto"))
+        empleado = Empleado.objects.create(
             nombre=request.POST.get("nombre"),
-            foto_url=request.POST.get("foto_url"),
+            foto_url=None if subida else request.POST.get("foto_url"),
             rol=request.POST.get("rol"),
             edad=request.POST.get("edad"),
             telefono=request.POST.get("telefono"),
             estado=True # Default to active
         )
+        if subida:
+            miniaturas.programar_subida(Empleado, empleado.pk, subida)
         return redirect("empleados_list")
         
     return render(request, "empleado_form.html", {"titulo": "Nuevo Empleado"})
 
 # 3. EDITAR EMPLEADO
+@login_requerido
 def editar_empleado(request, id):
-    if 'usuario_id' not in request.session:
-        return redirect("login")
-        
     empleado = get_object_or_404(Empleado, id=id)
     
     if request.method == "POST":
         empleado.nombre = request.POST.get("nombre")
-        empleado.foto_url = request.POST.get("foto_url")
+        subida = miniaturas.leer_subida(request.FILES.get("foto"))
+        foto = request.POST.get("foto_url") or None
+        if subida:
+            empleado.foto_url = None
+        elif foto != (empleado.foto_url or None):
+            empleado.foto_url, empleado.foto_hash = foto, ""
         empleado.rol = request.POST.get("rol")
         empleado.edad = request.POST.get("edad")
         empleado.telefono = request.POST.get("telefono")
         empleado.estado = request.POST.get("estado") == "on"
         
         empleado.save()
+        if subida:
+            miniaturas.programar_subida(Empleado, empleado.pk, subida)
         return redirect("empleados_list")
         
     return render(request, "empleado_form.html", {"titulo": "Editar Empleado", "empleado": empleado})
 
 # 4. ELIMINAR EMPLEADO
+@login_requerido
 def eliminar_empleado(request, id):
-    if 'usuario_id' not in request.session:
-        return redirect("login")
-        
     empleado = get_object_or_404(Empleado, id=id)
     empleado.delete()
-    return redirect("empleados_list")
\ No newline at end of file
+    return redirect("empleados_list")
+
+
+# =====================================================================
+# IMPORTAR / EXPORTAR DATOS (CSV o JSONL)
+# =====================================================================
+# URL: /exportar/productos/?formato=csv  -> descarga toda la tabla
+# URL: /importar/productos/              -> formulario para subir un archivo
+# 'modelo' puede ser: productos, insumos o empleados
+# =====================================================================
+TIPOS_CONTENIDO = {
+    "csv": "text/csv; charset=utf-8",
+    "jsonl": "application/x-ndjson; charset=utf-8",
+}
+
+@login_requerido
+def exportar_datos(request, modelo):
+    if modelo not in intercambio.MODELOS:
+        raise Http404("Modelo no encontrado")
+    formato = request.GET.get("formato", "csv")
+    if formato not in intercambio.FORMATOS:
+        return HttpResponse("Formato no soportado", status=400)
+
+    # El generador va leyendo la tabla por partes mientras se envía.
+    # Con ASGI tiene que ser async: uno normal se leería completo antes
+    exportar = intercambio.aexportar if isinstance(request, ASGIRequest) else intercambio.exportar
+    respuesta = StreamingHttpResponse(
+        exportar(intercambio.MODELOS[modelo], formato),
+        content_type=TIPOS_CONTENIDO[formato],
+    )
+    respuesta["Content-Disposition"] = f'attachment; filename="{modelo}.{formato}"'
+    return respuesta
+
+@login_requerido
+def importar_datos(request, modelo):
+    if modelo not in intercambio.MODELOS:
+        raise Http404("Modelo no encontrado")
+    contexto = {"modelo": modelo, "formatos": intercambio.FORMATOS}
+
+    if request.method == "POST":
+        archivo = request.FILES.get("archivo")
+        formato = request.POST.get("formato") or (archivo.name.rsplit(".", 1)[-1].lower() if archivo else "")
+        if not archivo or formato not in intercambio.FORMATOS:
+            contexto["error"] = "Sube un archivo .csv o .jsonl"
+            return render(request, "importar.html", contexto, status=400)
+
+        lote = request.POST.get("lote")
+        lote = int(lote) if lote and lote.isdigit() and int(lote) > 0 else intercambio.TAMANO_LOTE
+        resultado = intercambio.importar(
+            intercambio.MODELOS[modelo], intercambio.abrir_texto(archivo.file), formato, lote
+        )
+        contexto["resultado"] = resultado
+    return render(request, "importar.html", contexto)
+
+
+# =====================================================================
+# ACCIONES EN LOTE (varias filas marcadas en una lista)
+# =====================================================================
+# URL: /lote/productos/  (POST con accion=agotar&ids=3&ids=8...)
+# 'lista' puede ser: productos, insumos, empleados o usuarios; las
+# acciones de cada una están en lotes.LISTAS. Todo se hace con un
+# DELETE o un UPDATE en una sola transacción.
+# Vuelve a la lista, o responde {"accion": ..., "filas": n} si el
+# cliente pide JSON (Accept: application/json).
+# =====================================================================
+@require_POST
+@login_requerido
+def acciones_en_lote(request, lista):
+    if lista not in lotes.LISTAS:
+        raise Http404("Lista no encontrada")
+    _, destino, acciones = lotes.LISTAS[lista]
+    accion = request.POST.get("accion")
+    if accion not in acciones:
+        return HttpResponse("Acción no válida", status=400)
+    try:
+        ids = lotes.leer_ids(request.POST.getlist("ids"))
+    except ValueError:
+        return HttpResponse(f"Marca entre 1 y {lotes.MAXIMO_IDS} filas", status=400)
+
+    filas = lotes.aplicar(lista, accion, ids)
+    if "application/json" in request.headers.get("Accept", ""):
+        return JsonResponse({"accion": accion, "filas": filas})
+    return redirect(destino)
+
+
+# =====================================================================
+# API JSON DEL CATÁLOGO (solo lectura)
+# =====================================================================
+# URL: /api/productos/?fields=nombre,stock&despues=<id>
+# 'recurso' puede ser: productos, insumos o empleados (ver api.py)
+# Con If-None-Match / If-Modified-Since y la tabla sin cambios responde
+# 304 sin leer las filas.
+# =====================================================================
+@require_safe
+@usar_replica
+@login_requerido_api
+def api_catalogo(request, recurso):
+    if recurso not in api.RECURSOS:
+        return JsonResponse({"error": "Recurso no encontrado"}, status=404)
+    try:
+        campos = api.campos_pedidos(recurso, request.GET.get("fields"))
+    except ValueError as error:
+        return JsonResponse({"error": str(error)}, status=400)
+
+    version, actualizada = api.version(recurso)
+    etag = api.etag(recurso, version, request)
+    ultima = int(actualizada.timestamp()) if actualizada else None
+    respuesta = get_conditional_response(request, etag=etag, last_modified=ultima)
+    if respuesta is None:
+        modelo = api.RECURSOS[recurso][0]
+        pagina = paginar(modelo.objects.values(*campos), request)
+        respuesta = JsonResponse({
+            "version": version,
+            "resultados": pagina.objetos,
+            "siguiente": pagina.url_siguiente and request.path + pagina.url_siguiente,
+            "anterior": pagina.url_anterior and request.path + pagina.url_anterior,
+        })
+
+    # El cliente puede guardar la respuesta pero debe preguntar cada vez
+    respuesta["ETag"] = etag
+    if ultima is not None:
+        respuesta["Last-Modified"] = http_date(ultima)
+    patch_cache_control(respuesta, private=True, no_cache=True)
+    return respuesta
+
+
+# =====================================================================
+# SINCRONIZACIÓN (solo lo que cambió)
+# =====================================================================
+# URL: /sync/?since=<token>&recursos=productos,insumos
+# Sin "since" (o si es muy viejo) responde "recargar": true y un token
+# para empezar (ver sincronizacion.py)
+# =====================================================================
+@require_safe
+@login_requerido_api
+def sincronizar(request):
+    pedidos = request.GET.get("recursos")
+    recursos = pedidos.split(",") if pedidos else list(api.RECURSOS)
+    if not set(recursos) <= set(api.RECURSOS):
+        return JsonResponse({"error": f"Recursos válidos: {', '.join(api.RECURSOS)}"}, status=400)
+    try:
+        datos = sincronizacion.sincronizar(request.GET.get("since"), recursos)
+    except ValueError:
+        return JsonResponse({"error": "Token no válido"}, status=400)
+
+    respuesta = JsonResponse(datos)
+    patch_cache_control(respuesta, private=True, no_store=True)
+    return respuesta
+
+
+# =====================================================================
+# MÉTRICAS (PROMETHEUS)
+# =====================================================================
+# URL: localhost/metrics
+# Texto con los histogramas de cada vista para que Prometheus lo lea.
+# Solo con el token de METRICAS_TOKEN (ver metricas.py)
+def metricas_prometheus(request):
+    if not metricas.activas():
+        raise Http404("Métricas desactivadas")
+    if not metricas.autorizado(request):
+        respuesta = HttpResponse("Token requerido", status=401, content_type="text/plain; charset=utf-8")
+        respuesta["WWW-Authenticate"] = 'Bearer realm="metrics"'
+        return respuesta
+    return HttpResponse(metricas.registro.exportar(), content_type="text/plain; version=0.0.4; charset=utf-8")
@@ -0,0 +1,162 @@
+# =====================================================================
+# VIEWS_ASYNC.PY - Versiones async del login, las listas y eliminar
+# =====================================================================
+# Estas vistas hacen lo mismo que las de views.py, pero usan el ORM
+# async de Django (aget, adelete, "async for"). Cuando el servidor
+# corre con ASGI (prueba2/asgi.py), mientras una consulta espera a la
+# base de datos el worker puede atender otras peticiones.
+#
+# Se activan con VISTAS_ASYNC=1 (asgi.py lo hace automáticamente);
+# urls.py elige entre este módulo y views.py con esa opción.
+# Tienen los mismos nombres que en views.py para poder cambiarlas.
+#
+# render() se ejecuta en un hilo (sync_to_async) porque las plantillas
+# pueden hacer consultas (por ejemplo {% version_catalogo %}).
+#
+# "eventos" (Server-Sent Events) solo existe aquí: se usa siempre,
+# también sin VISTAS_ASYNC.
+# =====================================================================
+
+from asgiref.sync import sync_to_async
+from django.core.handlers.asgi import ASGIRequest
+from django.http import JsonResponse, StreamingHttpResponse
+from django.shortcuts import render, redirect, aget_object_or_404
+from django.views.decorators.csrf import ensure_csrf_cookie
+
+from .models import Practica, Producto, Insumo, Empleado
+from .paginacion import apaginar
+from .busqueda import paginar_busqueda
+from .cache import cachear_vista
+from .routers import usar_replica
+from .sesion import login_requerido, login_requerido_api
+from . import contrasenas
+from . import eventos as canal_eventos
+
+arender = sync_to_async(render)
+apaginar_busqueda = sync_to_async(paginar_busqueda)
+
+
+# =====================================================================
+# LOGIN
+# =====================================================================
+# Igual que views.login, pero la contraseña se verifica en el pool de
+# contrasenas.py sin ocupar el event loop (ni un hilo) mientras tanto.
+# =====================================================================
+async def login(request):
+    if request.method == "POST":
+        try:
+            usuario = await Practica.objects.aget(username=request.POST.get("username"))
+        except Practica.DoesNotExist:
+            return await arender(request, "login.html", {"error": "El usuario no existe"})
+        if not await contrasenas.averificar_usuario(usuario, request.POST.get("password")):
+            return await arender(request, "login.html", {"error": "Contraseña incorrecta"})
+        await request.session.aset('usuario_id', usuario.id)
+        await request.session.aset('usuario_nombre', usuario.username)
+        return redirect("dashboard")
+    return await arender(request, "login.html")
+
+
+# =====================================================================
+# USUARIOS
+# =====================================================================
+@ensure_csrf_cookie
+@login_requerido
+async def usuarios(request):
+    lista_usuarios = [usuario async for usuario in Practica.objects.all()]
+    return await arender(request, "usuarios.html", {
+        "usuarios": lista_usuarios,
+        "usuario_actual": request.usuario
+    })
+
+
+@login_requerido
+async def eliminar_usuario(request, id):
+    usuario = await aget_object_or_404(Practica, id=id)
+    await usuario.adelete()
+    return redirect("usuarios")
+
+
+# =====================================================================
+# MENÚ
+# =====================================================================
+@ensure_csrf_cookie
+@cachear_vista(Producto)
+@login_requerido
+async def menu_list(request):
+    query = request.GET.get("q")
+    if query:
+        productos = await apaginar_busqueda(Producto, query, request)
+    else:
+        productos = await apaginar(Producto.objects.all(), request)
+    return await arender(request, "menu.html", {"productos": productos, "pagina": productos})
+
+
+@login_requerido
+async def eliminar_producto(request, id):
+    producto = await aget_object_or_404(Producto, id=id)
+    await producto.adelete()
+    return redirect("menu_list")
+
+
+# =====================================================================
+# INVENTARIO
+# =====================================================================
+@ensure_csrf_cookie
+@usar_replica
+@login_requerido
+async def inventario_list(request):
+    query = request.GET.get("q")
+    if query:
+        insumos = await apaginar_busqueda(Insumo, query, request)
+    else:
+        insumos = await apaginar(Insumo.objects.all(), request)
+
+    return await arender(request, "inventario.html", {"insumos": insumos, "pagina": insumos})
+
+
+@login_requerido
+async def eliminar_insumo(request, id):
+    insumo = await aget_object_or_404(Insumo, id=id)
+    await insumo.adelete()
+    return redirect("inventario_list")
+
+
+# =====================================================================
+# EMPLEADOS
+# =====================================================================
+@ensure_csrf_cookie
+@usar_replica
+@login_requerido
+async def empleados_list(request):
+    query = request.GET.get("q")
+    if query:
+        empleados = await apaginar_busqueda(Empleado, query, request)
+    else:
+        empleados = await apaginar(Empleado.objects.all(), request)
+
+    return await arender(request, "empleados.html", {"empleados": empleados, "pagina": empleados})
+
+
+@login_requerido
+async def eliminar_empleado(request, id):
+    empleado = await aget_object_or_404(Empleado, id=id)
+    await empleado.adelete()
+    return redirect("empleados_list")
+
+
+# =====================================================================
+# EVENTOS EN VIVO (Server-Sent Events)
+# =====================================================================
+# URL: /eventos/  (new EventSource("/eventos/") en el navegador)
+# La conexión queda abierta y recibe un evento cada vez que cambia el
+# stock de un producto o la cantidad de un insumo (ver eventos.py)
+# Solo con ASGI: el handler WSGI junta TODO el generador antes de enviar
+# nada y este no termina nunca (la petición y el worker quedan colgados)
+@login_requerido_api
+async def eventos(request):
+    if not isinstance(request, ASGIRequest):
+        return JsonResponse({"error": "Los eventos en vivo requieren ASGI (uvicorn)"}, status=501)
+    respuesta = StreamingHttpResponse(canal_eventos.flujo(), content_type="text/event-stream")
+    respuesta["Cache-Control"] = "no-cache"
+    respuesta["X-Accel-Buffering"] = "no"  # Que nginx no junte los eventos
+    return respuesta
@@ -5,6 +5,16 @@ It exposes the ASGI callable as a module-level variable named ``application``.
 
 For more information on this file, see
 https://docs.djangoproject.com/en/5.2/howto/deployment/asgi/
+
+PRODUCCIÓN (recomendado):
+    uvicorn prueba2.asgi:application --host 0.0.0.0 --port 8000 --workers 4
+
+    o con gunicorn administrando los procesos:
+    gunicorn prueba2.asgi:application -k uvicorn.workers.UvicornWorker -w 4
+
+Con ASGI las vistas de listas y eliminar son async (pruapp/views_async.py):
+mientras esperan a la base de datos el worker atiende otras peticiones.
+Para compararlo con WSGI: python manage.py bench_asgi
 """
 
 import os
@@ -13,4 +23,7 @@ from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'prueba2.settings')
 
+# Usar las vistas async (se lee en settings.VISTAS_ASYNC)
+os.environ.setdefault('VISTAS_ASYNC', '1')
+
 application = get_asgi_application()